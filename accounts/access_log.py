@@ -0,0 +1,173 @@
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import EndpointAccess, EndpointAccessDaily, User
+
+logger = logging.getLogger(__name__)
+
+
+# Gravação em lote a partir de BATCH_SIZE eventos ou a cada FLUSH_INTERVAL
+ACCESS_LOG_BATCH_SIZE = 5000
+ACCESS_LOG_FLUSH_INTERVAL = 10
+# Acima disso os eventos mais antigos são descartados (banco indisponível)
+ACCESS_LOG_BUFFER_SIZE = 50000
+ACCESS_LOG_RETENTION_DAYS = 90
+PRUNE_BATCH_SIZE = 10000
+
+
+def _access_from_event(event):
+    accessed_at = event.get("accessed_at")
+    if isinstance(accessed_at, str):
+        accessed_at = parse_datetime(accessed_at)
+    return EndpointAccess(
+        user_id=event.get("user_id"),
+        endpoint=(event.get("path") or "")[:255],
+        method=(event.get("method") or "GET")[:10],
+        ip=(event.get("ip") or "unknown")[:39],
+        user_agent=(event.get("user_agent") or "")[:255],
+        accessed_at=accessed_at or timezone.now(),
+    )
+
+
+def save_access_events(events):
+    objs = [_access_from_event(event) for event in events]
+    # Usuários removidos entre a requisição e a gravação invalidariam o lote
+    user_ids = {obj.user_id for obj in objs if obj.user_id}
+    existing = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+    for obj in objs:
+        if obj.user_id not in existing:
+            obj.user_id = None
+    EndpointAccess.objects.bulk_create(objs, batch_size=ACCESS_LOG_BATCH_SIZE)
+
+
+class AccessLogBuffer:
+    """
+    Buffer circular em memória do processo para os acessos registrados pelo
+    AccessLogMixin. Os eventos são gravados com bulk_create quando o buffer
+    atinge `batch_size` ou quando `interval` segundos se passaram desde a
+    última gravação, verificados ao fim de cada requisição (request_finished),
+    depois que a resposta já foi entregue.
+    """
+
+    def __init__(
+        self,
+        batch_size=ACCESS_LOG_BATCH_SIZE,
+        interval=ACCESS_LOG_FLUSH_INTERVAL,
+        maxlen=ACCESS_LOG_BUFFER_SIZE,
+        writer=save_access_events,
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.writer = writer
+        self.events = deque(maxlen=maxlen)
+        self.dropped = 0
+        self.last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def push(self, event):
+        event.setdefault("accessed_at", timezone.now())
+        with self._lock:
+            if len(self.events) == self.events.maxlen:
+                self.dropped += 1
+            self.events.append(event)
+
+    def drain(self, limit=None):
+        with self._lock:
+            size = len(self.events) if limit is None else min(limit, len(self.events))
+            return [self.events.popleft() for _ in range(size)]
+
+    def should_flush(self):
+        if not self.events:
+            return False
+        return (
+            len(self.events) >= self.batch_size
+            or time.monotonic() - self.last_flush >= self.interval
+        )
+
+    def flush(self):
+        """
+        Grava tudo o que está no buffer em lotes de `batch_size`. Um lote
+        que falha é descartado e registrado no log, como fazia a task.
+        """
+        self.last_flush = time.monotonic()
+        total = 0
+        while True:
+            events = self.drain(self.batch_size)
+            if not events:
+                break
+            try:
+                self.writer(events)
+                total += len(events)
+            except Exception as e:
+                logger.error(
+                    f"Erro ao gravar {len(events)} logs de acesso: {e}", exc_info=True
+                )
+                break
+        if self.dropped:
+            logger.warning(f"{self.dropped} logs de acesso descartados com o buffer cheio")
+            self.dropped = 0
+        return total
+
+    def flush_if_needed(self):
+        if self.should_flush():
+            return self.flush()
+        return 0
+
+
+buffer = AccessLogBuffer()
+
+
+# Consolidação diária e retenção
+
+def rollup_endpoint_access(day=None):
+    """
+    Consolida os acessos de `day` (padrão: ontem) por endpoint, método e
+    usuário em EndpointAccessDaily. Refazer um dia substitui as linhas.
+    """
+    day = day or timezone.localdate() - timedelta(days=1)
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    end = start + timedelta(days=1)
+
+    rows = (
+        EndpointAccess.objects.filter(accessed_at__gte=start, accessed_at__lt=end)
+        .order_by()
+        .values("endpoint", "method", "user_id")
+        .annotate(
+            hits=Count("pk"),
+            first_access_at=Min("accessed_at"),
+            last_access_at=Max("accessed_at"),
+        )
+    )
+    objs = [EndpointAccessDaily(date=day, **row) for row in rows]
+    with transaction.atomic():
+        EndpointAccessDaily.objects.filter(date=day).delete()
+        EndpointAccessDaily.objects.bulk_create(objs, batch_size=ACCESS_LOG_BATCH_SIZE)
+    return len(objs)
+
+
+def prune_endpoint_access(retention_days=ACCESS_LOG_RETENTION_DAYS, batch_size=PRUNE_BATCH_SIZE):
+    """
+    Remove os acessos anteriores à janela de retenção em lotes curtos, para
+    não segurar locks na tabela. O histórico agregado fica no rollup diário.
+    """
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    total = 0
+    while True:
+        ids = list(
+            EndpointAccess.objects.filter(accessed_at__lt=cutoff)
+            .order_by("accessed_at")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        deleted, _ = EndpointAccess.objects.filter(pk__in=ids).delete()
+        total += deleted
+    return total
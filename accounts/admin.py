@@ -272,4 +272,23 @@ class MonthlyGoalAdmin(admin.ModelAdmin):
         "month_year"
     )
     list_per_page = 10
-    list_max_show_all = 100
\ No newline at end of file
+    list_max_show_all = 100
+
+@admin.register(EndpointAccess)
+class EndpointAccessAdmin(admin.ModelAdmin):
+    list_display = ("accessed_at", "method", "endpoint", "user", "ip")
+    search_fields = ("endpoint", "user__complete_name", "ip")
+    list_filter = ("method", "accessed_at")
+    autocomplete_fields = ("user",)
+    date_hierarchy = "accessed_at"
+    show_full_result_count = False
+
+
+@admin.register(EndpointAccessDaily)
+class EndpointAccessDailyAdmin(admin.ModelAdmin):
+    list_display = ("date", "method", "endpoint", "user", "hits", "last_access_at")
+    search_fields = ("endpoint", "user__complete_name")
+    list_filter = ("date", "method")
+    autocomplete_fields = ("user",)
+    date_hierarchy = "date"
+    list_per_page = 50
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0046_monthlygoal_end_date_monthlygoal_start_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='endpointaccess',
+            name='accessed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Acessado em'),
+        ),
+        migrations.CreateModel(
+            name='EndpointAccessDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('endpoint', models.CharField(max_length=255, verbose_name='Endpoint')),
+                ('method', models.CharField(max_length=10, verbose_name='Método')),
+                ('hits', models.PositiveIntegerField(verbose_name='Acessos')),
+                ('first_access_at', models.DateTimeField(verbose_name='Primeiro Acesso')),
+                ('last_access_at', models.DateTimeField(verbose_name='Último Acesso')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Acessos Diários ao Endpoint',
+                'verbose_name_plural': 'Acessos Diários ao Endpoint',
+                'ordering': ['-date', '-hits'],
+                'indexes': [models.Index(fields=['date', 'endpoint'], name='accounts_en_date_7993f7_idx')],
+            },
+        ),
+    ]
@@ -8,6 +8,7 @@ from django.forms import ValidationError
 from simple_history.models import HistoricalRecords
 from django.urls import reverse_lazy
 from django.utils.text import slugify
+from django.utils import timezone
 from django.db.models import Sum
 from datetime import timedelta
 
@@ -336,7 +337,8 @@ class EndpointAccess(models.Model):
     endpoint = models.CharField("Endpoint", max_length=255)
     user_agent = models.CharField("User Agent", max_length=255, blank=True, null=True)
     ip = models.GenericIPAddressField("IP")
-    accessed_at = models.DateTimeField("Acessado em", auto_now_add=True)
+    # Preenchido na requisição: a gravação acontece depois, em lote
+    accessed_at = models.DateTimeField("Acessado em", default=timezone.now, db_index=True)
 
     class Meta:
         verbose_name = "Acessos ao Endpoint"
@@ -347,6 +349,38 @@ class EndpointAccess(models.Model):
         return f"{self.user} - {self.endpoint} - {self.accessed_at}"
 
 
+class EndpointAccessDaily(models.Model):
+    """
+    Acessos consolidados por dia, endpoint, método e usuário. Mantém o
+    histórico depois que os acessos individuais saem da janela de retenção.
+    """
+
+    date = models.DateField("Data")
+    endpoint = models.CharField("Endpoint", max_length=255)
+    method = models.CharField("Método", max_length=10)
+    user = models.ForeignKey(
+        "accounts.User",
+        verbose_name="Usuário",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+    )
+    hits = models.PositiveIntegerField("Acessos")
+    first_access_at = models.DateTimeField("Primeiro Acesso")
+    last_access_at = models.DateTimeField("Último Acesso")
+
+    class Meta:
+        verbose_name = "Acessos Diários ao Endpoint"
+        verbose_name_plural = "Acessos Diários ao Endpoint"
+        ordering = ["-date", "-hits"]
+        indexes = [
+            models.Index(fields=["date", "endpoint"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.endpoint} - {self.user} ({self.hits})"
+
+
 
 class MonthlyGoal(models.Model):
     branch = models.ForeignKey(
@@ -0,0 +1,10 @@
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+from . import access_log
+
+
+@receiver(request_finished)
+def flush_access_log(sender, **kwargs):
+    # Depois da resposta entregue: a gravação em lote não atrasa o cliente
+    access_log.buffer.flush_if_needed()
@@ -9,6 +9,7 @@ from django.utils import timezone
 import requests
 
 from celery import shared_task
+from .access_log import prune_endpoint_access, rollup_endpoint_access
 from .models import User, EndpointAccess
 
 logger = logging.getLogger(__name__)
@@ -125,3 +126,17 @@ def create_endpoint_access_log(request_data):
         )
         return {"status": "error", "message": "Failed to create endpoint access log"}
     return {"status": "success", "message": "Endpoint access log created successfully"}
+
+
+@shared_task
+def rollup_and_prune_endpoint_access():
+    """
+    Consolida os acessos de ontem em EndpointAccessDaily e remove os acessos
+    fora da janela de retenção.
+    """
+    rows = rollup_endpoint_access()
+    deleted = prune_endpoint_access()
+    logger.info(
+        f"[EndpointAccess] {rows} linhas consolidadas, {deleted} acessos removidos"
+    )
+    return {"rollup_rows": rows, "deleted": deleted}
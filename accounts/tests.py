@@ -1,10 +1,19 @@
+from datetime import date, datetime, timedelta
+from unittest import mock
+
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
 
-from .models import User, Department, Employee, Role, Branch, Address, PhoneNumber, Squad, UserType
+from . import access_log
+from .access_log import AccessLogBuffer, prune_endpoint_access, rollup_endpoint_access
+from .models import (
+    User, Department, Employee, Role, Branch, Address, PhoneNumber, Squad, UserType,
+    EndpointAccess, EndpointAccessDaily,
+)
 from accounts.serializers import UserSerializer, DepartmentSerializer, EmployeeSerializer
 
 
@@ -322,3 +331,73 @@ class GroupTests(APITestCase):
         }
         response = self.client.post(self.url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class EndpointAccessLogTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username='access', email='access@example.com', password='testpass', complete_name='Access User'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('api:user-list')
+
+    def test_requests_are_buffered_and_written_in_batches(self):
+        buffer = AccessLogBuffer(batch_size=2, interval=3600)
+        with mock.patch.object(access_log, 'buffer', buffer), \
+                mock.patch('accounts.task.create_endpoint_access_log.delay') as delay:
+            self.client.get(self.url)
+            self.assertEqual(EndpointAccess.objects.count(), 0)
+            self.assertEqual(len(buffer.events), 1)
+
+            # O segundo acesso atinge o tamanho do lote ao fim da requisição
+            self.client.get(self.url, HTTP_X_REAL_IP='10.0.0.1')
+
+        delay.assert_not_called()
+        self.assertEqual(len(buffer.events), 0)
+        accesses = EndpointAccess.objects.order_by('accessed_at')
+        self.assertEqual(accesses.count(), 2)
+        self.assertEqual(accesses[1].ip, '10.0.0.1')
+        self.assertEqual(accesses[1].user, self.user)
+
+    def test_time_trigger_and_deleted_users(self):
+        buffer = AccessLogBuffer(batch_size=1000, interval=60)
+        accessed_at = timezone.now() - timedelta(seconds=30)
+        buffer.push({'user_id': self.user.id, 'path': '/api/users/', 'method': 'GET', 'ip': '10.0.0.2', 'accessed_at': accessed_at})
+        buffer.push({'user_id': 999999, 'path': '/api/users/', 'method': 'GET', 'ip': '10.0.0.3'})
+        self.assertFalse(buffer.should_flush())
+
+        buffer.last_flush -= 61
+        self.assertEqual(buffer.flush_if_needed(), 2)
+        self.assertEqual(EndpointAccess.objects.get(ip='10.0.0.2').accessed_at, accessed_at)
+        self.assertIsNone(EndpointAccess.objects.get(ip='10.0.0.3').user)
+
+    def test_ring_buffer_drops_oldest_events(self):
+        buffer = AccessLogBuffer(maxlen=2, writer=lambda events: None)
+        for index in range(3):
+            buffer.push({'path': f'/api/{index}/'})
+        self.assertEqual([event['path'] for event in buffer.events], ['/api/1/', '/api/2/'])
+        self.assertEqual(buffer.dropped, 1)
+
+    def test_daily_rollup_and_retention(self):
+        other = User.objects.create_user(username='other', email='other@example.com', password='x', complete_name='Other')
+        day = date(2026, 1, 10)
+        base = timezone.make_aware(datetime(2026, 1, 10, 9))
+        EndpointAccess.objects.bulk_create([
+            EndpointAccess(user=self.user, endpoint='/api/sales/', method='GET', ip='10.0.0.1', accessed_at=base),
+            EndpointAccess(user=self.user, endpoint='/api/sales/', method='GET', ip='10.0.0.1', accessed_at=base + timedelta(hours=2)),
+            EndpointAccess(user=other, endpoint='/api/sales/', method='GET', ip='10.0.0.2', accessed_at=base),
+            EndpointAccess(user=self.user, endpoint='/api/sales/', method='GET', ip='10.0.0.1', accessed_at=base + timedelta(days=1)),
+        ])
+
+        self.assertEqual(rollup_endpoint_access(day), 2)
+        # Refazer o dia substitui as linhas
+        self.assertEqual(rollup_endpoint_access(day), 2)
+        row = EndpointAccessDaily.objects.get(date=day, user=self.user)
+        self.assertEqual(row.hits, 2)
+        self.assertEqual(row.first_access_at, base)
+        self.assertEqual(row.last_access_at, base + timedelta(hours=2))
+
+        recent = EndpointAccess.objects.create(endpoint='/api/sales/', method='GET', ip='10.0.0.9')
+        self.assertEqual(prune_endpoint_access(retention_days=30, batch_size=2), 4)
+        self.assertEqual(list(EndpointAccess.objects.all()), [recent])
+        self.assertEqual(EndpointAccessDaily.objects.filter(date=day).count(), 2)
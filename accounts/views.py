@@ -27,7 +27,8 @@ from accounts.serializers import *
 from accounts.task import send_login_info_logs
 from api.views import BaseModelViewSet
 from accounts.serializers import PasswordResetConfirmSerializer
-from field_services.models import BlockTimeAgent, Category, FreeTimeAgent, Schedule, Service
+from field_services.availability import AgentAvailability
+from field_services.models import Category, Schedule, Service
 from django.utils.dateparse import parse_time
 from django.utils import timezone
 from django.db.models import OuterRef, Subquery, Count, Value
@@ -217,71 +218,38 @@ class UserViewSet(AccessLogMixin, BaseModelViewSet):
 
         # parse
         try:
-            day = parse_date(date_str).weekday()
+            date = parse_date(date_str)
             start_time = parse_time(start_str)
             end_time   = parse_time(end_str)
+            if not all([date, start_time, end_time]):
+                raise ValueError
         except Exception:
             return Response(
                 {'detail': 'Formato de data ou hora inválido.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # subqueries para este único usuário
-        blocked_sq = BlockTimeAgent.objects.filter(
-            agent=user,
-            start_date__lte=date_str,
-            end_date__gte=date_str,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        )
-        free_sq = FreeTimeAgent.objects.filter(
-            agent=user,
-            is_deleted=False,
-            day_of_week=day,
-            start_time__lt=end_time,
-            end_time__gt=start_time
-        )
-        overlap_sq = Schedule.objects.filter(
-            schedule_agent=user,
-            schedule_date=date_str,
-            schedule_start_time__lt=end_time,
-            schedule_end_time__gt=start_time
-        )
-        
-        # monta lista de slots livres daquele dia para esse agente
-        free_qs = FreeTimeAgent.objects.filter(
-            agent=user,
-            is_deleted=False,
-            day_of_week=day,
-            start_time__lt=end_time,
-            end_time__gt=start_time,
-        ).values('start_time', 'end_time')
-
-        # 2) formata para string HH:MM
+        availability = AgentAvailability([user.id], date)
+        slot = availability.check(user.id, date, start_time, end_time)
+
+        # slots livres daquele dia para esse agente, formatados em HH:MM
         free_time_agent = [
             {
-                'start_time': slot['start_time'].strftime('%H:%M'),
-                'end_time':   slot['end_time'].strftime('%H:%M'),
+                'start_time': free_time.start_time.strftime('%H:%M'),
+                'end_time':   free_time.end_time.strftime('%H:%M'),
             }
-            for slot in free_qs
+            for free_time in availability.free_times(user.id, date).overlapping(start_time, end_time)
         ]
 
-        # executa EXISTS
-        is_blocked    = blocked_sq.exists()
-        has_free_slot = free_sq.exists()
-        has_overlap   = overlap_sq.exists()
-
-        available = (not is_blocked) and has_free_slot and (not has_overlap)
-
         data = {
             'user_id': user.id,
             'date': date_str,
             'start_time': start_str,
             'end_time': end_str,
-            'is_blocked': is_blocked,
-            'has_free_slot': has_free_slot,
-            'has_overlap': has_overlap,
-            'available': available,
+            'is_blocked': slot.is_blocked,
+            'has_free_slot': slot.has_free_slot,
+            'has_overlap': slot.has_overlap,
+            'available': slot.available,
             'free_time_agent': free_time_agent,
         }
 
@@ -303,9 +271,11 @@ class UserViewSet(AccessLogMixin, BaseModelViewSet):
             )
 
         try:
-            day        = parse_date(date_str).weekday()
+            date       = parse_date(date_str)
             start_time = parse_time(start_str)
             end_time   = parse_time(end_str)
+            if not all([date, start_time, end_time]):
+                raise ValueError
         except Exception:
             return Response(
                 {'detail': 'Formato inválido. Use YYYY-MM-DD e HH:MM.'},
@@ -321,23 +291,6 @@ class UserViewSet(AccessLogMixin, BaseModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        blocked_sq = BlockTimeAgent.objects.filter(
-            agent=OuterRef('pk'),
-            start_date__lte=date_str, end_date__gte=date_str,
-            start_time__lt=end_time, end_time__gt=start_time
-        )
-        free_sq = FreeTimeAgent.objects.filter(
-            agent=OuterRef('pk'),
-            is_deleted=False, day_of_week=day,
-            start_time__lt=end_time, end_time__gt=start_time
-        )
-        overlap_sq = Schedule.objects.filter(
-            schedule_agent=OuterRef('pk'),
-            schedule_date=date_str,
-            schedule_start_time__lt=end_time,
-            schedule_end_time__gt=start_time
-        )
-
         # começa o QS apenas pela categoria
         qs = User.objects.filter(categories__id=cat_id)
 
@@ -345,30 +298,19 @@ class UserViewSet(AccessLogMixin, BaseModelViewSet):
         if complete_name:
             qs = qs.filter(complete_name__icontains=complete_name)
 
-        # aplica disponibilidade e contagem
-        qs = (
-            qs
-            .annotate(
-                is_blocked=Exists(blocked_sq),
-                has_free_slot=Exists(free_sq),
-                has_overlap=Exists(overlap_sq),
-            )
-            .filter(
-                is_blocked=False,
-                has_free_slot=True,
-                has_overlap=False,
-            )
-            .annotate(
-                schedule_inspection_count=Count(
-                    'schedule_agent',
-                    filter=Q(schedule_agent__schedule_date=date_str)
-                )
-            )
-            .distinct()
-            .values('id', 'complete_name', 'schedule_inspection_count')
-        )
+        candidates = list(qs.distinct().values('id', 'complete_name'))
+        availability = AgentAvailability([c['id'] for c in candidates], date)
+
+        agents = [
+            {
+                **candidate,
+                'schedule_inspection_count': len(availability.schedules(candidate['id'], date).items),
+            }
+            for candidate in candidates
+            if availability.check(candidate['id'], date, start_time, end_time).available
+        ]
 
-        return Response(list(qs), status=status.HTTP_200_OK)
+        return Response(agents, status=status.HTTP_200_OK)
 
 
 
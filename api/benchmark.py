@@ -0,0 +1,420 @@
+import json
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.db import connection
+from django.urls import NoReverseMatch, reverse
+from rest_framework.serializers import ListSerializer, Serializer
+from rest_framework.test import APIClient
+
+from accounts.models import Address, Branch, Department, Employee, User
+from field_services.models import Category, Forms, Schedule, Service
+from financial.ledger import refresh_payment_summaries
+from financial.models import Financier, Payment, PaymentInstallment
+from resolve_crm.journey_state import refresh_journey_states
+from resolve_crm.models import Project, Sale
+from resolve_crm.search import refresh_search_text
+
+DEFAULT_BUDGETS_PATH = Path(__file__).with_name("benchmark_budgets.json")
+
+# Data fixa: a massa (e portanto o relatório) não depende do dia da execução
+FIXTURE_START = date(2025, 1, 1)
+FIXTURE_PREFIX = "benchmark_api"
+
+BUDGET_METRICS = ("queries", "sql_ms", "serialization_ms", "total_ms")
+
+# Sem cache os indicadores são sempre recalculados
+DUMMY_CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+# Massa sintética
+
+def build_fixture(sales=20000, seed=42, batch_size=2000):
+    """
+    Cria uma massa determinística de clientes, vendas, projetos,
+    agendamentos, pagamentos e parcelas, além das tabelas derivadas
+    (resumos de pagamento, estado da jornada e texto de busca) que os
+    endpoints leem. Deve rodar dentro de uma transação revertida ao final.
+    """
+    rng = random.Random(seed)
+    address = Address.objects.create(
+        zip_code="00000000",
+        country="Brazil",
+        state="PA",
+        city="Belém",
+        neighborhood="Centro",
+        street="Rua Benchmark API",
+        number="1",
+    )
+    branch = Branch.objects.create(name="Filial Benchmark API", address=address)
+    sellers = User.objects.bulk_create(
+        [
+            User(
+                username=f"{FIXTURE_PREFIX}_seller_{index}",
+                email=f"{FIXTURE_PREFIX}_seller_{index}@example.com",
+                complete_name=f"Vendedor Benchmark {index}",
+            )
+            for index in range(10)
+        ]
+    )
+    customers = User.objects.bulk_create(
+        [
+            User(
+                username=f"{FIXTURE_PREFIX}_customer_{index}",
+                email=f"{FIXTURE_PREFIX}_customer_{index}@example.com",
+                complete_name=f"Cliente Benchmark {index}",
+                first_document=f"{index:011d}",
+            )
+            for index in range(max(1, sales // 20))
+        ]
+    )
+    financiers = Financier.objects.bulk_create(
+        [Financier(name=f"Financiadora Benchmark {index}") for index in range(5)]
+    )
+    service = Service.objects.create(
+        name="Vistoria Benchmark API",
+        category=Category.objects.create(name="Vistoria Benchmark API"),
+        form=Forms.objects.create(name="Formulário Benchmark API"),
+    )
+
+    counts = dict.fromkeys(
+        ("sales", "projects", "schedules", "payments", "installments"), 0
+    )
+    for start in range(0, sales, batch_size):
+        size = min(batch_size, sales - start)
+        sale_objs = Sale.objects.bulk_create(
+            [
+                Sale(
+                    customer=rng.choice(customers),
+                    seller=rng.choice(sellers),
+                    sales_supervisor=rng.choice(sellers),
+                    sales_manager=rng.choice(sellers),
+                    branch=branch,
+                    total_value=Decimal(rng.randrange(15000, 90000)),
+                    contract_number=f"BENCH{start + index:07d}",
+                    payment_status=rng.choice(("P", "L", "C", "CA")),
+                    status=rng.choice(("P", "F", "EA", "C", "D")),
+                    is_pre_sale=rng.random() < 0.1,
+                )
+                for index in range(size)
+            ]
+        )
+        projects = Project.objects.bulk_create(
+            [
+                Project(
+                    sale=sale,
+                    status=rng.choice(("P", "CO", "EA", "C", "D")),
+                    designer_status=rng.choice(("P", "CO", "EA", "C", "D")),
+                )
+                for sale in sale_objs
+            ]
+        )
+        schedules = []
+        for project in projects:
+            for offset in (rng.randrange(0, 365), rng.randrange(0, 365)):
+                day = FIXTURE_START + timedelta(days=offset)
+                schedules.append(
+                    Schedule(
+                        service=service,
+                        project=project,
+                        customer=project.sale.customer,
+                        address=address,
+                        schedule_creator=project.sale.seller,
+                        schedule_date=day,
+                        schedule_start_time=dt_time(8),
+                        schedule_end_date=day,
+                        schedule_end_time=dt_time(12),
+                    )
+                )
+        Schedule.objects.bulk_create(schedules)
+        payments = Payment.objects.bulk_create(
+            [
+                Payment(
+                    borrower=sale.customer,
+                    sale=sale,
+                    value=sale.total_value,
+                    payment_type=rng.choice(("C", "F", "P")),
+                    financier=rng.choice(financiers),
+                    due_date=FIXTURE_START + timedelta(days=rng.randrange(0, 365)),
+                )
+                for sale in sale_objs
+            ]
+        )
+        installments = []
+        for payment in payments:
+            for number in range(1, 5):
+                installments.append(
+                    PaymentInstallment(
+                        payment=payment,
+                        installment_value=payment.value / 4,
+                        installment_number=number,
+                        due_date=payment.due_date + timedelta(days=30 * number),
+                        is_paid=rng.random() < 0.5,
+                    )
+                )
+        PaymentInstallment.objects.bulk_create(installments)
+
+        # bulk_create não dispara os sinais que mantêm as tabelas derivadas
+        refresh_payment_summaries([payment.pk for payment in payments])
+        refresh_journey_states([project.pk for project in projects])
+        refresh_search_text(
+            sale_ids=[sale.pk for sale in sale_objs],
+            project_ids=[project.pk for project in projects],
+        )
+
+        counts["sales"] += len(sale_objs)
+        counts["projects"] += len(projects)
+        counts["schedules"] += len(schedules)
+        counts["payments"] += len(payments)
+        counts["installments"] += len(installments)
+
+    return counts
+
+
+def create_benchmark_user():
+    """
+    Superusuário com cadastro de colaborador, que alguns endpoints
+    financeiros exigem de quem consulta.
+    """
+    user = User.objects.create_superuser(
+        username=f"{FIXTURE_PREFIX}_admin",
+        email=f"{FIXTURE_PREFIX}_admin@example.com",
+        password="benchmark",
+        complete_name="Administrador Benchmark",
+    )
+    department = Department.objects.create(name="Departamento Benchmark API", owner=user)
+    Employee.objects.create(user=user, department=department)
+    return user
+
+
+# Endpoints
+
+def discover_endpoints(router=None, only=None):
+    """
+    Percorre o registro do router da API e retorna os endpoints medidos:
+    listagem, detalhe e as ações de indicadores de cada viewset. `only`
+    restringe aos basenames ou prefixos informados.
+    """
+    if router is None:
+        from api.urls import router
+
+    endpoints = []
+    for prefix, viewset, basename in router.registry:
+        if only and basename not in only and prefix not in only:
+            continue
+        if hasattr(viewset, "list"):
+            endpoints.append({"name": f"{basename}-list", "kind": "list", "basename": basename})
+        if hasattr(viewset, "retrieve"):
+            endpoints.append({"name": f"{basename}-detail", "kind": "retrieve", "basename": basename})
+        for action in viewset.get_extra_actions():
+            if action.detail or "get" not in action.mapping:
+                continue
+            if "indicators" not in action.url_path:
+                continue
+            endpoints.append(
+                {
+                    "name": f"{basename}-{action.url_name}",
+                    "kind": "indicators",
+                    "basename": basename,
+                }
+            )
+    return endpoints
+
+
+# Medição
+
+class _SerializationTimer:
+    """
+    Soma o tempo gasto em `serializer.data`, contando só o serializer mais
+    externo. Consultas disparadas durante a serialização (N+1) entram aqui.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._depth = 0
+
+    def wrap(self, prop):
+        timer = self
+
+        def fget(serializer):
+            if timer._depth:
+                return prop.fget(serializer)
+            timer._depth += 1
+            started = time.perf_counter()
+            try:
+                return prop.fget(serializer)
+            finally:
+                timer.seconds += time.perf_counter() - started
+                timer._depth -= 1
+
+        return property(fget)
+
+
+class _SQLTimer:
+    def __init__(self):
+        self.seconds = 0.0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.statements.append(sql)
+
+
+def measure_request(client, url, params=None):
+    sql = _SQLTimer()
+    serialization = _SerializationTimer()
+    with mock.patch.object(
+        Serializer, "data", serialization.wrap(Serializer.data)
+    ), mock.patch.object(
+        ListSerializer, "data", serialization.wrap(ListSerializer.data)
+    ), connection.execute_wrapper(sql):
+        started = time.perf_counter()
+        response = client.get(url, params or {})
+        total = time.perf_counter() - started
+
+    return response, {
+        "status": response.status_code,
+        "queries": len(sql.statements),
+        "duplicate_queries": len(sql.statements) - len(set(sql.statements)),
+        "sql_ms": round(sql.seconds * 1000, 2),
+        "serialization_ms": round(serialization.seconds * 1000, 2),
+        "total_ms": round(total * 1000, 2),
+    }
+
+
+def _best_of(client, url, params, repeat):
+    # A primeira requisição aquece os caches do processo (ContentType,
+    # tipos de documento obrigatórios...) e não entra na medição
+    client.get(url, params or {})
+    best_response, best = None, None
+    for _ in range(max(1, repeat)):
+        response, stats = measure_request(client, url, params)
+        if best is None or stats["total_ms"] < best["total_ms"]:
+            best_response, best = response, stats
+    return best_response, best
+
+
+def _first_id(response):
+    data = getattr(response, "data", None)
+    if isinstance(data, dict):
+        data = data.get("results")
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return data[0].get("id")
+    return None
+
+
+def run_benchmark(endpoints, user, repeat=3, page_size=10):
+    """
+    Mede cada endpoint autenticado como `user` e retorna
+    {nome: estatísticas}. O detalhe usa o primeiro registro da listagem.
+    """
+    client = APIClient()
+    client.force_authenticate(user=user)
+    params = {"limit": page_size}
+    first_ids = {}
+    results = {}
+
+    # Listagens antes dos detalhes, que dependem do id listado
+    ordered = sorted(endpoints, key=lambda endpoint: endpoint["kind"] == "retrieve")
+    for endpoint in ordered:
+        name, basename = endpoint["name"], endpoint["basename"]
+        try:
+            if endpoint["kind"] == "retrieve":
+                pk = first_ids.get(basename)
+                if pk is None:
+                    results[name] = {"skipped": "listagem sem registros"}
+                    continue
+                url = reverse(f"api:{basename}-detail", args=[pk])
+                response, stats = _best_of(client, url, None, repeat)
+            else:
+                url = reverse(f"api:{name}")
+                response, stats = _best_of(client, url, params, repeat)
+                if endpoint["kind"] == "list":
+                    first_ids[basename] = _first_id(response)
+        except NoReverseMatch:
+            results[name] = {"skipped": "rota não encontrada"}
+            continue
+        except Exception as exc:
+            results[name] = {"status": 500, "error": f"{type(exc).__name__}: {exc}"}
+            continue
+        results[name] = {"url": url, **stats}
+    return results
+
+
+# Orçamentos e relatório
+
+def load_budgets(path=DEFAULT_BUDGETS_PATH):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def budget_for(budgets, name):
+    budget = dict(budgets.get("default", {}))
+    budget.update(budgets.get("endpoints", {}).get(name, {}))
+    return budget
+
+
+def check_budgets(results, budgets):
+    """
+    Lista as violações: respostas com erro e métricas acima do orçamento do
+    endpoint (ou do padrão). Endpoints com "skip" no orçamento são ignorados.
+    """
+    violations = []
+    for name, stats in sorted(results.items()):
+        budget = budget_for(budgets, name)
+        if budget.get("skip") or "skipped" in stats:
+            continue
+        if stats.get("status", 500) >= 400:
+            violations.append(
+                {"endpoint": name, "metric": "status", "value": stats.get("status"), "budget": 200}
+            )
+            continue
+        for metric in BUDGET_METRICS:
+            limit = budget.get(metric)
+            if limit is not None and stats[metric] > limit:
+                violations.append(
+                    {"endpoint": name, "metric": metric, "value": stats[metric], "budget": limit}
+                )
+    return violations
+
+
+def build_report(results, violations, fixture, options):
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "database": connection.vendor,
+        "fixture": fixture,
+        "options": options,
+        "endpoints": results,
+        "violations": violations,
+    }
+
+
+def compare_reports(previous, current, tolerance=0.2, min_delta_ms=5):
+    """
+    Compara dois relatórios e retorna as regressões: mais consultas ou
+    tempo total acima de `tolerance` (fração) em relação ao anterior. Variações
+    menores que `min_delta_ms` são tratadas como ruído.
+    """
+    regressions = []
+    for name, stats in sorted(current["endpoints"].items()):
+        before = previous.get("endpoints", {}).get(name)
+        if not before or "queries" not in before or "queries" not in stats:
+            continue
+        if stats["queries"] > before["queries"]:
+            regressions.append(
+                {"endpoint": name, "metric": "queries", "before": before["queries"], "after": stats["queries"]}
+            )
+        delta = stats["total_ms"] - before["total_ms"]
+        if delta > before["total_ms"] * tolerance and delta > min_delta_ms:
+            regressions.append(
+                {"endpoint": name, "metric": "total_ms", "before": before["total_ms"], "after": stats["total_ms"]}
+            )
+    return regressions
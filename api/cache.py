@@ -0,0 +1,109 @@
+from hashlib import md5
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from django.core.cache import cache
+from django_prometheus.conf import NAMESPACE
+from prometheus_client import Counter
+
+
+INDICATOR_CACHE_TIMEOUT = 60
+
+# Parâmetros que não alteram o resultado dos indicadores
+IGNORED_PARAMS = {"page", "limit", "page_size", "fields", "expand", "omit"}
+
+indicator_cache_hits_total = Counter(
+    "indicator_cache_hits_total",
+    "Total de leituras de indicadores servidas pelo cache",
+    ["endpoint"],
+    namespace=NAMESPACE,
+)
+indicator_cache_misses_total = Counter(
+    "indicator_cache_misses_total",
+    "Total de leituras de indicadores que precisaram ser recalculadas",
+    ["endpoint"],
+    namespace=NAMESPACE,
+)
+
+
+def normalize_filters(query_params, ignored_params=IGNORED_PARAMS):
+    """
+    Serializa os filtros em ordem estável, para que a mesma consulta com
+    parâmetros em ordem diferente gere a mesma chave.
+    """
+    items = []
+    for key in sorted(query_params.keys()):
+        if key in ignored_params:
+            continue
+        values = sorted(value for value in query_params.getlist(key) if value != "")
+        if values:
+            items.append((key, values))
+    return urlencode(items, doseq=True)
+
+
+def get_permission_scope(user, view_all_perm=None):
+    """
+    Usuários que enxergam todos os registros compartilham o mesmo escopo;
+    os demais recebem um escopo próprio, já que o queryset é filtrado por eles.
+    """
+    if user.is_superuser or (view_all_perm and user.has_perm(view_all_perm)):
+        return "all"
+    return f"user:{user.pk}"
+
+
+def _tag_key(tag):
+    return f"indicators:tag:{tag}"
+
+
+def _tag_versions(tags):
+    keys = {tag: _tag_key(tag) for tag in tags}
+    stored = cache.get_many(keys.values())
+
+    versions = []
+    for key in keys.values():
+        version = stored.get(key)
+        if version is None:
+            version = uuid4().hex[:8]
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        versions.append(version)
+    return ".".join(versions)
+
+
+def indicator_cache_key(
+    request, endpoint, tags=(), scope=None, ignored_params=IGNORED_PARAMS
+):
+    if scope is None:
+        scope = get_permission_scope(request.user)
+    filters = normalize_filters(request.query_params, ignored_params)
+    filters_hash = md5(filters.encode()).hexdigest()
+    return f"indicators:{endpoint}:{scope}:{_tag_versions(tags)}:{filters_hash}"
+
+
+def response_cache_key(request, endpoint, tags=(), scope=None):
+    """
+    Chave para respostas paginadas: ao contrário dos indicadores, página e
+    seleção de campos alteram o conteúdo.
+    """
+    return indicator_cache_key(request, endpoint, tags, scope, ignored_params=())
+
+
+def get_cached(endpoint, cache_key):
+    value = cache.get(cache_key)
+    if value is None:
+        indicator_cache_misses_total.labels(endpoint=endpoint).inc()
+    else:
+        indicator_cache_hits_total.labels(endpoint=endpoint).inc()
+    return value
+
+
+def set_cached(cache_key, value, timeout=INDICATOR_CACHE_TIMEOUT):
+    cache.set(cache_key, value, timeout)
+
+
+def invalidate_indicator_tags(*tags):
+    """
+    Troca a versão das tags; as chaves antigas deixam de ser lidas e expiram
+    pelo timeout.
+    """
+    cache.set_many({_tag_key(tag): uuid4().hex[:8] for tag in tags}, None)
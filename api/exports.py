@@ -0,0 +1,332 @@
+import csv
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models.constants import LOOKUP_SEP
+from django.http import FileResponse, HttpRequest, QueryDict, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .querysets import lean_count, lean_queryset
+
+logger = logging.getLogger(__name__)
+
+
+EXPORT_CHUNK_SIZE = 2000
+# Acima disso a exportação vai para o worker e o arquivo fica no storage
+EXPORT_SYNC_MAX_ROWS = 100000
+EXPORT_STORAGE_PREFIX = "exports"
+EXPORT_JOB_KEY = "export:job:{}"
+EXPORT_JOB_TTL = 60 * 60 * 24
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+# Campos e linhas
+
+def _field_path_exists(model, path):
+    parts = path.split(LOOKUP_SEP)
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            # `customer_id` e afins
+            field = next((f for f in model._meta.concrete_fields if f.attname == part), None)
+            if field is None:
+                return False
+        if index < len(parts) - 1:
+            if not field.is_relation or field.related_model is None:
+                return False
+            model = field.related_model
+    return True
+
+
+def resolve_export_fields(queryset, requested=None):
+    """
+    Colunas da exportação: as pedidas em `?fields=` (campos, caminhos como
+    `customer__complete_name` ou anotações do queryset) ou, por padrão,
+    todos os campos concretos do modelo.
+    """
+    if not requested:
+        return [field.attname for field in queryset.model._meta.concrete_fields]
+
+    fields = [name.strip() for name in requested.split(",") if name.strip()]
+    invalid = [
+        name
+        for name in fields
+        if name not in queryset.query.annotations
+        and not _field_path_exists(queryset.model, name)
+    ]
+    if invalid:
+        raise ValidationError({"fields": f"Campos inválidos: {', '.join(invalid)}"})
+    return fields
+
+
+def export_rows(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Linhas como tuplas, lidas em lotes de `chunk_size`: a memória não cresce
+    com o tamanho da exportação.
+
+    Sem ordenação explícita (do viewset ou de ?ordering=) os lotes são
+    paginados pela pk, o que mantém a memória constante também no MySQL,
+    onde iterator() traz o resultado inteiro para o cliente. Com ordenação,
+    usa iterator(chunk_size=...) com a pk como desempate.
+    """
+    ordering = list(queryset.query.order_by)
+    keep = set(fields) | {name.lstrip("-") for name in ordering if isinstance(name, str)}
+    queryset = lean_queryset(queryset, keep=keep)
+
+    if ordering:
+        yield from (
+            queryset.order_by(*ordering, "pk").values_list(*fields).iterator(chunk_size=chunk_size)
+        )
+        return
+
+    last_pk = None
+    while True:
+        page = queryset.order_by("pk")
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        rows = list(page.values_list("pk", *fields)[:chunk_size])
+        for row in rows:
+            yield row[1:]
+        if len(rows) < chunk_size:
+            break
+        last_pk = rows[-1][0]
+
+
+def _value(value, for_xlsx=False):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    if isinstance(value, UUID):
+        return str(value)
+    if for_xlsx:
+        # O Excel não guarda fuso horário
+        if isinstance(value, datetime) and timezone.is_aware(value):
+            return timezone.localtime(value).replace(tzinfo=None)
+        if isinstance(value, str):
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+            return ILLEGAL_CHARACTERS_RE.sub("", value)
+    return value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, header):
+    writer = csv.writer(_Echo())
+    # BOM para o Excel reconhecer UTF-8
+    yield "\ufeff" + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_value(value) for value in row])
+
+
+def write_xlsx(rows, header, file):
+    """
+    Grava a planilha em modo write-only: as linhas vão direto para o
+    arquivo, sem manter a planilha inteira em memória.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Exportação")
+    sheet.append(header)
+    for row in rows:
+        sheet.append([_value(value, for_xlsx=True) for value in row])
+    workbook.save(file)
+
+
+def write_export(queryset, fields, export_format, file):
+    """
+    Grava a exportação em `file` (caminho) e retorna a quantidade de linhas.
+    """
+    total = 0
+
+    def rows():
+        nonlocal total
+        for row in export_rows(queryset, fields):
+            total += 1
+            yield row
+
+    if export_format == "xlsx":
+        write_xlsx(rows(), fields, file)
+    else:
+        with open(file, "w", encoding="utf-8", newline="") as output:
+            for line in iter_csv(rows(), fields):
+                output.write(line)
+    return total
+
+
+# Resposta
+
+def _export_filename(queryset, export_format):
+    name = queryset.model._meta.model_name
+    return f"{name}_{timezone.localtime():%Y%m%d%H%M%S}.{export_format}"
+
+
+def export_response(view, request):
+    """
+    Exporta o queryset do viewset com os mesmos filtros e escopo de
+    permissão da listagem. Pequenas exportações são transmitidas na
+    resposta; as grandes (ou com ?background=true) viram um job.
+    """
+    export_format = request.query_params.get("export_format", "csv")
+    if export_format not in EXPORT_FORMATS:
+        raise ValidationError(
+            {"export_format": f"Formato inválido. Use: {', '.join(EXPORT_FORMATS)}."}
+        )
+
+    queryset = view.get_export_queryset()
+    fields = resolve_export_fields(queryset, request.query_params.get("fields"))
+    filename = _export_filename(queryset, export_format)
+
+    if (
+        request.query_params.get("background") == "true"
+        or lean_count(queryset) > EXPORT_SYNC_MAX_ROWS
+    ):
+        return start_export_job(view, request, export_format, filename)
+
+    if export_format == "csv":
+        response = StreamingHttpResponse(
+            iter_csv(export_rows(queryset, fields), fields),
+            content_type=EXPORT_FORMATS["csv"],
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    # O XLSX precisa do arquivo completo; fica em disco, não em memória
+    file = tempfile.TemporaryFile(suffix=".xlsx")
+    write_xlsx(export_rows(queryset, fields), fields, file)
+    file.seek(0)
+    return FileResponse(
+        file, as_attachment=True, filename=filename, content_type=EXPORT_FORMATS["xlsx"]
+    )
+
+
+# Exportação em segundo plano
+
+def build_view(viewset_path, user, query_string):
+    """
+    Reconstrói o viewset com o usuário e os parâmetros da requisição
+    original, para que o worker aplique os mesmos filtros e escopo.
+    """
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = QueryDict(query_string)
+    http_request.user = user
+    request = Request(http_request)
+    request.user = user
+
+    view = import_string(viewset_path)()
+    view.request = request
+    view.args = ()
+    view.kwargs = {}
+    view.action = "export"
+    view.format_kwarg = None
+    view.headers = {}
+    return view
+
+
+def start_export_job(view, request, export_format, filename):
+    from api.task import export_queryset_job
+
+    job_id = uuid4().hex
+    viewset = type(view)
+    cache.set(
+        EXPORT_JOB_KEY.format(job_id),
+        {"status": "pending", "user_id": request.user.pk, "filename": filename},
+        EXPORT_JOB_TTL,
+    )
+    export_queryset_job.delay(
+        job_id,
+        f"{viewset.__module__}.{viewset.__qualname__}",
+        request.user.pk,
+        request.query_params.urlencode(),
+        export_format,
+    )
+    return Response(
+        export_job_payload(job_id, get_export_job(job_id, request.user)),
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def get_export_job(job_id, user):
+    """
+    Estado do job, visível apenas para quem pediu a exportação.
+    """
+    job = cache.get(EXPORT_JOB_KEY.format(job_id))
+    if job is None or job["user_id"] != user.pk:
+        return None
+    return job
+
+
+def export_job_payload(job_id, job):
+    payload = {
+        "job_id": job_id,
+        "status": job["status"],
+        "status_url": reverse("api:export-job-detail", args=[job_id]),
+        "download_url": reverse("api:export-job-download", args=[job_id]),
+    }
+    for key in ("rows", "message"):
+        if key in job:
+            payload[key] = job[key]
+    return payload
+
+
+def run_export_job(job_id, viewset_path, user_id, query_string, export_format):
+    from notifications.signals import notify
+
+    from accounts.models import User
+
+    key = EXPORT_JOB_KEY.format(job_id)
+    job = cache.get(key) or {"user_id": user_id, "filename": f"{job_id}.{export_format}"}
+    user = User.objects.get(pk=user_id)
+
+    fd, path = tempfile.mkstemp(suffix=f".{export_format}")
+    os.close(fd)
+    try:
+        view = build_view(viewset_path, user, query_string)
+        queryset = view.get_export_queryset()
+        fields = resolve_export_fields(queryset, view.request.query_params.get("fields"))
+        rows = write_export(queryset, fields, export_format, path)
+        with open(path, "rb") as file:
+            name = default_storage.save(
+                f"{EXPORT_STORAGE_PREFIX}/{user_id}/{job_id}.{export_format}", File(file)
+            )
+    except Exception as e:
+        logger.error(f"Erro na exportação {job_id}: {e}", exc_info=True)
+        cache.set(key, {**job, "status": "error", "message": str(e)}, EXPORT_JOB_TTL)
+        return {"status": "error", "message": str(e)}
+    finally:
+        os.remove(path)
+
+    job = {**job, "status": "ready", "name": name, "rows": rows}
+    cache.set(key, job, EXPORT_JOB_TTL)
+    notify.send(
+        user,
+        recipient=user,
+        verb="Exportação concluída",
+        description=f"{job['filename']} ({rows} linhas): "
+        f"{reverse('api:export-job-download', args=[job_id])}",
+    )
+    return {"status": "ready", "job_id": job_id, "rows": rows}
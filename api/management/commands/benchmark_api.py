@@ -0,0 +1,154 @@
+import json
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+
+from api.benchmark import (
+    DEFAULT_BUDGETS_PATH,
+    DUMMY_CACHES,
+    build_fixture,
+    build_report,
+    check_budgets,
+    compare_reports,
+    create_benchmark_user,
+    discover_endpoints,
+    load_budgets,
+    run_benchmark,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede consultas, tempo de SQL e tempo de serialização da listagem, "
+        "do detalhe e dos indicadores de cada viewset registrado no router "
+        "da API, sobre uma massa sintética determinística criada em uma "
+        "transação revertida ao final. Grava um relatório JSON e falha quando "
+        "algum orçamento é excedido. Localmente: DB_USED=sqlite."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sales",
+            type=int,
+            default=20000,
+            help="Quantidade de vendas sintéticas (um projeto, dois agendamentos, "
+            "um pagamento e quatro parcelas por venda).",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Semente da massa sintética.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Tamanho dos lotes de bulk_create.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Requisições por endpoint; vale a mais rápida.",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=10,
+            help="Valor de `limit` nas listagens e indicadores.",
+        )
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            help="Basenames ou prefixos do router a medir (padrão: todos).",
+        )
+        parser.add_argument(
+            "--budgets",
+            default=str(DEFAULT_BUDGETS_PATH),
+            help="Arquivo JSON com os orçamentos por endpoint.",
+        )
+        parser.add_argument(
+            "--output",
+            default="benchmark_api.json",
+            help="Arquivo do relatório JSON.",
+        )
+        parser.add_argument(
+            "--compare",
+            help="Relatório anterior para listar as regressões.",
+        )
+        parser.add_argument(
+            "--with-cache",
+            action="store_true",
+            help="Mantém o cache configurado em vez de desativá-lo.",
+        )
+
+    def handle(self, *args, **options):
+        endpoints = discover_endpoints(only=options["only"])
+        if not endpoints:
+            raise CommandError("Nenhum endpoint encontrado no router.")
+        budgets = load_budgets(options["budgets"])
+
+        cache_context = (
+            nullcontext() if options["with_cache"] else override_settings(CACHES=DUMMY_CACHES)
+        )
+        with cache_context, transaction.atomic():
+            fixture = build_fixture(
+                sales=options["sales"],
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+            self.stdout.write(
+                ", ".join(f"{total} {name}" for name, total in fixture.items())
+                + " sintéticos criados."
+            )
+            user = create_benchmark_user()
+            results = run_benchmark(
+                endpoints, user, repeat=options["repeat"], page_size=options["page_size"]
+            )
+            transaction.set_rollback(True)
+
+        violations = check_budgets(results, budgets)
+        report = build_report(
+            results,
+            violations,
+            fixture,
+            {key: options[key] for key in ("sales", "seed", "repeat", "page_size")},
+        )
+        with open(options["output"], "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+
+        for name, stats in sorted(results.items()):
+            self._report(name, stats)
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                previous = json.load(file)
+            for regression in compare_reports(previous, report):
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Regressão em {regression['endpoint']}: {regression['metric']} "
+                        f"{regression['before']} -> {regression['after']}"
+                    )
+                )
+
+        self.stdout.write(f"Relatório gravado em {options['output']}.")
+        if violations:
+            for violation in violations:
+                self.stderr.write(
+                    self.style.ERROR(
+                        f"{violation['endpoint']}: {violation['metric']} = "
+                        f"{violation['value']} (orçamento {violation['budget']})"
+                    )
+                )
+            raise CommandError(f"{len(violations)} orçamento(s) excedido(s).")
+        self.stdout.write(self.style.SUCCESS("Todos os endpoints dentro do orçamento."))
+
+    def _report(self, name, stats):
+        if "skipped" in stats:
+            self.stdout.write(f"{name}: ignorado ({stats['skipped']})")
+        elif "error" in stats:
+            self.stdout.write(f"{name}: erro ({stats['error']})")
+        else:
+            self.stdout.write(
+                f"{name}: HTTP {stats['status']}, {stats['queries']} queries "
+                f"({stats['duplicate_queries']} repetidas), SQL {stats['sql_ms']:.1f}ms, "
+                f"serialização {stats['serialization_ms']:.1f}ms, total {stats['total_ms']:.1f}ms"
+            )
@@ -1,25 +1,188 @@
+import base64
+import binascii
+import json
+import math
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import replace_query_param
+
+from api.cache import (
+    IGNORED_PARAMS,
+    get_cached,
+    get_permission_scope,
+    indicator_cache_key,
+    set_cached,
+)
+from api.querysets import lean_count
+
+
+class LeanCountPaginator(Paginator):
+    """
+    Paginator cujo total vem do COUNT sobre o queryset enxuto, sem as
+    anotações e JOINs que só servem para serializar a página.
+    """
+
+    @cached_property
+    def count(self):
+        return lean_count(self.object_list)
+
 
 class CustomPagination(PageNumberPagination):
+    django_paginator_class = LeanCountPaginator
     page_size = 10
     page_size_query_param = 'limit'
     max_page_size = 100
     page_query_param = 'page'
 
+    # Modo keyset: ativado com ?cursor= (vazio na primeira página)
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-created_at', 'id')
+    # ?count=false dispensa o total no modo cursor
+    count_query_param = 'count'
+    count_cache_timeout = 60
+
     def __init__(self):
         super().__init__()
         self.extra_meta = {}
+        self.cursor_mode = False
 
     def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if self.cursor_mode:
+            return self.paginate_queryset_by_cursor(queryset, request, view)
+
         try:
             return super().paginate_queryset(queryset, request, view)
         except NotFound:
             self.page = None
             return []
 
+    # Modo cursor
+
+    def get_cursor_ordering(self, queryset, view=None):
+        """
+        Ordenação do keyset, restrita aos campos existentes no modelo e
+        sempre terminando na pk para desempate.
+        """
+        ordering = getattr(view, 'cursor_ordering', self.cursor_ordering)
+        field_names = {field.name for field in queryset.model._meta.concrete_fields}
+        ordering = [item for item in ordering if item.lstrip('-') in field_names]
+        if not any(item.lstrip('-') in ('id', 'pk') for item in ordering):
+            ordering.append('id')
+        return ordering
+
+    def encode_cursor(self, obj, ordering):
+        values = []
+        for item in ordering:
+            value = getattr(obj, obj._meta.get_field(item.lstrip('-')).attname)
+            if isinstance(value, date):
+                value = value.isoformat()
+            values.append(value)
+        return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+    def decode_cursor(self, cursor, model, ordering):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(item.lstrip('-')).to_python(value)
+                for item, value in zip(ordering, values)
+            ]
+        except (ValueError, TypeError, ValidationError, binascii.Error, UnicodeDecodeError):
+            raise NotFound('Cursor inválido.')
+
+    def keyset_filter(self, ordering, values):
+        """
+        (a, b) depois de (x, y) respeitando a direção de cada campo:
+        a > x OR (a = x AND b > y).
+        """
+        condition = Q()
+        for index, item in enumerate(ordering):
+            name = item.lstrip('-')
+            lookup = 'lt' if item.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            for previous, value in zip(ordering[:index], values[:index]):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+        return condition
+
+    def get_cached_count(self, queryset, request):
+        """
+        Total aproximado: o COUNT é refeito no máximo uma vez por minuto para
+        o mesmo usuário e filtros, independente do cursor.
+        """
+        cache_key = indicator_cache_key(
+            request,
+            f'count:{request.path}',
+            scope=get_permission_scope(request.user),
+            ignored_params=IGNORED_PARAMS | {self.cursor_query_param, self.count_query_param},
+        )
+        count = get_cached('pagination_count', cache_key)
+        if count is None:
+            count = lean_count(queryset)
+            set_cached(cache_key, count, self.count_cache_timeout)
+        return count
+
+    def paginate_queryset_by_cursor(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_page_size(request)
+        ordering = self.get_cursor_ordering(queryset, view)
+
+        self.total_count = None
+        if request.query_params.get(self.count_query_param, '').lower() != 'false':
+            self.total_count = self.get_cached_count(queryset, request)
+
+        queryset = queryset.order_by(*ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(cursor, queryset.model, ordering)
+            queryset = queryset.filter(self.keyset_filter(ordering, values))
+
+        results = list(queryset[:self.limit + 1])
+        self.next_cursor = None
+        if len(results) > self.limit:
+            results = results[:self.limit]
+            self.next_cursor = self.encode_cursor(results[-1], ordering)
+        return results
+
+    def get_cursor_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_cursor_paginated_response(self, data):
+        total_pages = None
+        if self.total_count is not None:
+            total_pages = math.ceil(self.total_count / self.limit)
+        return Response({
+            'meta': {
+                'pagination': {
+                    'page': None,
+                    'limit': self.limit,
+                    'total_pages': total_pages,
+                    'total_count': self.total_count,
+                    'next': self.get_cursor_next_link(),
+                    'previous': None,
+                    'next_cursor': self.next_cursor,
+                },
+                **self.extra_meta
+            },
+            'results': data
+        })
+
     def get_paginated_response(self, data):
+        if self.cursor_mode:
+            return self.get_cursor_paginated_response(data)
+
         if self.page is None:
             return Response({
                 'results': [],
@@ -46,7 +209,7 @@ class CustomPagination(PageNumberPagination):
                     'next': self.get_next_link(),
                     'previous': self.get_previous_link(),
                 },
-                **self.extra_meta 
+                **self.extra_meta
             },
             'results': data
         })
@@ -0,0 +1,63 @@
+import datetime
+
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
+
+from core.pdf import PdfDocument, render_pdf
+from logistics.models import ProjectMaterials
+from resolve_crm.models import Project
+
+
+class ProjectMaterialsPdf(PdfDocument):
+    """
+    Lista de materiais do projeto.
+    """
+
+    kind = "project_materials"
+    template_name = "materiais_projeto.html"
+
+    def __init__(self, project, base_url=None):
+        self.project = project
+        self.base_url = base_url
+
+    @classmethod
+    def from_task_kwargs(cls, project_id, base_url=None):
+        project = Project.objects.select_related("sale__customer").get(pk=project_id)
+        return cls(project, base_url)
+
+    def task_kwargs(self):
+        return {"project_id": self.project.pk, "base_url": self.base_url}
+
+    def filename(self):
+        return f"materiais-projeto-{self.project.project_number}.pdf"
+
+    @cached_property
+    def materials(self):
+        return list(
+            ProjectMaterials.objects.filter(project=self.project, is_deleted=False)
+            .select_related("material")
+        )
+
+    def inputs(self):
+        project = self.project
+        sale = project.sale
+        return {
+            "project": {
+                "id": project.pk,
+                "project_number": project.project_number,
+                "customer": sale.customer.complete_name if sale and sale.customer else None,
+            },
+            "materials": [
+                (item.pk, str(item.material), item.amount, item.get_material_class_display())
+                for item in self.materials
+            ],
+        }
+
+    def render(self):
+        context = {
+            'project': self.project,
+            'materials': self.materials,
+            'generation_date': datetime.datetime.now(),
+        }
+        html_string = render_to_string(self.template_name, context)
+        return render_pdf(html_string, base_url=self.base_url)
@@ -0,0 +1,122 @@
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import Ref
+
+
+def _walk(node):
+    """
+    Percorre recursivamente Q, expressões e WhereNodes, incluindo as
+    expressões já resolvidas dentro dos lookups.
+    """
+    yield node
+    if isinstance(node, Q):
+        for child in node.children:
+            if isinstance(child, tuple):
+                yield from _walk(child[1])
+            else:
+                yield from _walk(child)
+        return
+    for child in getattr(node, "children", ()):
+        yield from _walk(child)
+    if hasattr(node, "get_source_expressions"):
+        for source in node.get_source_expressions():
+            if source is not None:
+                yield from _walk(source)
+
+
+def referenced_names(*expressions):
+    """
+    Nomes de campos/anotações referenciados por expressões ainda não
+    resolvidas, como as passadas para aggregate().
+    """
+    names = set()
+    for expression in expressions:
+        for node in _walk(expression):
+            if isinstance(node, Q):
+                names.update(
+                    child[0].split("__")[0]
+                    for child in node.children
+                    if isinstance(child, tuple)
+                )
+            elif isinstance(node, F):
+                names.add(node.name.split("__")[0])
+    return names
+
+
+def _used_annotations(query, keep):
+    """
+    Aliases das anotações usadas pelos filtros (WHERE/HAVING), pelos nomes
+    em `keep` e, transitivamente, pelas anotações mantidas.
+    """
+    where_nodes = list(_walk(query.where))
+    used_ids = {id(node) for node in where_nodes}
+    used = {
+        alias
+        for alias, annotation in query.annotations.items()
+        if id(annotation) in used_ids or alias in keep
+    }
+    used |= {node.refs for node in where_nodes if isinstance(node, Ref)}
+
+    pending = list(used)
+    while pending:
+        annotation = query.annotations.get(pending.pop())
+        if annotation is None:
+            continue
+        for node in _walk(annotation):
+            if isinstance(node, Ref) and node.refs not in used:
+                used.add(node.refs)
+                pending.append(node.refs)
+    return used
+
+
+def lean_queryset(queryset, keep=()):
+    """
+    Versão "só filtros" do queryset para COUNT e aggregate(): remove
+    select_related, prefetch, ordenação e as anotações que nenhum filtro
+    usa. Subqueries correlacionadas das métricas deixam de ser executadas
+    por linha só para serem descartadas pelo COUNT.
+
+    `keep` lista anotações que precisam continuar disponíveis, por exemplo
+    as referenciadas pelo aggregate().
+    """
+    queryset = queryset.select_related(None).prefetch_related(None).order_by()
+    query = queryset.query
+
+    # Agrupamentos explícitos e combinações mudam o significado das linhas
+    if isinstance(query.group_by, tuple) or query.combinator or query.is_sliced:
+        return queryset
+
+    used = _used_annotations(query, set(keep))
+    for alias in list(query.annotations):
+        if alias not in used:
+            del query.annotations[alias]
+
+    if query.annotation_select_mask is not None:
+        query.set_annotation_mask(query.annotation_select_mask & used)
+
+    # Os JOINs das anotações removidas são mantidos. Sem DISTINCT, o GROUP BY
+    # também precisa ficar, senão relações múltiplas duplicariam linhas.
+    if query.distinct and not query.distinct_fields and not any(
+        getattr(annotation, "contains_aggregate", False)
+        for annotation in query.annotations.values()
+    ):
+        query.group_by = None
+
+    return queryset
+
+
+def lean_count(queryset):
+    """
+    COUNT sobre a versão enxuta do queryset, selecionando apenas a pk.
+    """
+    if not isinstance(queryset, QuerySet):
+        return len(queryset)
+    return lean_queryset(queryset).values("pk").count()
+
+
+def lean_aggregate(queryset, **aggregates):
+    """
+    aggregate() sobre a versão enxuta do queryset, mantendo apenas as
+    anotações referenciadas pelos filtros e pelos próprios agregados.
+    """
+    keep = referenced_names(*aggregates.values())
+    return lean_queryset(queryset, keep=keep).aggregate(**aggregates)
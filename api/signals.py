@@ -1,7 +1,12 @@
 from engineering.models import Units
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from api.cache import invalidate_indicator_tags
+from financial.models import FinancialRecord, Payment, PaymentInstallment
+from resolve_crm.models import Project, Sale
+
 # @receiver(post_save, sender=Units)
 # def check_unit_status(sender, instance, created, **kwargs):
 #     # Evitar recursão
@@ -24,3 +29,30 @@ from django.dispatch import receiver
 #                 instance._skip_post_save = True
 #                 instance.save(update_fields=['change_owner'])
 
+
+# Tags de cache de indicadores invalidadas quando o modelo muda
+INDICATOR_CACHE_TAGS = {
+    Project: ("project",),
+    Sale: ("sale",),
+    Payment: ("payment",),
+    PaymentInstallment: ("payment",),
+    FinancialRecord: ("financial_record",),
+}
+
+
+def invalidate_indicator_cache(sender, **kwargs):
+    tags = INDICATOR_CACHE_TAGS[sender]
+    transaction.on_commit(lambda: invalidate_indicator_tags(*tags))
+
+
+for model in INDICATOR_CACHE_TAGS:
+    post_save.connect(
+        invalidate_indicator_cache,
+        sender=model,
+        dispatch_uid=f"indicator_cache_save_{model.__name__}",
+    )
+    post_delete.connect(
+        invalidate_indicator_cache,
+        sender=model,
+        dispatch_uid=f"indicator_cache_delete_{model.__name__}",
+    )
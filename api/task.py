@@ -2,4 +2,15 @@ from celery import shared_task
 import requests
 import logging
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def export_queryset_job(job_id, viewset_path, user_id, query_string, export_format):
+    """
+    Exportação grande em segundo plano: grava o arquivo no storage e
+    notifica o usuário com o link de download.
+    """
+    from .exports import run_export_job
+
+    return run_export_job(job_id, viewset_path, user_id, query_string, export_format)
@@ -1,3 +1,377 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Address, Branch, User
+from api.benchmark import (
+    DUMMY_CACHES, build_fixture, check_budgets, compare_reports, create_benchmark_user, discover_endpoints,
+    load_budgets, run_benchmark
+)
+from api.cache import indicator_cache_hits_total, indicator_cache_key
+from api.querysets import lean_aggregate, lean_count
+from api.exports import export_rows, run_export_job
+from core.pdf import run_pdf_job
+from core.tests import BaseAPITestCase
+from core.models import Board
+from logistics.models import Materials, ProjectMaterials
+from resolve_crm.models import Project, Sale
+
+
+class IndicatorCacheKeyTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(username='cache_user', password='123456', first_document='12312312312', email='cache_user@example.com')
+
+    def build_request(self, query_string):
+        request = Request(self.factory.get(f'/api/projects/?{query_string}'))
+        request.user = self.user
+        return request
+
+    def test_key_ignores_filter_order_and_pagination(self):
+        first = indicator_cache_key(self.build_request('status=P&branch=1&page=2'), 'test', tags=('project',))
+        second = indicator_cache_key(self.build_request('branch=1&status=P'), 'test', tags=('project',))
+        self.assertEqual(first, second)
+
+    def test_key_depends_on_filters_and_scope(self):
+        request = self.build_request('status=P')
+        self.assertNotEqual(
+            indicator_cache_key(request, 'test'),
+            indicator_cache_key(self.build_request('status=C'), 'test'),
+        )
+        self.assertNotEqual(
+            indicator_cache_key(request, 'test', scope='all'),
+            indicator_cache_key(request, 'test'),
+        )
+
+    def test_model_change_invalidates_tag(self):
+        request = self.build_request('status=P')
+        before = indicator_cache_key(request, 'test', tags=('sale',))
+        branch = Branch.objects.create(name='Filial Cache', address=Address.objects.create(zip_code='33333333', country='Brazil', state='SP', city='São Paulo', neighborhood='Centro', street='Rua E', number='50'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(customer=self.user, seller=self.user, sales_supervisor=self.user, sales_manager=self.user, branch=branch, total_value=1000.000)
+        self.assertNotEqual(before, indicator_cache_key(request, 'test', tags=('sale',)))
+        self.assertEqual(
+            indicator_cache_key(request, 'test', tags=('payment',)),
+            indicator_cache_key(request, 'test', tags=('payment',)),
+        )
+
+
+class IndicatorCacheEndpointTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse('api:project-constructions-indicators')
+
+    def test_second_request_is_served_from_cache(self):
+        hits = indicator_cache_hits_total.labels(endpoint='constructions_indicators')
+        before = hits._value.get()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_200_OK)
+        self.assertEqual(hits._value.get(), before + 1)
+
+
+class CursorPaginationTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        address = Address.objects.create(zip_code='44444444', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua F', number='60')
+        branch = Branch.objects.create(name='Filial Cursor', address=address)
+        self.boards = [
+            Board.objects.create(title=f'Quadro {i}', description='Cursor', branch=branch)
+            for i in range(5)
+        ]
+        # Empate em created_at: o desempate é pela pk
+        Board.objects.filter(pk__in=[b.pk for b in self.boards[:3]]).update(created_at=self.boards[0].created_at)
+        self.url = reverse('api:board-list')
+
+    def test_cursor_walks_all_pages_in_keyset_order(self):
+        expected = list(Board.objects.order_by('-created_at', 'id').values_list('id', flat=True))
+
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = self.client.get(self.url, {'cursor': cursor, 'limit': 2})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pagination = response.data['meta']['pagination']
+            self.assertEqual(pagination['total_count'], 5)
+            self.assertEqual(pagination['total_pages'], 3)
+            self.assertIsNone(pagination['page'])
+            seen.extend(item['id'] for item in response.data['results'])
+            cursor = pagination['next_cursor']
+
+        self.assertEqual(seen, expected)
+
+    def test_count_can_be_skipped(self):
+        response = self.client.get(self.url, {'cursor': '', 'count': 'false'})
+        self.assertIsNone(response.data['meta']['pagination']['total_count'])
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_mode_is_unchanged(self):
+        response = self.client.get(self.url, {'page': 2, 'limit': 2})
+        pagination = response.data['meta']['pagination']
+        self.assertEqual((pagination['page'], pagination['total_count'], pagination['total_pages']), (2, 5, 3))
+
+
+class LeanQuerysetTestCase(BaseAPITestCase):
+    # Tabelas lidas apenas pelas subqueries correlacionadas de cada métrica
+    TRT_STATUS_TABLE = '"core_attachment"'
+    CURRENT_STEP_TABLE = '"engineering_requestsenergycompany"'
+
+    def capture_sql(self, func):
+        with CaptureQueriesContext(connection) as context:
+            result = func()
+        return result, context.captured_queries[-1]['sql']
+
+    def test_count_keeps_only_filtered_subqueries(self):
+        queryset = Project.objects.with_trt_status().with_current_step().select_related('sale').filter(trt_status='A')
+
+        full_count, full_sql = self.capture_sql(queryset.count)
+        count, sql = self.capture_sql(lambda: lean_count(queryset))
+
+        self.assertEqual(count, full_count)
+        self.assertIn(self.CURRENT_STEP_TABLE, full_sql)
+        self.assertIn(self.TRT_STATUS_TABLE, sql)
+        self.assertNotIn(self.CURRENT_STEP_TABLE, sql)
+
+    def test_aggregate_keeps_referenced_annotations(self):
+        queryset = Project.objects.with_trt_status().with_current_step()
+
+        result, sql = self.capture_sql(
+            lambda: lean_aggregate(queryset, vistoria=Count('id', filter=Q(current_step='Vistoria')))
+        )
+
+        self.assertEqual(result, {'vistoria': 0})
+        self.assertIn(self.CURRENT_STEP_TABLE, sql)
+        self.assertNotIn(self.TRT_STATUS_TABLE, sql)
+
+    def test_list_pagination_count_is_lean(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('api:project-list'), {'metrics': 'current_step,trt_status'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        count_sql = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT COUNT(*)')]
+        self.assertEqual(len(count_sql), 1)
+        self.assertNotIn(self.CURRENT_STEP_TABLE, count_sql[0])
+        self.assertNotIn(self.TRT_STATUS_TABLE, count_sql[0])
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class ApiBenchmarkTestCase(TestCase):
+    def setUp(self):
+        self.fixture = build_fixture(sales=20, batch_size=10)
+        self.user = create_benchmark_user()
+
+    def test_fixture_is_deterministic_in_size(self):
+        self.assertEqual(self.fixture, {
+            'sales': 20, 'projects': 20, 'schedules': 40, 'payments': 20, 'installments': 80
+        })
+
+    def test_discovers_list_detail_and_indicators(self):
+        names = {endpoint['name'] for endpoint in discover_endpoints(only=['payment'])}
+        self.assertEqual(names, {'payment-list', 'payment-detail', 'payment-indicators'})
+
+    def test_reports_metrics_and_budget_violations(self):
+        results = run_benchmark(discover_endpoints(only=['payment']), self.user, repeat=1)
+
+        for name in ('payment-list', 'payment-detail', 'payment-indicators'):
+            self.assertEqual(results[name]['status'], status.HTTP_200_OK)
+            self.assertGreater(results[name]['queries'], 0)
+        self.assertEqual(check_budgets(results, load_budgets()), [])
+
+        violations = check_budgets(results, {'default': {'queries': 0}})
+        self.assertEqual(
+            {violation['endpoint'] for violation in violations},
+            {'payment-list', 'payment-detail', 'payment-indicators'},
+        )
+
+    def test_compare_flags_query_regressions(self):
+        previous = {'endpoints': {'payment-list': {'queries': 3, 'total_ms': 10.0}}}
+        current = {'endpoints': {'payment-list': {'queries': 5, 'total_ms': 10.0}}}
+        self.assertEqual(
+            compare_reports(previous, current),
+            [{'endpoint': 'payment-list', 'metric': 'queries', 'before': 3, 'after': 5}],
+        )
+
+
+class PdfServiceTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        # Storage novo a cada teste: o cache de PDFs não vaza entre eles
+        self.enterContext(override_settings(
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            }
+        ))
+        customer = User.objects.create_user(
+            username='cust_pdf', password='123456', first_document='12312312312', email='cust_pdf@example.com'
+        )
+        branch = Branch.objects.create(
+            name='Filial PDF',
+            address=Address.objects.create(
+                zip_code='66000000', country='Brazil', state='PA', city='Belém',
+                neighborhood='Centro', street='Rua PDF', number='1',
+            ),
+        )
+        sale = Sale.objects.create(
+            customer=customer, seller=customer, sales_supervisor=customer,
+            sales_manager=customer, branch=branch, total_value=1000,
+        )
+        self.project = Project.objects.create(sale=sale, status='P')
+        self.item = ProjectMaterials.objects.create(
+            project=self.project,
+            material=Materials.objects.create(name='Módulo 550W', price=100),
+            amount=12,
+        )
+        self.url = reverse('api:generate_pdf_materials', args=[self.project.id])
+
+    def test_unchanged_materials_reuse_stored_pdf(self):
+        with mock.patch('api.pdf.render_pdf', return_value=b'%PDF-materiais') as render:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            self.assertEqual(render.call_count, 1)
+
+            self.item.amount = 10
+            self.item.save()
+            self.client.get(self.url)
+            self.assertEqual(render.call_count, 2)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, b'%PDF-materiais')
+        self.assertIn('materiais-projeto-', second['Content-Disposition'])
+
+    def test_async_generate_then_download(self):
+        with mock.patch('core.task.generate_pdf_document.delay') as delay, \
+                mock.patch('api.pdf.render_pdf', return_value=b'%PDF-materiais'):
+            response = self.client.get(self.url, {'async': 'true'})
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+            job = response.json()
+            self.assertEqual(job['status'], 'pending')
+
+            # Segunda solicitação enquanto pendente não enfileira de novo
+            self.client.get(self.url, {'async': 'true'})
+            delay.assert_called_once()
+
+            pending = self.client.get(job['download_url'])
+            self.assertEqual(pending.status_code, status.HTTP_202_ACCEPTED)
+
+            run_pdf_job(*delay.call_args.args)
+
+        detail = self.client.get(job['status_url'])
+        self.assertEqual(detail.data['status'], 'ready')
+        download = self.client.get(job['download_url'])
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(download.streaming_content), b'%PDF-materiais')
+
+        ready = self.client.get(self.url, {'async': 'true'})
+        self.assertEqual(ready.status_code, status.HTTP_200_OK)
+        self.assertEqual(ready.json()['job_id'], job['job_id'])
+
+    def test_unknown_job(self):
+        response = self.client.get(reverse('api:pdf-job-detail', args=['schedule-' + '0' * 64]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse('api:pdf-job-download', args=['schedule-..']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExportActionTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            }
+        ))
+        customer = User.objects.create_user(
+            username='cust_export', password='123456', first_document='32132132132',
+            email='cust_export@example.com', complete_name='Cliente Exportação',
+        )
+        branch = Branch.objects.create(
+            name='Filial Exportação',
+            address=Address.objects.create(
+                zip_code='66000000', country='Brazil', state='PA', city='Belém',
+                neighborhood='Centro', street='Rua Export', number='1',
+            ),
+        )
+        self.sales = [
+            Sale.objects.create(
+                customer=customer, seller=customer, sales_supervisor=customer,
+                sales_manager=customer, branch=branch, total_value=1000 + index,
+                status='F' if index < 3 else 'P',
+            )
+            for index in range(5)
+        ]
+        self.url = reverse('api:sale-export')
+
+    def test_csv_export_applies_filters(self):
+        response = self.client.get(self.url, {
+            'status__in': 'F',
+            'fields': 'id,total_value,customer__complete_name',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'id,total_value,customer__complete_name')
+        self.assertEqual(
+            set(lines[1:]),
+            {f'{sale.id},{sale.total_value:.3f},Cliente Exportação' for sale in self.sales[:3]},
+        )
+
+    def test_xlsx_export(self):
+        from openpyxl import load_workbook
+
+        response = self.client.get(self.url, {'export_format': 'xlsx', 'fields': 'id,created_at'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(rows[0], ('id', 'created_at'))
+        self.assertEqual(len(rows), 6)
+
+    def test_invalid_field(self):
+        response = self.client.get(self.url, {'fields': 'id,customer__password_x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rows_are_read_in_chunks(self):
+        queryset = Sale.objects.filter(id__in=[sale.id for sale in self.sales])
+        with CaptureQueriesContext(connection) as queries:
+            rows = list(export_rows(queryset, ['id'], chunk_size=2))
+        self.assertEqual(rows, [(sale.id,) for sale in self.sales])
+        self.assertEqual(len(queries), 3)
+
+    def test_background_export_notifies_user(self):
+        with mock.patch('api.task.export_queryset_job.delay') as delay:
+            response = self.client.get(self.url, {'background': 'true', 'fields': 'id'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = response.json()
+        self.assertEqual(job['status'], 'pending')
+
+        result = run_export_job(*delay.call_args.args)
+        self.assertEqual(result['rows'], 5)
+
+        detail = self.client.get(job['status_url'])
+        self.assertEqual(detail.data['status'], 'ready')
+        download = self.client.get(job['download_url'])
+        self.assertEqual(download.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(b''.join(download.streaming_content).decode('utf-8-sig').splitlines()), 6)
+        self.assertEqual(self.user.notifications.filter(verb='Exportação concluída').count(), 1)
 
-# Create your tests here.
+        other = User.objects.create_user(username='other_export', password='123456', first_document='45645645645', email='other_export@example.com')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(job['status_url']).status_code, status.HTTP_404_NOT_FOUND)
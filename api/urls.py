@@ -14,7 +14,7 @@ from engineering.views import ProjectMaterialsCSVUploadAPIView
 from field_services.views import GenerateSchedulePDF
 from financial.views import FinancialRecordApprovalView, OmieIntegrationView, UpdateFinancialRecordPaymentStatus, SendFinancialRecordsToOmieView
 from resolve_crm.views import GenerateContractView, GenerateCustomContract, GeneratePreSaleView, GenerateSalesProjectsView, JourneyKanbanView, ValidateContractView
-from .views import GanttView, StatusView, generate_materials_pdf
+from .views import ExportJobDownloadView, ExportJobView, GanttView, StatusView, generate_materials_pdf
 from resolve_crm.views import save_all_sales_func
 from resolve_crm.views import list_sales_func
 
@@ -73,6 +73,8 @@ urlpatterns = [
     path('generate-custom-contract/', GenerateCustomContract.as_view(), name='generate_custom_contract'),
     path('recive-contract-infomation/', ReciveContractInfomation.as_view(), name='recive_contract_infomation'),
     path('status/', StatusView.as_view(), name='status'),
+    path('exports/<str:job_id>/', ExportJobView.as_view(), name='export-job-detail'),
+    path('exports/<str:job_id>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
     path('financial/omie/', OmieIntegrationView.as_view(), name='omie_integration'),
     path('financial/approve-financial-record/', FinancialRecordApprovalView.as_view(), name='approve_financial_record'),
     path('financial/omie/send-financial-records/', SendFinancialRecordsToOmieView.as_view() , name='send_financial_records_to_omie'),
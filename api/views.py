@@ -3,20 +3,23 @@ from datetime import datetime
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import DjangoModelPermissions, AllowAny
+from rest_framework.decorators import action
 from rest_framework.viewsets import ModelViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from rest_framework.views import APIView
 from api.pagination import CustomPagination
 import datetime
-from django.http import HttpResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
-from django.template.loader import render_to_string
-from weasyprint import HTML
 
-from logistics.models import ProjectMaterials
+from core.pdf import pdf_job_response
 from resolve_crm.models import Project
 
+from .exports import export_job_payload, export_response, get_export_job
+from .pdf import ProjectMaterialsPdf
+
 class BaseModelViewSet(ModelViewSet):
     permission_classes = [DjangoModelPermissions]
     filter_backends = [DjangoFilterBackend, OrderingFilter]
@@ -51,6 +54,22 @@ class BaseModelViewSet(ModelViewSet):
                 filter_fields[field.name] = supported_lookups[field_type]
         return filter_fields
 
+    def get_export_queryset(self):
+        """
+        Queryset da exportação. Viewsets que aplicam filtros extras no
+        list() sobrescrevem para aplicar os mesmos aqui.
+        """
+        return self.filter_queryset(self.get_queryset())
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta a listagem filtrada em CSV (padrão) ou XLSX
+        (?export_format=xlsx), com as colunas de ?fields=. Exportações
+        grandes ou com ?background=true rodam no worker.
+        """
+        return export_response(self, request)
+
 
 class GanttView(APIView):
     permission_classes = []
@@ -93,6 +112,28 @@ class GanttView(APIView):
         return Response(data)
 
 
+class ExportJobView(APIView):
+    def get(self, request, job_id):
+        job = get_export_job(job_id, request.user)
+        if job is None:
+            return Response({"detail": "Exportação não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(export_job_payload(job_id, job), status=status.HTTP_200_OK)
+
+
+class ExportJobDownloadView(APIView):
+    def get(self, request, job_id):
+        job = get_export_job(job_id, request.user)
+        if job is None:
+            return Response({"detail": "Exportação não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        if job["status"] != "ready":
+            return Response(export_job_payload(job_id, job), status=status.HTTP_202_ACCEPTED)
+        return FileResponse(
+            default_storage.open(job["name"], "rb"),
+            as_attachment=True,
+            filename=job["filename"],
+        )
+
+
 class StatusView(APIView):
     permission_classes = [AllowAny]
 
@@ -102,29 +143,19 @@ class StatusView(APIView):
 
 
 def generate_materials_pdf(request, project_id):
-    try:
-        project = get_object_or_404(Project, pk=project_id)
-        print(f"Gerando PDF para o projeto: {project_id}")
-        materials = ProjectMaterials.objects.filter(project=project, is_deleted=False)
-        if not materials:
-            return HttpResponse("Nenhum material encontrado para este projeto.", status=404)
-        print(f"Materiais encontrados: {materials.count()}")
-    except Project.DoesNotExist:
-        return HttpResponse("Projeto não encontrado.", status=404)
-
-    context = {
-        'project': project,
-        'materials': materials,
-        'generation_date': datetime.datetime.now(),
-    }
-
-    html_string = render_to_string('materiais_projeto.html', context)
-
-    pdf_file = HTML(string=html_string, base_url=request.build_absolute_uri()).write_pdf()
-
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    
-    filename = f"materiais-projeto-{project.project_number}.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    """
+    PDF da lista de materiais do projeto. Com ?async=true a geração vai
+    para o pool de PDFs e a resposta traz as URLs de estado e download.
+    """
+    project = get_object_or_404(Project.objects.select_related("sale__customer"), pk=project_id)
+    document = ProjectMaterialsPdf(project, base_url=request.build_absolute_uri())
+    if not document.materials:
+        return HttpResponse("Nenhum material encontrado para este projeto.", status=404)
+
+    if request.GET.get("async") == "true":
+        return pdf_job_response(document)
+
+    response = HttpResponse(document.get_pdf(), content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{document.filename()}"'
 
     return response
\ No newline at end of file
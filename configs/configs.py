@@ -1,3 +1,10 @@
 command = '/usr/bin/gunicorn'
 pythonpath = '/app'
-bind = '0.0.0.0:8060'
\ No newline at end of file
+bind = '0.0.0.0:8060'
+
+
+def worker_exit(server, worker):
+    # Grava os logs de acesso ainda no buffer antes de o worker encerrar
+    from accounts.access_log import buffer
+
+    buffer.flush()
@@ -0,0 +1,50 @@
+from django.template.loader import get_template
+
+from core.pdf import PdfDocument, render_pdf
+from resolve_crm.models import Sale
+
+
+class AddendumPdf(PdfDocument):
+    """
+    Termo aditivo da venda com os textos antes e depois da alteração.
+    """
+
+    kind = "addendum"
+    template_name = "addendum_pdf.html"
+
+    def __init__(self, sale, before, after, base_url=None):
+        self.sale = sale
+        self.before = before
+        self.after = after
+        self.base_url = base_url
+
+    @classmethod
+    def from_task_kwargs(cls, sale_id, before, after, base_url=None):
+        sale = Sale.objects.select_related("customer").get(pk=sale_id)
+        return cls(sale, before, after, base_url)
+
+    def task_kwargs(self):
+        return {
+            "sale_id": self.sale.pk,
+            "before": self.before,
+            "after": self.after,
+            "base_url": self.base_url,
+        }
+
+    def filename(self):
+        return f"termo_aditivo_{self.sale.contract_number}.pdf"
+
+    def inputs(self):
+        customer = self.sale.customer
+        return {
+            "sale": self.sale.pk,
+            "contract_number": self.sale.contract_number,
+            "customer": customer and (customer.complete_name, customer.first_document),
+            "before": self.before,
+            "after": self.after,
+        }
+
+    def render(self):
+        context = {"sale": self.sale, "before_addendum": self.before, "after_addendum": self.after}
+        html = get_template(self.template_name).render(context)
+        return render_pdf(html, base_url=self.base_url)
@@ -29,6 +29,7 @@ from weasyprint import HTML
 from api.utils import extract_data_from_pdf
 from api.views import BaseModelViewSet
 from contracts.models import SicoobRequest
+from contracts.pdf import AddendumPdf
 from contracts.serializers import AddendumPDFSerializer, SicoobRequestSerializer
 from core.models import Attachment, DocumentType
 from resolve_crm.models import ContractSubmission, Sale
@@ -231,12 +232,5 @@ class GenerateAddendumPDF(APIView):
         return response
 
     def render_addendum_pdf_bytes(self, sale, before, after, base_url):
-        from django.template.loader import get_template
-        from weasyprint import HTML
-
-        context = {"sale": sale, "before_addendum": before, "after_addendum": after}
-        html = get_template("addendum_pdf.html").render(context)
-        buffer = io.BytesIO()
-        HTML(string=html, base_url=base_url).write_pdf(buffer)
-        buffer.seek(0)
-        return buffer
+        # Mesmos textos para a mesma venda reaproveitam o PDF do storage
+        return io.BytesIO(AddendumPdf(sale, before, after, base_url).get_pdf())
@@ -94,6 +94,22 @@ class WebhookAdmin(admin.ModelAdmin):
     search_fields = ("url", "event")
 
 
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("webhook", "content_type", "object_id", "event", "status", "attempts", "created_at", "sent_at")
+    list_filter = ("status", "event")
+    search_fields = ("webhook__url", "object_id")
+    raw_id_fields = ("webhook",)
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("webhook", "event", "success", "status_code", "latency_ms", "created_at")
+    list_filter = ("success", "status_code")
+    search_fields = ("url",)
+    raw_id_fields = ("webhook", "event")
+
+
 @admin.register(ContentType)
 class ContentTypeAdmin(admin.ModelAdmin):
     list_display = ("model", "id", "app_label")
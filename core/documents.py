@@ -0,0 +1,151 @@
+import time
+from typing import NamedTuple
+from uuid import uuid4
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import (
+    Count,
+    ExpressionWrapper,
+    FloatField,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Round
+
+from core.models import Attachment, DocumentType
+
+REQUIRED_TYPES_TTL = 300
+REQUIRED_TYPES_GENERATION_KEY = 'documents:required_types:generation'
+
+# app_label (ou None para todos) -> (carregado_em, geração, [(id, nome), ...])
+_required_types = {}
+
+
+class DocumentCompleteness(NamedTuple):
+    missing: list
+    approved: list
+    percentage: float
+
+
+# Tipos obrigatórios
+
+def get_required_document_types(app_label=None):
+    """
+    Tipos de documento obrigatórios como [(id, nome), ...], lidos de um
+    cache em memória do processo. Alterações em DocumentType trocam a
+    geração no cache compartilhado e invalidam as cópias de todos os
+    processos.
+    """
+    generation = cache.get(REQUIRED_TYPES_GENERATION_KEY)
+    entry = _required_types.get(app_label)
+
+    if (
+        entry is None
+        or entry[1] != generation
+        or time.monotonic() - entry[0] > REQUIRED_TYPES_TTL
+    ):
+        queryset = DocumentType.objects.filter(required=True)
+        if app_label:
+            queryset = queryset.filter(app_label=app_label)
+        entry = (time.monotonic(), generation, list(queryset.values_list('id', 'name')))
+        _required_types[app_label] = entry
+
+    return entry[2]
+
+
+def invalidate_required_document_types():
+    _required_types.clear()
+    cache.set(REQUIRED_TYPES_GENERATION_KEY, uuid4().hex, None)
+
+
+# Completude
+
+def _percentage(present, total):
+    if not total:
+        return 100.0
+    return round(present * 100 / total, 1)
+
+
+def document_completeness(objects, app_label=None):
+    """
+    Documentos obrigatórios faltantes e aprovados de vários objetos do mesmo
+    modelo (vendas, projetos...) em uma única consulta agrupada. Retorna
+    {pk: DocumentCompleteness}.
+    """
+    objects = list(objects)
+    if not objects:
+        return {}
+
+    required = get_required_document_types(app_label)
+    ids = [obj.pk for obj in objects]
+    present = {pk: {} for pk in ids}
+
+    if required:
+        content_type = ContentType.objects.get_for_model(objects[0])
+        rows = (
+            Attachment.objects.filter(
+                content_type=content_type,
+                object_id__in=ids,
+                document_type_id__in=[type_id for type_id, _ in required],
+            )
+            .order_by()
+            .values('object_id', 'document_type_id')
+            .annotate(approved=Count('pk', filter=Q(status='A')))
+        )
+        for row in rows:
+            present[row['object_id']][row['document_type_id']] = row['approved'] > 0
+
+    result = {}
+    for pk in ids:
+        found = present[pk]
+        result[pk] = DocumentCompleteness(
+            missing=[
+                {'id': type_id, 'name': name}
+                for type_id, name in required
+                if type_id not in found
+            ],
+            approved=[
+                {'id': type_id, 'name': name}
+                for type_id, name in required
+                if found.get(type_id)
+            ],
+            percentage=_percentage(len(found), len(required)),
+        )
+    return result
+
+
+def with_document_completeness(queryset, app_label=None, name='document_completeness'):
+    """
+    Anota o percentual (0-100) de tipos obrigatórios com ao menos um anexo
+    em cada objeto do queryset, para ordenar e filtrar listagens.
+    """
+    required = get_required_document_types(app_label)
+    if not required:
+        return queryset.annotate(**{name: Value(100.0, output_field=FloatField())})
+
+    present = (
+        Attachment.objects.filter(
+            content_type=ContentType.objects.get_for_model(queryset.model),
+            object_id=OuterRef('pk'),
+            document_type_id__in=[type_id for type_id, _ in required],
+        )
+        .order_by()
+        .values('object_id')
+        .annotate(total=Count('document_type_id', distinct=True))
+        .values('total')
+    )
+    return queryset.annotate(**{
+        name: Round(
+            ExpressionWrapper(
+                Coalesce(Subquery(present, output_field=IntegerField()), 0)
+                * Value(100.0)
+                / Value(len(required)),
+                output_field=FloatField(),
+            ),
+            precision=1,
+        )
+    })
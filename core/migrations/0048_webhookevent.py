@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('core', '0047_comment_mentioned_departments_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='ID do Objeto')),
+                ('event', models.CharField(choices=[('C', 'Create'), ('U', 'Update'), ('D', 'Delete')], max_length=1, verbose_name='Evento')),
+                ('payload', models.JSONField(blank=True, null=True, verbose_name='Payload')),
+                ('status', models.CharField(choices=[('P', 'Pendente'), ('S', 'Enviado'), ('F', 'Falhou')], default='P', max_length=1, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas')),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='Próxima Tentativa')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Último Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado em')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Tipo de Conteúdo')),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='core.webhook', verbose_name='Webhook')),
+            ],
+            options={
+                'verbose_name': 'Evento de Webhook',
+                'verbose_name_plural': 'Eventos de Webhook',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='core_webhoo_status_594515_idx'), models.Index(fields=['content_type', 'object_id', 'status'], name='core_webhoo_content_1e2deb_idx')],
+            },
+        ),
+    ]
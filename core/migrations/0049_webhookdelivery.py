@@ -0,0 +1,34 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0048_webhookevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(verbose_name='URL')),
+                ('success', models.BooleanField(default=False, verbose_name='Sucesso')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Status HTTP')),
+                ('latency_ms', models.PositiveIntegerField(default=0, verbose_name='Latência (ms)')),
+                ('error', models.TextField(blank=True, null=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deliveries', to='core.webhookevent', verbose_name='Evento')),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='core.webhook', verbose_name='Webhook')),
+            ],
+            options={
+                'verbose_name': 'Entrega de Webhook',
+                'verbose_name_plural': 'Entregas de Webhook',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['webhook', 'created_at'], name='core_webhoo_webhook_a48667_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,142 @@
+# Generated by Django 4.2.9 on 2026-10-18 03:28
+
+from django.db import migrations, models
+
+
+# (modelo, coluna usada para percorrer a tabela em lotes)
+WIDENED_MODELS = [
+    ('attachment', 'id'),
+    ('comment', 'id'),
+    ('tag', 'id'),
+    ('process', 'id'),
+    ('historicalattachment', 'history_id'),
+    ('historicalcomment', 'history_id'),
+    ('historicalprocess', 'history_id'),
+]
+
+BACKFILL_BATCH_SIZE = 50000
+
+
+def _mysql_widen(schema_editor, table, pk):
+    """
+    Expand/contract no MySQL: a coluna nova é criada (ALTER INSTANT),
+    preenchida em lotes sem bloquear a tabela e só trocada pela antiga sob
+    um LOCK curto, evitando o rebuild com cópia do ALTER ... MODIFY.
+    """
+    quote = schema_editor.quote_name
+    table_q = quote(table)
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f"ALTER TABLE {table_q} ADD COLUMN object_id_big bigint UNSIGNED NULL, "
+            f"ALGORITHM=INSTANT"
+        )
+        cursor.execute(f"SELECT MIN({quote(pk)}), MAX({quote(pk)}) FROM {table_q}")
+        low, high = cursor.fetchone()
+        if low is not None:
+            for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+                cursor.execute(
+                    f"UPDATE {table_q} SET object_id_big = object_id "
+                    f"WHERE {quote(pk)} >= %s AND {quote(pk)} < %s",
+                    [start, start + BACKFILL_BATCH_SIZE],
+                )
+        # Linhas gravadas durante o backfill são copiadas sob o lock
+        cursor.execute(f"LOCK TABLES {table_q} WRITE")
+        try:
+            cursor.execute(
+                f"UPDATE {table_q} SET object_id_big = object_id WHERE object_id_big IS NULL"
+            )
+            cursor.execute(
+                f"ALTER TABLE {table_q} DROP COLUMN object_id, "
+                f"RENAME COLUMN object_id_big TO object_id"
+            )
+        finally:
+            cursor.execute("UNLOCK TABLES")
+        cursor.execute(
+            f"ALTER TABLE {table_q} MODIFY object_id bigint UNSIGNED NOT NULL, "
+            f"ALGORITHM=INPLACE, LOCK=NONE"
+        )
+
+
+def widen_object_id(apps, schema_editor):
+    for model_name, pk in WIDENED_MODELS:
+        model = apps.get_model('core', model_name)
+        if schema_editor.connection.vendor == 'mysql':
+            _mysql_widen(schema_editor, model._meta.db_table, pk)
+        else:
+            old_field = model._meta.get_field('object_id')
+            new_field = models.PositiveBigIntegerField(verbose_name=old_field.verbose_name)
+            new_field.set_attributes_from_name('object_id')
+            new_field.model = model
+            schema_editor.alter_field(model, old_field, new_field)
+
+
+class Migration(migrations.Migration):
+
+    # O backfill em lotes não pode rodar dentro de uma única transação
+    atomic = False
+
+    dependencies = [
+        ('core', '0049_webhookdelivery'),
+    ]
+
+    operations = [
+        # O índice antigo cobre object_id e precisa sair antes da troca de coluna
+        migrations.RemoveIndex(
+            model_name='attachment',
+            name='core_attach_content_d3cac2_idx',
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(widen_object_id, migrations.RunPython.noop),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='attachment',
+                    name='object_id',
+                    field=models.PositiveBigIntegerField(),
+                ),
+                migrations.AlterField(
+                    model_name='comment',
+                    name='object_id',
+                    field=models.PositiveBigIntegerField(verbose_name='ID do Objeto'),
+                ),
+                migrations.AlterField(
+                    model_name='historicalattachment',
+                    name='object_id',
+                    field=models.PositiveBigIntegerField(),
+                ),
+                migrations.AlterField(
+                    model_name='historicalcomment',
+                    name='object_id',
+                    field=models.PositiveBigIntegerField(verbose_name='ID do Objeto'),
+                ),
+                migrations.AlterField(
+                    model_name='historicalprocess',
+                    name='object_id',
+                    field=models.PositiveBigIntegerField(verbose_name='ID do Objeto'),
+                ),
+                migrations.AlterField(
+                    model_name='process',
+                    name='object_id',
+                    field=models.PositiveBigIntegerField(verbose_name='ID do Objeto'),
+                ),
+                migrations.AlterField(
+                    model_name='tag',
+                    name='object_id',
+                    field=models.PositiveBigIntegerField(verbose_name='ID do Objeto'),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='attachment',
+            index=models.Index(fields=['content_type', 'object_id', 'status', 'document_type'], name='attachment_object_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attachment',
+            index=models.Index(fields=['content_type', 'object_id', 'document_type', '-created_at'], name='attachment_object_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='process',
+            index=models.Index(fields=['content_type', 'object_id'], name='process_object_idx'),
+        ),
+    ]
@@ -75,7 +75,7 @@ def attachment_upload_to(instance, filename):
 
 
 class Attachment(models.Model):
-    object_id = models.PositiveSmallIntegerField()
+    object_id = models.PositiveBigIntegerField()
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     file = models.FileField("Arquivo", upload_to=attachment_upload_to)
     content_object = GenericForeignKey('content_type', 'object_id')
@@ -112,13 +112,16 @@ class Attachment(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['document_type', 'status']),
-            models.Index(fields=['content_type', 'object_id']),
+            # Subqueries Exists por documento aprovado/em análise do objeto
+            models.Index(fields=['content_type', 'object_id', 'status', 'document_type'], name='attachment_object_status_idx'),
+            # Último documento de um tipo (ex.: ART/TRT) do objeto
+            models.Index(fields=['content_type', 'object_id', 'document_type', '-created_at'], name='attachment_object_type_idx'),
         ]
 
 
 
 class Comment(models.Model):
-    object_id = models.PositiveSmallIntegerField('ID do Objeto')
+    object_id = models.PositiveBigIntegerField('ID do Objeto')
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name="Tipo de Conteúdo")
     author = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='comments', verbose_name="Autor", blank=True, null=True)
     text = models.TextField("Comentário")
@@ -330,11 +333,74 @@ class Webhook(models.Model):
         ordering = ['-created_at']
 
 
+class WebhookEvent(models.Model):
+    """
+    Outbox de webhooks: gravado na mesma transação do save e entregue em
+    lote pelo worker após o commit.
+    """
+
+    STATUS_CHOICES = (
+        ('P', 'Pendente'),
+        ('S', 'Enviado'),
+        ('F', 'Falhou'),
+    )
+
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='events', verbose_name='Webhook')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name='Tipo de Conteúdo')
+    object_id = models.PositiveBigIntegerField('ID do Objeto')
+    event = models.CharField('Evento', max_length=1, choices=Webhook.EVENT_CHOICES)
+    payload = models.JSONField('Payload', null=True, blank=True)
+    status = models.CharField('Status', max_length=1, choices=STATUS_CHOICES, default='P')
+    attempts = models.PositiveSmallIntegerField('Tentativas', default=0)
+    next_attempt_at = models.DateTimeField('Próxima Tentativa', null=True, blank=True)
+    last_error = models.TextField('Último Erro', null=True, blank=True)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+    sent_at = models.DateTimeField('Enviado em', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.get_event_display()} {self.content_type} #{self.object_id} -> {self.webhook}'
+
+    class Meta:
+        verbose_name = 'Evento de Webhook'
+        verbose_name_plural = 'Eventos de Webhook'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['content_type', 'object_id', 'status']),
+        ]
+
+
+class WebhookDelivery(models.Model):
+    """
+    Registro de cada tentativa de entrega, com status HTTP e latência.
+    """
+
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='deliveries', verbose_name='Webhook')
+    event = models.ForeignKey(WebhookEvent, on_delete=models.SET_NULL, related_name='deliveries', null=True, blank=True, verbose_name='Evento')
+    url = models.URLField('URL')
+    success = models.BooleanField('Sucesso', default=False)
+    status_code = models.PositiveSmallIntegerField('Status HTTP', null=True, blank=True)
+    latency_ms = models.PositiveIntegerField('Latência (ms)', default=0)
+    error = models.TextField('Erro', null=True, blank=True)
+    created_at = models.DateTimeField('Criado em', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.url} ({self.status_code or "-"}) {self.latency_ms}ms'
+
+    class Meta:
+        verbose_name = 'Entrega de Webhook'
+        verbose_name_plural = 'Entregas de Webhook'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['webhook', 'created_at']),
+        ]
+
+
 class Tag(models.Model):
     tag = models.CharField('Tag', max_length=100)
     color = models.CharField('Cor', max_length=7)
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
-    object_id = models.PositiveSmallIntegerField("ID do Objeto")
+    object_id = models.PositiveBigIntegerField("ID do Objeto")
     content_object = GenericForeignKey('content_type', 'object_id')
     
     def save(self, *args, **kwargs):
@@ -378,7 +444,7 @@ class Process(models.Model):
     name = models.CharField("Nome", max_length=200)
     description = models.TextField("Descrição")
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, verbose_name="Tipo de Conteúdo")
-    object_id = models.PositiveSmallIntegerField("ID do Objeto")
+    object_id = models.PositiveBigIntegerField("ID do Objeto")
     content_object = GenericForeignKey('content_type', 'object_id')
     deadline = models.PositiveIntegerField("Prazo", blank=True, null=True)
     steps = models.JSONField("Etapas", default=list, blank=True, null=True)
@@ -411,6 +477,7 @@ class Process(models.Model):
         ordering = ['name']
         indexes = [
             models.Index(fields=['content_type']),
+            models.Index(fields=['content_type', 'object_id'], name='process_object_idx'),
         ]
 
 
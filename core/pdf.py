@@ -0,0 +1,292 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.module_loading import import_string
+from weasyprint import HTML
+from weasyprint.text.fonts import FontConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+PDF_CACHE_PREFIX = "pdf_cache"
+PDF_JOB_KEY = "pdf:job:{}"
+PDF_JOB_TTL = 60 * 60 * 24
+PDF_JOB_ID_RE = re.compile(r"^[a-z_]+-[0-9a-f]{64}$")
+
+# kind -> classe do documento; importadas sob demanda pelo worker
+PDF_DOCUMENTS = {
+    "schedule": "field_services.pdf.SchedulePdf",
+    "project_materials": "api.pdf.ProjectMaterialsPdf",
+    "addendum": "contracts.pdf.AddendumPdf",
+}
+
+_lock = threading.Lock()
+_font_config = None
+# ((caminho do PEM, mtime), SimpleSigner)
+_signer = None
+# nome do template -> hash do código-fonte
+_template_versions = {}
+
+
+# Recursos pré-carregados por processo
+
+def get_font_config():
+    global _font_config
+    if _font_config is None:
+        with _lock:
+            if _font_config is None:
+                _font_config = FontConfiguration()
+    return _font_config
+
+
+def _signer_source():
+    pem = settings.SIGN_PEM
+    if pem and os.path.exists(pem):
+        return pem, os.path.getmtime(pem)
+    return None
+
+
+def get_signer():
+    """
+    Signer do certificado em settings.SIGN_PEM, lido do disco uma vez por
+    processo. Trocar o arquivo (renovação) recarrega o certificado.
+    Retorna None quando não há certificado configurado.
+    """
+    global _signer
+    source = _signer_source()
+    if source is None:
+        return None
+    if _signer is None or _signer[0] != source:
+        from pyhanko.sign import signers
+        from pyhanko.sign.general import load_cert_from_pemder, load_private_key_from_pemder
+        from pyhanko_certvalidator.registry import SimpleCertificateStore
+
+        with _lock:
+            signer = signers.SimpleSigner(
+                signing_cert=load_cert_from_pemder(source[0]),
+                signing_key=load_private_key_from_pemder(source[0], None),
+                cert_registry=SimpleCertificateStore(),
+            )
+            _signer = (source, signer)
+    return _signer[1]
+
+
+def signer_version():
+    """
+    Identifica o certificado em uso, para que documentos assinados com um
+    certificado anterior (ou gerados sem certificado) não sejam reaproveitados.
+    """
+    source = _signer_source()
+    return source and source[1]
+
+
+def warm_pdf_resources():
+    get_font_config()
+    get_signer()
+
+
+def template_version(template_name):
+    version = _template_versions.get(template_name)
+    if version is None:
+        source = get_template(template_name).template.source
+        version = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        _template_versions[template_name] = version
+    return version
+
+
+# Geração
+
+def render_pdf(html, base_url=None, stylesheets=None):
+    return HTML(string=html, base_url=base_url).write_pdf(
+        stylesheets=stylesheets, font_config=get_font_config()
+    )
+
+
+def sign_pdf(pdf_bytes):
+    """
+    Assina o PDF com o certificado do sistema. Sem certificado configurado
+    o PDF é devolvido sem assinatura, como antes.
+    """
+    signer = get_signer()
+    if signer is None:
+        return pdf_bytes
+
+    from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
+    from pyhanko.sign import signers
+    from pyhanko.sign.fields import SigFieldSpec
+    from pyhanko.sign.signers import PdfSignatureMetadata
+
+    meta = PdfSignatureMetadata(
+        field_name="Resolve Energia Solar",
+        reason="Assinado digitalmente pelo sistema",
+        location="Belém-PA",
+    )
+    spec = SigFieldSpec(
+        sig_field_name="Resolve Energia Solar", box=(40, 40, 200, 100), on_page=0
+    )
+    out_buf = io.BytesIO()
+    signers.sign_pdf(
+        IncrementalPdfFileWriter(io.BytesIO(pdf_bytes)),
+        meta,
+        signer,
+        new_field_spec=spec,
+        existing_fields_only=False,
+        output=out_buf,
+    )
+    return out_buf.getvalue()
+
+
+class PdfDocument:
+    """
+    Documento gerado a partir de um template. Subclasses informam os dados
+    que determinam o conteúdo (`inputs`), como gerar o PDF (`render`) e os
+    argumentos para reconstruí-lo no worker (`task_kwargs`/`from_task_kwargs`).
+    O PDF pronto fica no storage sob o hash dos dados e do template, e é
+    reaproveitado enquanto nada mudar.
+    """
+
+    kind = None
+    template_name = None
+
+    def inputs(self):
+        raise NotImplementedError
+
+    def render(self):
+        raise NotImplementedError
+
+    def filename(self):
+        return f"{self.kind}.pdf"
+
+    def task_kwargs(self):
+        raise NotImplementedError
+
+    @classmethod
+    def from_task_kwargs(cls, **kwargs):
+        raise NotImplementedError
+
+    def content_hash(self):
+        payload = json.dumps(
+            {"template": template_version(self.template_name), "inputs": self.inputs()},
+            cls=DjangoJSONEncoder,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def job_id(self):
+        return f"{self.kind}-{self.content_hash()}"
+
+    def get_pdf(self):
+        """
+        PDF do cache do storage ou gerado agora e gravado no cache.
+        """
+        job_id = self.job_id()
+        pdf = read_cached_pdf(job_id)
+        if pdf is None:
+            pdf = self.render()
+            store_cached_pdf(job_id, pdf)
+        return pdf
+
+
+def pdf_storage_key(job_id):
+    kind, content_hash = job_id.split("-", 1)
+    return f"{PDF_CACHE_PREFIX}/{kind}/{content_hash}.pdf"
+
+
+def read_cached_pdf(job_id):
+    key = pdf_storage_key(job_id)
+    if not default_storage.exists(key):
+        return None
+    with default_storage.open(key, "rb") as file:
+        return file.read()
+
+
+def store_cached_pdf(job_id, pdf):
+    key = pdf_storage_key(job_id)
+    # Mesmo hash, mesmo conteúdo: outra geração concorrente já gravou
+    if not default_storage.exists(key):
+        default_storage.save(key, ContentFile(pdf))
+    return key
+
+
+# Geração assíncrona
+
+def get_document_class(kind):
+    return import_string(PDF_DOCUMENTS[kind])
+
+
+def start_pdf_job(document):
+    """
+    Enfileira a geração do documento e retorna o estado do job. Se o PDF
+    já está no cache o job nasce pronto.
+    """
+    from core.task import generate_pdf_document
+
+    job_id = document.job_id()
+    state = {"status": "pending", "filename": document.filename()}
+    if default_storage.exists(pdf_storage_key(job_id)):
+        state["status"] = "ready"
+        cache.set(PDF_JOB_KEY.format(job_id), state, PDF_JOB_TTL)
+    else:
+        existing = cache.get(PDF_JOB_KEY.format(job_id))
+        if not existing or existing["status"] == "error":
+            cache.set(PDF_JOB_KEY.format(job_id), state, PDF_JOB_TTL)
+            generate_pdf_document.delay(document.kind, job_id, document.task_kwargs())
+    return pdf_job_payload(job_id)
+
+
+def pdf_job_response(document):
+    payload = start_pdf_job(document)
+    return JsonResponse(payload, status=200 if payload["status"] == "ready" else 202)
+
+
+def get_pdf_job(job_id):
+    """
+    Estado do job ou None para identificadores desconhecidos.
+    """
+    if not PDF_JOB_ID_RE.match(job_id) or job_id.split("-", 1)[0] not in PDF_DOCUMENTS:
+        return None
+    state = cache.get(PDF_JOB_KEY.format(job_id))
+    if default_storage.exists(pdf_storage_key(job_id)):
+        return {**(state or {}), "status": "ready"}
+    return state
+
+
+def pdf_job_payload(job_id):
+    state = get_pdf_job(job_id) or {"status": "pending"}
+    payload = {
+        "job_id": job_id,
+        "status": state["status"],
+        "status_url": reverse("api:pdf-job-detail", args=[job_id]),
+        "download_url": reverse("api:pdf-job-download", args=[job_id]),
+    }
+    if state.get("message"):
+        payload["message"] = state["message"]
+    return payload
+
+
+def run_pdf_job(kind, job_id, kwargs):
+    key = PDF_JOB_KEY.format(job_id)
+    state = cache.get(key) or {}
+    try:
+        document = get_document_class(kind).from_task_kwargs(**kwargs)
+        state["filename"] = document.filename()
+        store_cached_pdf(job_id, document.render())
+    except Exception as e:
+        logger.error(f"Erro ao gerar o PDF {job_id}: {e}", exc_info=True)
+        cache.set(key, {**state, "status": "error", "message": str(e)}, PDF_JOB_TTL)
+        return {"status": "error", "message": str(e)}
+    cache.set(key, {**state, "status": "ready"}, PDF_JOB_TTL)
+    return {"status": "ready", "job_id": job_id}
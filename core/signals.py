@@ -1,11 +1,12 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from core.models import Process, StepName, Webhook
-import requests
+from django.db import transaction
+from core.models import DocumentType, Process, StepName, Webhook
 import sys
 import logging
-from core.task import send_webhook_request_async
+from core.documents import invalidate_required_document_types
+from core.webhooks import enqueue_webhook_event, invalidate_subscriptions
 
 logger = logging.getLogger(__name__)
 
@@ -49,27 +50,7 @@ def send_webhook_on_save(sender, instance, created, **kwargs):
     except ContentType.DoesNotExist:
         return
 
-    event_type = 'C' if created else 'U'
-    webhooks = Webhook.objects.filter(
-        content_type=content_type,
-        event=event_type,
-        is_active=True
-    )
-
-    if not webhooks.exists():
-        return
-
-    model_label = instance._meta.label
-    instance_id = instance.pk
-
-    for webhook in webhooks:
-        send_webhook_request_async.delay(
-            webhook.url,
-            model_label,
-            instance_id,
-            webhook.secret,
-            webhook.id
-        )
+    enqueue_webhook_event(instance, content_type, 'C' if created else 'U')
 
 
 @receiver(post_delete)
@@ -85,23 +66,16 @@ def send_webhook_on_delete(sender, instance, **kwargs):
     except ContentType.DoesNotExist:
         return
 
-    webhooks = Webhook.objects.filter(
-        content_type=content_type,
-        event='D',
-        is_active=True
-    )
+    enqueue_webhook_event(instance, content_type, 'D')
+
+
+@receiver(post_save, sender=Webhook)
+@receiver(post_delete, sender=Webhook)
+def invalidate_webhook_subscriptions(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_subscriptions)
 
-    if not webhooks.exists():
-        return
 
-    model_label = instance._meta.label
-    instance_id = instance.pk
-
-    for webhook in webhooks:
-        send_webhook_request_async.delay(
-            webhook.url,
-            model_label,
-            instance_id,
-            webhook.secret,
-            webhook.id
-        )
\ No newline at end of file
+@receiver(post_save, sender=DocumentType)
+@receiver(post_delete, sender=DocumentType)
+def invalidate_document_types(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_required_document_types)
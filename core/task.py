@@ -1,6 +1,7 @@
 # core/tasks.py
 
 from celery import shared_task
+from celery.signals import worker_process_init
 from copy import deepcopy
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
@@ -9,7 +10,9 @@ import requests
 import logging
 from django.apps import apps
 
+from core.pdf import run_pdf_job, warm_pdf_resources
 from core.utils import get_model_data
+from core.webhooks import WEBHOOK_BATCH_SIZE, WEBHOOK_TIMEOUT, deliver_batch, get_session
 
 logger = logging.getLogger(__name__)
 
@@ -86,7 +89,7 @@ def send_webhook_request_async(self, url, model_label, instance_id, secret, webh
     }
 
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=5)
+        response = get_session().post(url, json=data, headers=headers, timeout=WEBHOOK_TIMEOUT)
         response.raise_for_status()
 
         logger.info(f"Webhook enviado com sucesso: {response.status_code}")
@@ -103,7 +106,39 @@ def send_webhook_request_async(self, url, model_label, instance_id, secret, webh
             'error': str(e),
             'status_code': response.status_code if 'response' in locals() else None
         }
-    
-    
-    
-    
\ No newline at end of file
+
+
+@shared_task
+def deliver_webhook_events(batch_size=WEBHOOK_BATCH_SIZE):
+    """
+    Entrega os eventos pendentes do outbox em lotes até esvaziar a fila.
+    Também é executada periodicamente pelo beat para reprocessar falhas.
+    """
+    total = 0
+    while True:
+        delivered = deliver_batch(batch_size)
+        total += delivered
+        if delivered < batch_size:
+            break
+
+    if total:
+        logger.info(f"[Webhook] {total} eventos processados")
+    return total
+
+
+@worker_process_init.connect
+def warm_pdf_worker(**kwargs):
+    # Fontes e certificado carregados uma vez por processo do pool
+    try:
+        warm_pdf_resources()
+    except Exception as e:
+        logger.warning(f"Não foi possível pré-carregar o serviço de PDF: {e}")
+
+
+@shared_task
+def generate_pdf_document(kind, job_id, kwargs):
+    """
+    Gera um documento PDF no worker e grava no cache do storage, de onde
+    o cliente baixa pelo job_id depois de consultar o estado.
+    """
+    return run_pdf_job(kind, job_id, kwargs)
@@ -1,14 +1,28 @@
+from unittest import mock
+
+import requests
+
 from django.urls import reverse
 from django.test import TestCase
 from rest_framework.test import APIClient
 from rest_framework import status
 
 from core.models import (
-    DocumentType, DocumentSubType, Attachment, Comment, Board, Column, Task, TaskTemplates
+    DocumentType, DocumentSubType, Attachment, Comment, Board, Column, Task, TaskTemplates,
+    Webhook, WebhookDelivery, WebhookEvent
+)
+from core.documents import (
+    document_completeness, get_required_document_types, with_document_completeness
+)
+from core.webhooks import (
+    BREAKER_FAILURE_THRESHOLD, TokenBucket, deliver_batch, enqueue_webhook_event,
+    invalidate_subscriptions, record_failure
 )
 from accounts.models import Address, User, Branch
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 
 
 class BaseAPITestCase(TestCase):
@@ -523,3 +537,142 @@ class CommentViewSetTestCase(BaseAPITestCase):
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Comment.objects.filter(id=self.comment.id).exists())
+
+
+class WebhookOutboxTestCase(TestCase):
+    def setUp(self):
+        self.content_type = ContentType.objects.get_for_model(DocumentType)
+        self.create_hook = Webhook.objects.create(
+            url="https://hooks.example.com/create", content_type=self.content_type, event="C"
+        )
+        self.update_hooks = [
+            Webhook.objects.create(
+                url=f"https://hooks.example.com/update/{i}", content_type=self.content_type, event="U"
+            )
+            for i in range(2)
+        ]
+        cache.clear()
+        invalidate_subscriptions()
+        self.instance = DocumentType.objects.create(name="Contrato", app_label="contracts")
+
+    def test_repeated_saves_are_coalesced_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for _ in range(3):
+                enqueue_webhook_event(self.instance, self.content_type, "U")
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(WebhookEvent.objects.filter(event="U").count(), 2)
+
+    def test_delete_discards_pending_updates(self):
+        enqueue_webhook_event(self.instance, self.content_type, "U")
+        Webhook.objects.create(url="https://hooks.example.com/delete", content_type=self.content_type, event="D")
+        invalidate_subscriptions()
+
+        enqueue_webhook_event(self.instance, self.content_type, "D")
+
+        events = WebhookEvent.objects.all()
+        self.assertEqual([event.event for event in events], ["D"])
+        self.assertEqual(events[0].payload["name"], "Contrato")
+
+    def _respond(self, failing_urls=()):
+        def post(url, **kwargs):
+            response = mock.Mock(status_code=500 if url in failing_urls else 200)
+            if url in failing_urls:
+                response.raise_for_status.side_effect = requests.exceptions.HTTPError("500")
+            return response
+        return post
+
+    @mock.patch("core.webhooks.get_session")
+    def test_deliver_batch_sends_and_retries(self, get_session):
+        enqueue_webhook_event(self.instance, self.content_type, "U")
+        failing_url = self.update_hooks[1].url
+        get_session.return_value.post.side_effect = self._respond([failing_url])
+
+        # savepoint, lote, instância, subtipos (get_model_data), bulk_update, log, release
+        with self.assertNumQueries(7):
+            self.assertEqual(deliver_batch(), 2)
+
+        sent, failed = WebhookEvent.objects.order_by("webhook_id")
+        self.assertEqual(sent.status, "S")
+        self.assertEqual(failed.status, "P")
+        self.assertEqual(failed.attempts, 1)
+        self.assertIsNotNone(failed.next_attempt_at)
+        self.assertEqual(deliver_batch(), 0)
+
+        deliveries = WebhookDelivery.objects.order_by("webhook_id")
+        self.assertEqual(
+            [(d.url, d.success, d.status_code) for d in deliveries],
+            [(self.update_hooks[0].url, True, 200), (failing_url, False, 500)],
+        )
+
+    @mock.patch("core.webhooks.get_session")
+    def test_open_circuit_defers_without_consuming_attempts(self, get_session):
+        url = self.update_hooks[0].url
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            record_failure(url)
+        enqueue_webhook_event(self.instance, self.content_type, "U")
+        get_session.return_value.post.side_effect = self._respond()
+
+        deliver_batch()
+
+        deferred = WebhookEvent.objects.get(webhook=self.update_hooks[0])
+        self.assertEqual((deferred.status, deferred.attempts), ("P", 0))
+        self.assertGreater(deferred.next_attempt_at, timezone.now())
+        self.assertEqual(get_session.return_value.post.call_count, 1)
+
+    def test_token_bucket_limits_bursts(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertGreater(bucket.acquire(), 0)
+
+
+class DocumentCompletenessTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.rg = DocumentType.objects.create(name='RG', app_label='accounts', required=True)
+        self.cpf = DocumentType.objects.create(name='CPF', app_label='accounts', required=True)
+        DocumentType.objects.create(name='Foto', app_label='accounts', required=False)
+        self.users = [
+            User.objects.create_user(username=f'documentos_{index}', password='123456', email=f'documentos_{index}@example.com')
+            for index in range(3)
+        ]
+        content_type = ContentType.objects.get_for_model(User)
+        Attachment.objects.bulk_create([
+            Attachment(content_type=content_type, object_id=self.users[0].id, file='rg.pdf', status='A', document_type=self.rg),
+            Attachment(content_type=content_type, object_id=self.users[0].id, file='cpf.pdf', status='EA', document_type=self.cpf),
+            Attachment(content_type=content_type, object_id=self.users[1].id, file='rg.pdf', status='EA', document_type=self.rg),
+            Attachment(content_type=content_type, object_id=self.users[1].id, file='rg2.pdf', status='A', document_type=self.rg),
+        ])
+
+    def test_completeness_for_many_objects_in_one_query(self):
+        get_required_document_types('accounts')
+        with self.assertNumQueries(1):
+            result = document_completeness(self.users, app_label='accounts')
+
+        complete, partial, empty = (result[user.id] for user in self.users)
+        self.assertEqual(complete.missing, [])
+        self.assertEqual(complete.approved, [{'id': self.rg.id, 'name': 'RG'}])
+        self.assertEqual(complete.percentage, 100.0)
+        self.assertEqual(partial.missing, [{'id': self.cpf.id, 'name': 'CPF'}])
+        self.assertEqual(partial.approved, [{'id': self.rg.id, 'name': 'RG'}])
+        self.assertEqual(partial.percentage, 50.0)
+        self.assertEqual(len(empty.missing), 2)
+        self.assertEqual(empty.percentage, 0.0)
+
+    def test_annotation_matches_engine(self):
+        annotated = dict(
+            with_document_completeness(User.objects.filter(id__in=[u.id for u in self.users]), app_label='accounts')
+            .values_list('id', 'document_completeness')
+        )
+        expected = {pk: info.percentage for pk, info in document_completeness(self.users, app_label='accounts').items()}
+        self.assertEqual(annotated, expected)
+
+    def test_required_types_are_cached_until_document_type_changes(self):
+        get_required_document_types('accounts')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_required_document_types('accounts')), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DocumentType.objects.create(name='Comprovante', app_label='accounts', required=True)
+        self.assertEqual(len(get_required_document_types('accounts')), 3)
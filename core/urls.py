@@ -24,4 +24,6 @@ urlpatterns = [
     path('process/<int:process_id>/step/<int:id>/finish/', FinishStepView.as_view(), name='finish-step'),
     path('process/por-objeto/<str:app_label>/<str:model>/<int:object_id>/', ProcessByObjectView.as_view(), name='process-per-object'),
     path('process-count-by-step/', ProcessStepCountListView.as_view(), name='process-count-by-step'),
+    path('pdf-jobs/<str:job_id>/', PdfJobView.as_view(), name='pdf-job-detail'),
+    path('pdf-jobs/<str:job_id>/download/', PdfJobDownloadView.as_view(), name='pdf-job-download'),
 ]
\ No newline at end of file
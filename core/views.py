@@ -19,6 +19,9 @@ from .pagination import AttachmentPagination
 from .serializers import *
 from rest_framework import generics
 from django.db.models import Prefetch, Sum
+from django.core.files.storage import default_storage
+from django.http import FileResponse
+from .pdf import get_pdf_job, pdf_job_payload, pdf_storage_key
 
 
 class SystemConfigView(APIView):
@@ -408,4 +411,30 @@ class ProcessStepCountListView(generics.ListAPIView):
     
 class ContentTypeEndpointViewSet(BaseModelViewSet):
     queryset = ContentTypeEndpoint.objects.all()
-    serializer_class = ContentTypeEndpointSerializer
\ No newline at end of file
+    serializer_class = ContentTypeEndpointSerializer
+
+
+class PdfJobView(APIView):
+    """
+    Estado de uma geração assíncrona de PDF (pending, ready ou error).
+    """
+
+    def get(self, request, job_id):
+        if get_pdf_job(job_id) is None:
+            return Response({"detail": "Job não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(pdf_job_payload(job_id), status=status.HTTP_200_OK)
+
+
+class PdfJobDownloadView(APIView):
+    def get(self, request, job_id):
+        job = get_pdf_job(job_id)
+        if job is None:
+            return Response({"detail": "Job não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        if job["status"] != "ready":
+            return Response(pdf_job_payload(job_id), status=status.HTTP_202_ACCEPTED)
+        return FileResponse(
+            default_storage.open(pdf_storage_key(job_id), "rb"),
+            as_attachment=True,
+            filename=job.get("filename") or f"{job_id}.pdf",
+            content_type="application/pdf",
+        )
@@ -0,0 +1,416 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from hashlib import md5
+from uuid import uuid4
+
+import requests
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from core.models import Webhook, WebhookDelivery, WebhookEvent
+from core.utils import get_model_data
+
+logger = logging.getLogger(__name__)
+
+
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_TIMEOUT = 5
+WEBHOOK_MAX_ATTEMPTS = 5
+
+# Endpoints entregues em paralelo por processo do worker
+WEBHOOK_MAX_WORKERS = 8
+
+# Token bucket por endpoint: requisições por segundo e rajada máxima
+ENDPOINT_RATE = 10
+ENDPOINT_BURST = 20
+# Espera máxima por um token antes de adiar o evento
+ENDPOINT_MAX_WAIT = 1
+
+# Circuit breaker por endpoint, compartilhado entre os workers pelo cache
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 60
+
+SUBSCRIPTIONS_TTL = 60
+SUBSCRIPTIONS_GENERATION_KEY = 'webhooks:subscriptions:generation'
+
+# content_type_id -> (carregado_em, geração, {evento: [webhook_id, ...]})
+_subscriptions = {}
+
+_session = None
+_executor = None
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+# Assinaturas
+
+def get_subscriptions(content_type_id, event):
+    """
+    IDs dos webhooks ativos para o tipo de conteúdo e evento, lidos de um
+    cache em memória do processo. Alterações em Webhook trocam a geração no
+    cache compartilhado e invalidam as cópias de todos os processos.
+    """
+    generation = cache.get(SUBSCRIPTIONS_GENERATION_KEY)
+    entry = _subscriptions.get(content_type_id)
+
+    if (
+        entry is None
+        or entry[1] != generation
+        or time.monotonic() - entry[0] > SUBSCRIPTIONS_TTL
+    ):
+        by_event = defaultdict(list)
+        for webhook_id, webhook_event in Webhook.objects.filter(
+            content_type_id=content_type_id, is_active=True
+        ).values_list('id', 'event'):
+            by_event[webhook_event].append(webhook_id)
+        entry = (time.monotonic(), generation, dict(by_event))
+        _subscriptions[content_type_id] = entry
+
+    return entry[2].get(event, [])
+
+
+def invalidate_subscriptions():
+    _subscriptions.clear()
+    cache.set(SUBSCRIPTIONS_GENERATION_KEY, uuid4().hex, None)
+
+
+# Coalescência por transação
+
+def _transaction_state():
+    """
+    Estado da transação corrente. Se o callback de on_commit registrado não
+    está mais pendente (commit ou rollback), começa um estado novo.
+    """
+    connection = transaction.get_connection()
+    state = getattr(connection, '_webhook_outbox_state', None)
+    if state is not None and any(
+        func is state['dispatch'] for _, func, _ in connection.run_on_commit
+    ):
+        return state
+
+    def dispatch():
+        from core.task import deliver_webhook_events
+
+        deliver_webhook_events.delay()
+
+    state = {'events': set(), 'dispatch': dispatch}
+    connection._webhook_outbox_state = state
+    return state
+
+
+def enqueue_webhook_event(instance, content_type, event):
+    """
+    Grava no outbox um evento por webhook assinante. Saves repetidos da
+    mesma instância na mesma transação geram um único evento; a entrega
+    serializa o estado final após o commit.
+    """
+    webhook_ids = get_subscriptions(content_type.id, event)
+    if not webhook_ids:
+        return
+
+    state = _transaction_state()
+    key = (content_type.id, instance.pk, event)
+    if key in state['events']:
+        return
+
+    payload = None
+    if event == 'D':
+        # A instância não existirá na entrega: captura os dados agora e
+        # descarta criações/atualizações ainda pendentes.
+        payload = get_model_data(instance)
+        WebhookEvent.objects.filter(
+            content_type=content_type,
+            object_id=instance.pk,
+            status='P',
+            event__in=['C', 'U'],
+        ).delete()
+
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(
+            webhook_id=webhook_id,
+            content_type=content_type,
+            object_id=instance.pk,
+            event=event,
+            payload=payload,
+        )
+        for webhook_id in webhook_ids
+    ])
+
+    if not state['events']:
+        transaction.on_commit(state['dispatch'])
+    state['events'].add(key)
+
+
+# Limite de taxa e circuit breaker
+
+class TokenBucket:
+    """
+    Token bucket em memória do processo, seguro entre threads.
+    """
+
+    def __init__(self, rate=ENDPOINT_RATE, capacity=ENDPOINT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Consome um token. Retorna 0 se havia token disponível ou os segundos
+        até o próximo token (sem consumir).
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+def get_bucket(url):
+    with _buckets_lock:
+        bucket = _buckets.get(url)
+        if bucket is None:
+            bucket = _buckets[url] = TokenBucket()
+        return bucket
+
+
+def _breaker_key(url, suffix):
+    return f'webhooks:breaker:{md5(url.encode()).hexdigest()}:{suffix}'
+
+
+def breaker_open_until(url):
+    """
+    Timestamp até o qual o circuito do endpoint está aberto, ou None.
+    Passado o prazo, a próxima entrega funciona como tentativa de teste.
+    """
+    open_until = cache.get(_breaker_key(url, 'open_until'))
+    if open_until and open_until > time.time():
+        return open_until
+    return None
+
+
+def record_success(url):
+    cache.delete_many([_breaker_key(url, 'failures'), _breaker_key(url, 'open_until')])
+
+
+def record_failure(url):
+    key = _breaker_key(url, 'failures')
+    cache.add(key, 0, BREAKER_RESET_TIMEOUT * 10)
+    try:
+        failures = cache.incr(key)
+    except ValueError:
+        failures = 1
+        cache.set(key, failures, BREAKER_RESET_TIMEOUT * 10)
+
+    if failures >= BREAKER_FAILURE_THRESHOLD:
+        cache.set(
+            _breaker_key(url, 'open_until'),
+            time.time() + BREAKER_RESET_TIMEOUT,
+            BREAKER_RESET_TIMEOUT * 2,
+        )
+        logger.warning(f'[Webhook] Circuito aberto para {url} após {failures} falhas')
+
+
+# Entrega
+
+def get_session():
+    """
+    Session HTTP compartilhada pelo processo do worker, reaproveitando
+    conexões TCP/TLS entre entregas. O pool comporta todas as threads.
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=WEBHOOK_MAX_WORKERS * 2, pool_maxsize=WEBHOOK_MAX_WORKERS)
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WEBHOOK_MAX_WORKERS, thread_name_prefix='webhook')
+    return _executor
+
+
+def build_payloads(events):
+    """
+    Serializa as instâncias dos eventos, buscando cada modelo em uma única
+    query. Retorna {event.pk: payload ou None se a instância sumiu}.
+    """
+    ids_by_content_type = defaultdict(set)
+    for event in events:
+        if event.payload is None:
+            ids_by_content_type[event.content_type].add(event.object_id)
+
+    instances = {}
+    for content_type, ids in ids_by_content_type.items():
+        model = content_type.model_class()
+        for pk, instance in model.objects.in_bulk(ids).items():
+            instances[(content_type.id, pk)] = instance
+
+    payloads = {}
+    serialized = {}
+    for event in events:
+        if event.payload is not None:
+            payloads[event.pk] = event.payload
+            continue
+        key = (event.content_type_id, event.object_id)
+        if key not in serialized:
+            instance = instances.get(key)
+            serialized[key] = get_model_data(instance) if instance else None
+        payloads[event.pk] = serialized[key]
+    return payloads
+
+
+def send_event(event, payload):
+    """
+    Envia um evento. Retorna (status_code, erro ou None, latência em ms).
+    """
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Hook-Secret': event.webhook.secret,
+    }
+    response = None
+    error = None
+    start = time.monotonic()
+    try:
+        response = get_session().post(
+            event.webhook.url, json=payload, headers=headers, timeout=WEBHOOK_TIMEOUT
+        )
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        error = str(e)
+    latency_ms = int((time.monotonic() - start) * 1000)
+    status_code = getattr(response, 'status_code', None)
+    return (status_code if isinstance(status_code, int) else None), error, latency_ms
+
+
+def deliver_group(url, items):
+    """
+    Entrega em sequência os eventos de um mesmo endpoint, na mesma conexão.
+    Executada nas threads do pool: não acessa o banco, apenas devolve
+    {event.pk: resultado}, onde resultado é ('deferred', segundos) ou
+    ('sent', status_code, erro, latência).
+    """
+    results = {}
+    bucket = get_bucket(url)
+    for event, payload in items:
+        open_until = breaker_open_until(url)
+        if open_until:
+            results[event.pk] = ('deferred', open_until - time.time())
+            continue
+
+        wait = bucket.acquire()
+        if wait:
+            if wait > ENDPOINT_MAX_WAIT:
+                results[event.pk] = ('deferred', wait)
+                continue
+            time.sleep(wait)
+            bucket.acquire()
+
+        status_code, error, latency_ms = send_event(event, payload)
+        if error is None:
+            record_success(url)
+        else:
+            record_failure(url)
+        results[event.pk] = ('sent', status_code, error, latency_ms)
+    return results
+
+
+def mark_result(event, error):
+    now = timezone.now()
+    event.attempts += 1
+    if error is None:
+        event.status = 'S'
+        event.sent_at = now
+        event.last_error = None
+    else:
+        event.last_error = error
+        if event.attempts >= WEBHOOK_MAX_ATTEMPTS:
+            event.status = 'F'
+        else:
+            # Backoff exponencial: 1, 2, 4, 8 minutos
+            event.next_attempt_at = now + timedelta(minutes=2 ** (event.attempts - 1))
+
+
+def deliver_batch(batch_size=WEBHOOK_BATCH_SIZE):
+    """
+    Entrega um lote de eventos pendentes. Os registros ficam bloqueados
+    (SKIP LOCKED) até o fim do lote, permitindo vários workers em paralelo.
+    Eventos do mesmo endpoint formam um grupo; grupos diferentes são
+    enviados em paralelo. Retorna a quantidade de eventos processados.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            WebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='P')
+            .exclude(next_attempt_at__gt=now)
+            .select_related('webhook', 'content_type')
+            .order_by('id')[:batch_size]
+        )
+        if not events:
+            return 0
+
+        payloads = build_payloads(events)
+        groups = defaultdict(list)
+        for event in events:
+            payload = payloads[event.pk]
+            if payload is None:
+                event.attempts += 1
+                event.status = 'F'
+                event.last_error = 'Instância não encontrada'
+                logger.warning(
+                    f'[Webhook] Instância não encontrada: {event.content_type}({event.object_id})'
+                )
+                continue
+            groups[event.webhook.url].append((event, payload))
+
+        results = {}
+        futures = [
+            get_executor().submit(deliver_group, url, items)
+            for url, items in groups.items()
+        ]
+        for future in futures:
+            results.update(future.result())
+
+        deliveries = []
+        for event in events:
+            result = results.get(event.pk)
+            if result is None:
+                continue
+            if result[0] == 'deferred':
+                event.next_attempt_at = now + timedelta(seconds=max(1, result[1]))
+                continue
+
+            _, status_code, error, latency_ms = result
+            mark_result(event, error)
+            deliveries.append(
+                WebhookDelivery(
+                    webhook=event.webhook,
+                    event=event,
+                    url=event.webhook.url,
+                    success=error is None,
+                    status_code=status_code,
+                    latency_ms=latency_ms,
+                    error=error,
+                )
+            )
+
+        WebhookEvent.objects.bulk_update(
+            events, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+        WebhookDelivery.objects.bulk_create(deliveries)
+    return len(events)
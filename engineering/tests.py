@@ -6,9 +6,14 @@ from resolve_crm.models import Project, Sale, Lead, Origin
 from engineering.models import (
     EnergyCompany, RequestsEnergyCompany, Units, SupplyAdequance, SituationEnergyCompany, ResquestType
 )
-from logistics.models import Product
+from logistics.models import Materials, Product, ProjectMaterials
 from accounts.models import Branch
 from datetime import datetime, timedelta
+from decimal import Decimal
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from openpyxl import Workbook
 
 
 class EnergyCompanyViewSetTestCase(BaseAPITestCase):
@@ -365,3 +370,78 @@ class RequestsEnergyCompanyViewSetTestCase(BaseAPITestCase):
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(RequestsEnergyCompany.objects.filter(id=self.req_energy.id).exists())
+
+
+class ProjectMaterialsUploadTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(username='customer_materials', password='123456', first_document='55555555555', email='customer_materials@example.com')
+        seller = User.objects.create_user(username='seller_materials', password='123456', first_document='44444444444', email='seller_materials@example.com')
+        branch = Branch.objects.create(name='Filial Materiais', address=Address.objects.create(zip_code='55555555', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua Z', number='1'))
+        self.sale = Sale.objects.create(
+            customer=customer,
+            seller=seller,
+            sales_supervisor=seller,
+            sales_manager=seller,
+            branch=branch,
+            total_value=1000.000,
+        )
+        self.project = Project.objects.create(sale=self.sale, status="P")
+        self.materials = [Materials.objects.create(name=f"Material {i}", price=10) for i in range(3)]
+        self.url = reverse('api:insert_materials')
+
+    def _csv(self, lines):
+        content = "material_class;id_material;amount\n" + "\n".join(lines)
+        return SimpleUploadedFile("materiais.csv", content.encode("utf-8"), content_type="text/csv")
+
+    def _post(self, file):
+        return self.client.post(self.url, {"project_id": self.project.id, "file": file}, format='multipart')
+
+    def test_import_csv_in_bulk(self):
+        lines = [f"MAT.PADRAO;{m.id};2,5" for m in self.materials] + [f"KIT;{self.materials[0].id};1"]
+        # Projeto, materiais (in_bulk), bulk_create, histórico e o savepoint,
+        # independente da quantidade de linhas
+        with self.assertNumQueries(6):
+            response = self._post(self._csv(lines))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 4)
+        items = ProjectMaterials.objects.filter(project=self.project)
+        self.assertEqual(items.filter(material_class="P", amount=Decimal("2.5")).count(), 3)
+        self.assertEqual(items.filter(material_class="K").count(), 1)
+
+    def test_invalid_rows_are_reported_together_and_nothing_is_saved(self):
+        lines = [
+            f"MAT.PADRAO;{self.materials[0].id};1",
+            "MAT.PADRAO;999999;1",
+            f"MAT.PADRAO;{self.materials[1].id};abc",
+            "MAT.PADRAO;x;1",
+            "MAT.PADRAO;1",
+        ]
+        response = self._post(self._csv(lines))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error["row"] for error in response.data["details"]], [3, 4, 5, 6])
+        self.assertFalse(ProjectMaterials.objects.filter(project=self.project).exists())
+
+    def test_invalid_header(self):
+        file = SimpleUploadedFile("materiais.csv", b"classe;material;quantidade\nK;1;1")
+        response = self._post(file)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Invalid headers", response.data["error"])
+
+    def test_import_xlsx(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["material_class", "id_material", "amount"])
+        sheet.append(["MAT.PADRAO", self.materials[0].id, 3])
+        sheet.append([None, None, None])
+        sheet.append(["KIT", self.materials[1].id, 1.25])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        file = SimpleUploadedFile("materiais.xlsx", buffer.getvalue())
+
+        response = self._post(file)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(ProjectMaterials.objects.filter(project=self.project).values_list("material_id", "amount")),
+            {(self.materials[0].id, Decimal("3")), (self.materials[1].id, Decimal("1.25"))},
+        )
@@ -1,7 +1,6 @@
-import csv
-import openpyxl
 from api.views import BaseModelViewSet
-from logistics.serializers import ProjectMaterialsSerializer
+from logistics.imports import MaterialsImportError, import_project_materials
+from resolve_crm.models import Project
 from .models import *
 from .serializers import *
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -143,48 +142,27 @@ class ProjectMaterialsCSVUploadAPIView(APIView):
         if not file:
             return Response({"error": "No file provided."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Process the CSV file
-        try:
-            decoded_file = file.read().decode('utf-8')
-            csv_reader = csv.reader(decoded_file.splitlines(), delimiter=';')
-
-            # Skip the header row
-            header = next(csv_reader)
-            expected_headers = ['material_class', 'id_material', 'amount']
-            if header != expected_headers:
-                return Response(
-                    {"error": f"Invalid headers. Expected: {expected_headers}, Got: {header}"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Iterate through rows and save data
-            for row in csv_reader:
-                material_class, id_material, amount = row
-                
-                material_class = "P" if material_class == "MAT.PADRAO" else "K"
-
-                # Prepare the data for serialization
-                data = {
-                    "material_class": material_class,
-                    "material": id_material,
-                    "amount": amount,
-                    "project": project_id
-                }
+        project = Project.objects.filter(pk=project_id).first() if str(project_id).isdigit() else None
+        if project is None:
+            return Response({"error": "Project not found."}, status=status.HTTP_400_BAD_REQUEST)
 
-                # Validate and save using the serializer
-                serializer = ProjectMaterialsSerializer(data=data)
-                if serializer.is_valid():
-                    serializer.save()
-                else:
-                    return Response(
-                        {"error": f"Error in row: {row}", "details": serializer.errors},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-            return Response({"message": "File processed successfully."}, status=status.HTTP_201_CREATED)
+        # CSV (separado por ';') ou XLSX, validado por inteiro antes de gravar
+        try:
+            created = import_project_materials(
+                project,
+                file,
+                user=request.user if request.user.is_authenticated else None,
+            )
+        except MaterialsImportError as e:
+            return Response(
+                {"error": e.message, "details": e.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"message": "File processed successfully.", "created": len(created)},
+            status=status.HTTP_201_CREATED
+        )
 
 
 
@@ -107,6 +107,14 @@ class RouteAdmin(admin.ModelAdmin):
     autocomplete_fields = ("schedule", "agent")
 
 
+@admin.register(AgentLocation)
+class AgentLocationAdmin(admin.ModelAdmin):
+    list_display = ("agent", "recorded_at", "latitude", "longitude", "speed")
+    search_fields = ("agent__complete_name",)
+    list_filter = ("recorded_at",)
+    autocomplete_fields = ("agent",)
+
+
 @admin.register(FormAnswer)
 class FormAnswerAdmin(admin.ModelAdmin):
     list_display = ("schedule", "user", "created_at")
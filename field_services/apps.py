@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class FieldServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'field_services'
-    verbose_name = 'Serviços de Campo'
\ No newline at end of file
+    verbose_name = 'Serviços de Campo'
+
+    def ready(self):
+        import field_services.signals
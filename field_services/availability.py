@@ -0,0 +1,158 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import NamedTuple
+
+from .models import BlockTimeAgent, FreeTimeAgent, Schedule
+
+
+class SlotAvailability(NamedTuple):
+    is_blocked: bool
+    has_free_slot: bool
+    has_overlap: bool
+
+    @property
+    def available(self):
+        return not self.is_blocked and self.has_free_slot and not self.has_overlap
+
+    @property
+    def status(self):
+        if self.has_overlap:
+            return "Ocupado"
+        return "Bloqueado" if self.is_blocked else "Livre"
+
+
+class IntervalSet:
+    """
+    Intervalos [início, fim) ordenados pelo início, com o maior fim de cada
+    prefixo: saber se algum intervalo cruza [start, end) custa uma busca
+    binária.
+    """
+
+    def __init__(self, items=(), interval=lambda item: item):
+        self.interval = interval
+        self.items = sorted(items, key=lambda item: interval(item)[0])
+        self.starts = []
+        self.max_ends = []
+        for item in self.items:
+            start, end = interval(item)
+            self.starts.append(start)
+            self.max_ends.append(max(self.max_ends[-1], end) if self.max_ends else end)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def overlaps(self, start, end):
+        index = bisect_left(self.starts, end)
+        return index > 0 and self.max_ends[index - 1] > start
+
+    def overlapping(self, start, end):
+        index = bisect_left(self.starts, end)
+        return [item for item in self.items[:index] if self.interval(item)[1] > start]
+
+
+def _time_interval(free_or_block):
+    return free_or_block.start_time, free_or_block.end_time
+
+
+def _schedule_interval(schedule):
+    return schedule.schedule_start_time, schedule.schedule_end_time
+
+
+class AgentAvailability:
+    """
+    Disponibilidade de vários agentes em um intervalo de datas, carregada em
+    três consultas (disponibilidades, bloqueios e agendamentos). As respostas
+    de livre/ocupado/bloqueado são calculadas em memória.
+    """
+
+    def __init__(
+        self,
+        agent_ids,
+        start_date,
+        end_date=None,
+        exclude_schedule_ids=(),
+        schedule_related=(),
+    ):
+        self.start_date = start_date
+        self.end_date = end_date or start_date
+        agent_ids = list(agent_ids)
+
+        self._free_times = defaultdict(list)
+        for free_time in FreeTimeAgent.objects.filter(
+            agent_id__in=agent_ids, is_deleted=False
+        ).order_by("-created_at"):
+            self._free_times[(free_time.agent_id, free_time.day_of_week)].append(free_time)
+
+        self._blocks = defaultdict(list)
+        for block in BlockTimeAgent.objects.filter(
+            agent_id__in=agent_ids,
+            is_deleted=False,
+            start_date__lte=self.end_date,
+            end_date__gte=self.start_date,
+        ):
+            self._blocks[block.agent_id].append(block)
+
+        schedules = defaultdict(list)
+        queryset = Schedule.objects.filter(
+            schedule_agent_id__in=agent_ids,
+            schedule_date__range=(self.start_date, self.end_date),
+            is_deleted=False,
+        ).exclude(pk__in=exclude_schedule_ids)
+        if schedule_related:
+            queryset = queryset.select_related(*schedule_related)
+        for schedule in queryset:
+            schedules[(schedule.schedule_agent_id, schedule.schedule_date)].append(schedule)
+        self._schedules = {
+            key: IntervalSet(items, _schedule_interval) for key, items in schedules.items()
+        }
+        self._free_sets = {}
+        self._block_sets = {}
+
+    def free_times(self, agent_id, date):
+        key = (agent_id, date.weekday())
+        if key not in self._free_sets:
+            self._free_sets[key] = IntervalSet(self._free_times.get(key, []), _time_interval)
+        return self._free_sets[key]
+
+    def blocks(self, agent_id, date):
+        key = (agent_id, date)
+        if key not in self._block_sets:
+            self._block_sets[key] = IntervalSet(
+                [
+                    block
+                    for block in self._blocks.get(agent_id, [])
+                    if block.start_date <= date <= block.end_date
+                ],
+                _time_interval,
+            )
+        return self._block_sets[key]
+
+    def schedules(self, agent_id, date):
+        return self._schedules.get((agent_id, date)) or IntervalSet()
+
+    def check(self, agent_id, date, start, end):
+        return SlotAvailability(
+            is_blocked=self.blocks(agent_id, date).overlaps(start, end),
+            has_free_slot=self.free_times(agent_id, date).overlaps(start, end),
+            has_overlap=self.schedules(agent_id, date).overlaps(start, end),
+        )
+
+    def check_many(self, agent_ids, date, slots):
+        """
+        {agent_id: [SlotAvailability, ...]} na mesma ordem de `slots`, uma
+        lista de pares (início, fim).
+        """
+        return {
+            agent_id: [self.check(agent_id, date, start, end) for start, end in slots]
+            for agent_id in agent_ids
+        }
+
+    def available_agents(self, agent_ids, date, start, end):
+        return [
+            agent_id
+            for agent_id in agent_ids
+            if self.check(agent_id, date, start, end).available
+        ]
@@ -5,58 +5,49 @@ from channels.exceptions import StopConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
 
+from .locations import get_location_role, group_for, parse_position, pipeline
+
 
 logger = logging.getLogger(__name__)
 
 
 class LocationConsumer(AsyncWebsocketConsumer):
+    pipeline = pipeline
+
     async def connect(self):
         self.user = self.scope["user"]
         self.group_name = None
+        self.role = None
 
         if not self.user.is_authenticated:
             await self.close()
             return
 
-        is_supervisor = await sync_to_async(
-            self.user.user_permissions.filter(codename="change_schedule").exists
-        )()
-
-        is_client = await sync_to_async(
-            self.user.user_types.filter(name="Cliente").exists
-        )()
-
-        is_agent = await sync_to_async(
-            self.user.user_types.filter(name="agent").exists
-        )()
-
-        if is_supervisor:
-            self.group_name = "supervisors"
-        elif is_client:
-            self.group_name = f"client_{self.user.id}"
-        elif is_agent:
-            self.group_name = f"agent_{self.user.id}"
+        self.role = await self.resolve_role()
+        self.group_name = group_for(self.role, self.user.id)
 
         if self.group_name:
             await self.channel_layer.group_add(self.group_name, self.channel_name)
             await self.accept()
+            if self.role == "agent":
+                self.pipeline.ensure_running(self.channel_layer)
             logger.info(
                 f"Usuário {self.user.username} conectado ao grupo {self.group_name}"
             )
         else:
             await self.close()
 
-    async def disconnect(self, close_code):
-        if self.group_name:
-            await self.channel_layer.group_discard(self.group_name, self.channel_name)
-            logger.info(f"Usuário desconectado do grupo {self.group_name}")
-        else:
-            logger.error("Erro: Nenhum grupo definido para este WebSocket")
+    async def resolve_role(self):
+        # Papel resolvido em uma consulta e mantido em cache
+        return await sync_to_async(get_location_role)(self.user.id)
 
     async def location_update(self, event):
         data = event["data"]
         await self.send(text_data=json.dumps(data))
 
+    async def location_snapshot(self, event):
+        await self.send(text_data=json.dumps(event["data"]))
+
     async def receive(self, text_data):
         try:
             data = json.loads(text_data)
@@ -64,17 +55,16 @@ class LocationConsumer(AsyncWebsocketConsumer):
             await self.send(text_data=json.dumps({"error": "Invalid data format"}))
             return
 
-        # enviar para o cliente e para os supervisores
-        customer_id = data.get("custumer_id")
+        if self.role != "agent":
+            return
 
-        if customer_id:
-            await self.channel_layer.group_send(
-                f"client_{customer_id}", {"type": "location_update", "data": data}
-            )
+        position = parse_position(self.user.id, data)
+        if position is None:
+            await self.send(text_data=json.dumps({"error": "Invalid coordinates"}))
+            return
 
-        await self.channel_layer.group_send(
-            "supervisors", {"type": "location_update", "data": data}
-        )
+        # Enviado aos supervisores e ao cliente no próximo snapshot
+        self.pipeline.push(position)
 
     async def disconnect(self, close_code):
         if self.group_name:
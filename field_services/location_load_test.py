@@ -0,0 +1,108 @@
+import asyncio
+import json
+import random
+import time
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from .consumers import LocationConsumer
+from .locations import LocationPipeline
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"},
+}
+
+# Ids simulados ficam longe dos usuários reais
+SIMULATED_ID_OFFSET = 10_000_000
+
+
+class SimulatedUser:
+    is_authenticated = True
+
+    def __init__(self, user_id):
+        self.id = self.pk = user_id
+        self.username = f"simulado_{user_id}"
+
+
+class SimulatedLocationConsumer(LocationConsumer):
+    """
+    LocationConsumer com os papéis definidos pelo harness, sem banco nem
+    cache.
+    """
+
+    roles = {}
+
+    async def resolve_role(self):
+        return self.roles.get(self.user.id, "")
+
+
+async def run_location_load_test(agents=1000, messages_per_agent=5, interval=0.5, send_delay=0.05):
+    """
+    Conecta `agents` agentes simulados e um supervisor ao LocationConsumer
+    (que deve estar usando o InMemoryChannelLayer), envia
+    `messages_per_agent` posições por agente e mede o que o supervisor
+    recebe e o que seria gravado.
+    """
+    persisted = []
+    pipeline = LocationPipeline(interval=interval, writer=persisted.extend)
+
+    supervisor_id = SIMULATED_ID_OFFSET
+    agent_ids = [SIMULATED_ID_OFFSET + index for index in range(1, agents + 1)]
+    roles = {supervisor_id: "supervisor", **{agent_id: "agent" for agent_id in agent_ids}}
+    consumer_class = type(
+        "LoadTestLocationConsumer",
+        (SimulatedLocationConsumer,),
+        {"pipeline": pipeline, "roles": roles},
+    )
+    application = consumer_class.as_asgi()
+
+    def communicator(user_id):
+        instance = WebsocketCommunicator(application, "/ws/location/")
+        instance.scope["user"] = SimulatedUser(user_id)
+        return instance
+
+    supervisor = communicator(supervisor_id)
+    await supervisor.connect()
+    clients = [communicator(agent_id) for agent_id in agent_ids]
+    await asyncio.gather(*(client.connect() for client in clients))
+
+    rng = random.Random(0)
+    started = time.monotonic()
+    for _ in range(messages_per_agent):
+        await asyncio.gather(*(
+            client.send_to(text_data=json.dumps({
+                "latitude": -1.45 + rng.uniform(-0.5, 0.5),
+                "longitude": -48.5 + rng.uniform(-0.5, 0.5),
+                "speed": rng.uniform(0, 20),
+            }))
+            for client in clients
+        ))
+        await asyncio.sleep(send_delay)
+    # Garante que as últimas posições saiam antes de medir
+    await pipeline.flush(get_channel_layer())
+    elapsed = time.monotonic() - started
+
+    snapshots = []
+    while not await supervisor.receive_nothing(timeout=0.2):
+        snapshots.append(json.loads(await supervisor.receive_from()))
+
+    pipeline.stop()
+    await asyncio.gather(*(client.disconnect() for client in clients))
+    await supervisor.disconnect()
+
+    sent = agents * messages_per_agent
+    return {
+        "agents": agents,
+        "messages_sent": sent,
+        "messages_received": pipeline.received,
+        "snapshots": len(snapshots),
+        "max_agents_per_snapshot": max((len(s["agents"]) for s in snapshots), default=0),
+        # Posições repetidas do mesmo agente em um snapshot (deve ser 0)
+        "duplicated_positions": sum(
+            len(s["agents"]) - len({a["agent_id"] for a in s["agents"]}) for s in snapshots
+        ),
+        "positions_persisted": len(persisted),
+        "elapsed_seconds": round(elapsed, 3),
+        "messages_per_second": round(sent / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import math
+
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from accounts.models import User
+
+from .models import AgentLocation
+
+logger = logging.getLogger(__name__)
+
+
+SUPERVISORS_GROUP = "supervisors"
+# Intervalo entre snapshots: no máximo uma posição por agente a cada tick
+LOCATION_TICK_SECONDS = 5
+ROLE_CACHE_TIMEOUT = 60 * 10
+LOCATION_BATCH_SIZE = 1000
+
+OPTIONAL_FIELDS = ("accuracy", "speed", "heading")
+
+
+def role_cache_key(user_id):
+    return f"location:role:{user_id}"
+
+
+def _resolve_role(user_id):
+    flags = (
+        User.objects.filter(pk=user_id)
+        .annotate(
+            is_supervisor=Exists(
+                User.user_permissions.through.objects.filter(
+                    user_id=OuterRef("pk"), permission__codename="change_schedule"
+                )
+            ),
+            is_client=Exists(
+                User.user_types.through.objects.filter(
+                    user_id=OuterRef("pk"), usertype__name="Cliente"
+                )
+            ),
+            is_agent=Exists(
+                User.user_types.through.objects.filter(
+                    user_id=OuterRef("pk"), usertype__name="agent"
+                )
+            ),
+        )
+        .values("is_supervisor", "is_client", "is_agent")
+        .first()
+    ) or {}
+    if flags.get("is_supervisor"):
+        return "supervisor"
+    if flags.get("is_client"):
+        return "client"
+    if flags.get("is_agent"):
+        return "agent"
+    return ""
+
+
+def get_location_role(user_id):
+    """
+    Papel do usuário no rastreamento ("supervisor", "client", "agent" ou
+    ""), resolvido em uma consulta e guardado em cache.
+    """
+    key = role_cache_key(user_id)
+    role = cache.get(key)
+    if role is None:
+        role = _resolve_role(user_id)
+        cache.set(key, role, ROLE_CACHE_TIMEOUT)
+    return role
+
+
+def invalidate_location_role(*user_ids):
+    cache.delete_many([role_cache_key(user_id) for user_id in user_ids])
+
+
+def group_for(role, user_id):
+    if role == "supervisor":
+        return SUPERVISORS_GROUP
+    if role == "client":
+        return f"client_{user_id}"
+    if role == "agent":
+        return f"agent_{user_id}"
+    return None
+
+
+def _number(value, minimum=None, maximum=None):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number):
+        return None
+    if (minimum is not None and number < minimum) or (maximum is not None and number > maximum):
+        return None
+    return number
+
+
+def parse_position(agent_id, data):
+    """
+    Posição validada a partir da mensagem do agente, ou None se latitude e
+    longitude estiverem ausentes ou fora da faixa.
+    """
+    if not isinstance(data, dict):
+        return None
+    latitude = _number(data.get("latitude", data.get("lat")), -90, 90)
+    longitude = _number(data.get("longitude", data.get("lng")), -180, 180)
+    if latitude is None or longitude is None:
+        return None
+
+    position = {
+        "agent_id": agent_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "recorded_at": timezone.now().isoformat(),
+    }
+    for field in OPTIONAL_FIELDS:
+        value = _number(data.get(field))
+        if value is not None:
+            position[field] = value
+    customer_id = data.get("custumer_id")
+    if customer_id is not None:
+        position["custumer_id"] = customer_id
+    return position
+
+
+def save_positions(positions):
+    AgentLocation.objects.bulk_create(
+        [
+            AgentLocation(
+                agent_id=position["agent_id"],
+                recorded_at=position["recorded_at"],
+                latitude=position["latitude"],
+                longitude=position["longitude"],
+                accuracy=position.get("accuracy"),
+                speed=position.get("speed"),
+            )
+            for position in positions
+        ],
+        batch_size=LOCATION_BATCH_SIZE,
+    )
+
+
+class LocationPipeline:
+    """
+    Junta as posições recebidas pelo processo e, a cada tick, envia um
+    único snapshot aos supervisores, a posição de cada agente ao seu
+    cliente e grava tudo em lote. Mensagens do mesmo agente dentro do tick
+    são coalescidas: vale a mais recente.
+    """
+
+    def __init__(self, interval=LOCATION_TICK_SECONDS, writer=save_positions):
+        self.interval = interval
+        self.writer = writer
+        self.latest = {}
+        self.received = 0
+        self._task = None
+
+    def push(self, position):
+        self.received += 1
+        self.latest[position["agent_id"]] = position
+
+    async def flush(self, channel_layer):
+        if not self.latest:
+            return []
+        positions = list(self.latest.values())
+        self.latest = {}
+
+        await channel_layer.group_send(
+            SUPERVISORS_GROUP,
+            {"type": "location_snapshot", "data": {"agents": positions}},
+        )
+        for position in positions:
+            if "custumer_id" in position:
+                await channel_layer.group_send(
+                    f"client_{position['custumer_id']}",
+                    {"type": "location_update", "data": position},
+                )
+        await database_sync_to_async(self.writer)(positions)
+        return positions
+
+    async def run(self, channel_layer):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush(channel_layer)
+            except Exception as e:
+                logger.error(f"Erro ao enviar snapshot de localizações: {e}")
+
+    def ensure_running(self, channel_layer):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self.run(channel_layer))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+pipeline = LocationPipeline()
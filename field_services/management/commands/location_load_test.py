@@ -0,0 +1,28 @@
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from field_services.location_load_test import IN_MEMORY_CHANNEL_LAYERS, run_location_load_test
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula agentes enviando posições ao LocationConsumer usando o "
+        "InMemoryChannelLayer e mede snapshots, coalescência e gravação."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--agents", type=int, default=1000, help="Quantidade de agentes simulados.")
+        parser.add_argument("--messages", type=int, default=5, help="Posições enviadas por agente.")
+        parser.add_argument("--interval", type=float, default=0.5, help="Segundos entre snapshots.")
+
+    def handle(self, *args, **options):
+        with override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS):
+            result = async_to_sync(run_location_load_test)(
+                agents=options["agents"],
+                messages_per_agent=options["messages"],
+                interval=options["interval"],
+            )
+
+        for key, value in result.items():
+            self.stdout.write(f"{key}: {value}")
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.9 on 2026-10-18 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('field_services', '0089_historicalschedule_financiers_voucher_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalroute',
+            name='distance_km',
+            field=models.FloatField(blank=True, null=True, verbose_name='Distância do Trecho (km)'),
+        ),
+        migrations.AddField(
+            model_name='historicalroute',
+            name='sequence',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Ordem na Rota'),
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='distance_km',
+            field=models.FloatField(blank=True, null=True, verbose_name='Distância do Trecho (km)'),
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='sequence',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Ordem na Rota'),
+        ),
+        migrations.AlterField(
+            model_name='historicalroute',
+            name='status',
+            field=models.CharField(choices=[('R', 'Rascunho'), ('I', 'Iniciada'), ('C', 'Concluído'), ('CA', 'Cancelado')], max_length=50, verbose_name='Status'),
+        ),
+        migrations.AlterField(
+            model_name='route',
+            name='status',
+            field=models.CharField(choices=[('R', 'Rascunho'), ('I', 'Iniciada'), ('C', 'Concluído'), ('CA', 'Cancelado')], max_length=50, verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.9 on 2026-10-18 03:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('field_services', '0090_route_draft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(verbose_name='Registrado em')),
+                ('latitude', models.FloatField(verbose_name='Latitude')),
+                ('longitude', models.FloatField(verbose_name='Longitude')),
+                ('accuracy', models.FloatField(blank=True, null=True, verbose_name='Precisão (m)')),
+                ('speed', models.FloatField(blank=True, null=True, verbose_name='Velocidade (m/s)')),
+                ('agent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='locations', to=settings.AUTH_USER_MODEL, verbose_name='Agente')),
+            ],
+            options={
+                'verbose_name': 'Localização do Agente',
+                'verbose_name_plural': 'Localizações dos Agentes',
+                'ordering': ['agent', 'recorded_at'],
+                'indexes': [models.Index(fields=['agent', 'recorded_at'], name='field_servi_agent_i_05e4cc_idx')],
+            },
+        ),
+    ]
@@ -463,6 +463,7 @@ class ServiceOpinion(models.Model):
 
 class Route(models.Model):
     STATUS_CHOICES = [
+        ("R", "Rascunho"),
         ("I", "Iniciada"),
         ("C", "Concluído"),
         ("CA", "Cancelado"),
@@ -481,6 +482,8 @@ class Route(models.Model):
     end_lat_long = models.CharField(
         "Latitude e Longitude de Fim", max_length=50, blank=True, null=True
     )
+    sequence = models.PositiveIntegerField("Ordem na Rota", blank=True, null=True)
+    distance_km = models.FloatField("Distância do Trecho (km)", blank=True, null=True)
     status = models.CharField("Status", max_length=50, choices=STATUS_CHOICES)
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     is_deleted = models.BooleanField("Deletado", default=False)
@@ -495,6 +498,32 @@ class Route(models.Model):
         ordering = ["-created_at"]
 
 
+class AgentLocation(models.Model):
+    """
+    Série temporal compacta das posições dos agentes, gravada em lote pelo
+    LocationConsumer para reconstituir rotas.
+    """
+
+    agent = models.ForeignKey(
+        "accounts.User", verbose_name="Agente", on_delete=models.CASCADE, related_name="locations"
+    )
+    recorded_at = models.DateTimeField("Registrado em")
+    latitude = models.FloatField("Latitude")
+    longitude = models.FloatField("Longitude")
+    accuracy = models.FloatField("Precisão (m)", blank=True, null=True)
+    speed = models.FloatField("Velocidade (m/s)", blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.agent_id} - {self.recorded_at}"
+
+    class Meta:
+        verbose_name = "Localização do Agente"
+        verbose_name_plural = "Localizações dos Agentes"
+        ordering = ["agent", "recorded_at"]
+        indexes = [
+            models.Index(fields=["agent", "recorded_at"]),
+        ]
+
 
 class FormAnswer(models.Model):
     schedule = models.ForeignKey(
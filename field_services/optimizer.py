@@ -0,0 +1,345 @@
+import datetime
+import logging
+import math
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+
+from .availability import AgentAvailability
+from .models import Route, Schedule
+
+logger = logging.getLogger(__name__)
+
+
+EARTH_RADIUS_KM = 6371.0
+# Velocidade média considerada para o deslocamento entre visitas
+AVERAGE_SPEED_KMH = 40
+DEFAULT_VISIT_MINUTES = 90
+# Passadas máximas de 2-opt por rota
+MAX_IMPROVEMENT_PASSES = 5
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def schedule_coordinates(schedule):
+    """
+    Coordenadas do agendamento, com o endereço como alternativa.
+    """
+    lat, lon = _to_float(schedule.latitude), _to_float(schedule.longitude)
+    if lat is None or lon is None:
+        address = schedule.address
+        lat, lon = _to_float(address.latitude), _to_float(address.longitude)
+    if lat is None or lon is None:
+        return None
+    return lat, lon
+
+
+def haversine_matrix_km(points):
+    """
+    Matriz de distâncias Haversine (km) entre todos os pontos, vetorizada.
+    """
+    coords = np.radians(np.asarray(points, dtype=float).reshape(-1, 2))
+    lat, lon = coords[:, 0][:, None], coords[:, 1][:, None]
+    a = (
+        np.sin((lat - lat.T) / 2) ** 2
+        + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2
+    )
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def subtract_intervals(windows, busy):
+    """
+    Janelas livres (em minutos) menos os intervalos ocupados.
+    """
+    result = []
+    for start, end in sorted(windows):
+        for busy_start, busy_end in sorted(busy):
+            if busy_end <= start or busy_start >= end:
+                continue
+            if busy_start > start:
+                result.append((start, busy_start))
+            start = max(start, busy_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+
+def deadline_latest_start(schedule, date):
+    """
+    Último minuto do dia em que a visita pode começar para cumprir o prazo
+    do serviço (criação + horas do prazo). None quando não há prazo.
+    """
+    deadline = schedule.service.deadline
+    hours = _to_float(deadline.hours) if deadline else None
+    if hours is None or not schedule.created_at:
+        return None
+    due = timezone.localtime(schedule.created_at) + datetime.timedelta(hours=hours)
+    day_start = timezone.make_aware(datetime.datetime.combine(date, datetime.time()))
+    return math.floor((due - day_start).total_seconds() / 60)
+
+
+class AgentPlan:
+    """
+    Rota de um agente em um dia: visitas em ordem e janelas livres.
+    """
+
+    def __init__(self, agent_id, depot, windows):
+        self.agent_id = agent_id
+        self.depot = depot
+        self.windows = windows
+        self.visits = []
+        self.starts = []
+
+
+class DayOptimizer:
+    """
+    Inserção mais barata seguida de 2-opt por rota, sobre a matriz de
+    tempos de deslocamento pré-calculada.
+    """
+
+    def __init__(self, distances, travel, durations, latest, plans):
+        self.distances = distances
+        self.travel = travel
+        self.durations = durations
+        self.latest = latest
+        self.plans = plans
+
+    def fit(self, earliest, duration, windows):
+        for start, end in windows:
+            begin = max(earliest, start)
+            if begin + duration <= end:
+                return begin
+        return None
+
+    def simulate(self, plan, visits):
+        """
+        Horários de início de cada visita, ou None se a sequência violar
+        alguma janela ou prazo.
+        """
+        if not plan.windows:
+            return None
+        clock, location = plan.windows[0][0], plan.depot
+        starts = []
+        for visit in visits:
+            start = self.fit(clock + self.travel[location][visit], self.durations[visit], plan.windows)
+            latest = self.latest[visit]
+            if start is None or (latest is not None and start > latest):
+                return None
+            starts.append(start)
+            clock, location = start + self.durations[visit], visit
+        return starts
+
+    def route_distance(self, plan, visits):
+        total, location = 0.0, plan.depot
+        for visit in visits + [plan.depot]:
+            total += self.distances[location][visit]
+            location = visit
+        return total
+
+    def insertion_cost(self, plan, position, visit):
+        visits = plan.visits
+        previous = visits[position - 1] if position > 0 else plan.depot
+        following = visits[position] if position < len(visits) else plan.depot
+        d = self.distances
+        return d[previous][visit] + d[visit][following] - d[previous][following]
+
+    def insert(self, visit):
+        candidates = sorted(
+            (self.insertion_cost(plan, position, visit), index, position)
+            for index, plan in enumerate(self.plans)
+            for position in range(len(plan.visits) + 1)
+        )
+        for _, index, position in candidates:
+            plan = self.plans[index]
+            visits = plan.visits[:position] + [visit] + plan.visits[position:]
+            starts = self.simulate(plan, visits)
+            if starts is not None:
+                plan.visits, plan.starts = visits, starts
+                return True
+        return False
+
+    def improve(self, plan):
+        for _ in range(MAX_IMPROVEMENT_PASSES):
+            improved = False
+            best = self.route_distance(plan, plan.visits)
+            for i in range(len(plan.visits) - 1):
+                for j in range(i + 1, len(plan.visits)):
+                    visits = plan.visits[:i] + plan.visits[i:j + 1][::-1] + plan.visits[j + 1:]
+                    distance = self.route_distance(plan, visits)
+                    if distance + 1e-9 < best:
+                        starts = self.simulate(plan, visits)
+                        if starts is not None:
+                            plan.visits, plan.starts, best = visits, starts, distance
+                            improved = True
+            if not improved:
+                break
+
+    def run(self, order):
+        unassigned = [visit for visit in order if not self.insert(visit)]
+        for plan in self.plans:
+            self.improve(plan)
+        return unassigned
+
+
+def week_dates(date):
+    monday = date - datetime.timedelta(days=date.weekday())
+    return [monday + datetime.timedelta(days=offset) for offset in range(7)]
+
+
+def optimize_routes(category_id, dates):
+    """
+    Propõe, para cada dia, a atribuição de agentes da categoria e a ordem
+    das visitas dos agendamentos, minimizando o deslocamento total. As
+    propostas substituem os rascunhos (status "R") anteriores desses
+    agendamentos.
+    """
+    schedules = list(
+        Schedule.objects.filter(
+            service__category_id=category_id,
+            schedule_date__in=dates,
+            is_deleted=False,
+        )
+        .exclude(status="Cancelado")
+        .select_related("address", "service__deadline")
+        .order_by("schedule_date", "schedule_start_time", "id")
+    )
+    agents = list(
+        User.objects.filter(categories__id=category_id, is_active=True)
+        .distinct()
+        .values_list(
+            "id",
+            "employee__branch__address__latitude",
+            "employee__branch__address__longitude",
+        )
+    )
+
+    result = {"routes": [], "unassigned": [], "total_distance_km": 0.0}
+    located = []
+    for schedule in schedules:
+        coords = schedule_coordinates(schedule)
+        if coords is None:
+            result["unassigned"].append({"schedule": schedule.id, "reason": "Sem coordenadas"})
+        else:
+            located.append((schedule, coords))
+
+    if not located:
+        Route.objects.filter(schedule__in=schedules, status="R").delete()
+        return result
+
+    # Pontos: visitas, o centro das visitas (base de quem não tem unidade)
+    # e as bases dos agentes
+    points = [coords for _, coords in located]
+    center = len(points)
+    points.append(tuple(np.mean(points, axis=0)))
+    depots = {}
+    for agent_id, lat, lon in agents:
+        lat, lon = _to_float(lat), _to_float(lon)
+        if lat is not None and lon is not None:
+            depots[agent_id] = len(points)
+            points.append((lat, lon))
+    matrix = haversine_matrix_km(points)
+    distances = matrix.tolist()
+    travel = np.ceil(matrix / AVERAGE_SPEED_KMH * 60).astype(int).tolist()
+
+    durations = [
+        max(_minutes(s.schedule_end_time) - _minutes(s.schedule_start_time), 0)
+        or DEFAULT_VISIT_MINUTES
+        for s, _ in located
+    ]
+    availability = AgentAvailability(
+        [agent_id for agent_id, _, _ in agents],
+        min(dates),
+        max(dates),
+        exclude_schedule_ids=[schedule.id for schedule, _ in located],
+    )
+
+    new_routes = []
+    for date in sorted(set(dates)):
+        day_visits = [i for i, (s, _) in enumerate(located) if s.schedule_date == date]
+        if not day_visits:
+            continue
+
+        latest = [None] * len(points)
+        for visit in day_visits:
+            latest[visit] = deadline_latest_start(located[visit][0], date)
+
+        plans = []
+        for agent_id, _, _ in agents:
+            windows = [
+                (_minutes(f.start_time), _minutes(f.end_time))
+                for f in availability.free_times(agent_id, date)
+            ]
+            busy = [
+                (_minutes(b.start_time), _minutes(b.end_time))
+                for b in availability.blocks(agent_id, date)
+            ] + [
+                (_minutes(s.schedule_start_time), _minutes(s.schedule_end_time))
+                for s in availability.schedules(agent_id, date)
+            ]
+            windows = subtract_intervals(windows, busy)
+            if windows:
+                plans.append(AgentPlan(agent_id, depots.get(agent_id, center), windows))
+
+        # Prazos mais apertados são inseridos primeiro
+        order = sorted(
+            day_visits,
+            key=lambda v: (latest[v] is None, latest[v] or 0, located[v][0].schedule_start_time),
+        )
+        optimizer = DayOptimizer(distances, travel, durations, latest, plans)
+        for visit in optimizer.run(order):
+            result["unassigned"].append(
+                {"schedule": located[visit][0].id, "reason": "Sem agente disponível"}
+            )
+
+        for plan in plans:
+            if not plan.visits:
+                continue
+            distance = optimizer.route_distance(plan, plan.visits)
+            result["total_distance_km"] += distance
+            result["routes"].append({
+                "agent": plan.agent_id,
+                "date": date,
+                "distance_km": round(distance, 2),
+                "schedules": [located[visit][0].id for visit in plan.visits],
+            })
+            previous = plan.depot
+            for sequence, (visit, start) in enumerate(zip(plan.visits, plan.starts), start=1):
+                start_at = timezone.make_aware(
+                    datetime.datetime.combine(date, datetime.time()) + datetime.timedelta(minutes=start)
+                )
+                new_routes.append(Route(
+                    schedule=located[visit][0],
+                    agent_id=plan.agent_id,
+                    start_time=start_at,
+                    end_time=start_at + datetime.timedelta(minutes=durations[visit]),
+                    start_lat_long="{},{}".format(*points[previous]),
+                    end_lat_long="{},{}".format(*points[visit]),
+                    sequence=sequence,
+                    distance_km=round(distances[previous][visit], 2),
+                    status="R",
+                ))
+                previous = visit
+
+    result["total_distance_km"] = round(result["total_distance_km"], 2)
+    with transaction.atomic():
+        Route.objects.filter(schedule__in=schedules, status="R").delete()
+        Route.objects.bulk_create(new_routes)
+
+    logger.info(
+        f"[Rotas] {len(new_routes)} visitas propostas, {len(result['unassigned'])} sem atribuição"
+    )
+    return result
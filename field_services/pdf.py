@@ -0,0 +1,209 @@
+import base64
+import io
+import json
+from datetime import datetime
+
+from django.template.loader import render_to_string
+from django.utils.functional import cached_property
+from PIL import Image, UnidentifiedImageError
+from PIL.Image import Resampling
+
+from core.pdf import PdfDocument, render_pdf, sign_pdf, signer_version
+
+from .models import Answer, FormFile, Schedule
+
+SCHEDULE_RELATED = (
+    "customer",
+    "schedule_agent",
+    "service__form",
+    "service_opinion",
+    "final_service_opinion",
+    "final_service_opinion_user",
+)
+
+
+def compress_image(fieldfile, max_w=600, quality=50):
+    fieldfile.open()
+    img = Image.open(fieldfile)
+    if img.width > max_w:
+        h = int(max_w * img.height / img.width)
+        img = img.resize((max_w, h), Resampling.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=quality, optimize=True)
+    data = base64.b64encode(buf.getvalue()).decode()
+    return f"data:image/jpeg;base64,{data}"
+
+
+def _name(obj, attr="name"):
+    return getattr(obj, attr) if obj else None
+
+
+class SchedulePdf(PdfDocument):
+    """
+    Relatório do agendamento com as respostas do formulário, as imagens
+    enviadas, os PDFs anexados como apêndice e a assinatura digital.
+    """
+
+    kind = "schedule"
+    template_name = "schedule_pdf.html"
+
+    def __init__(self, schedule, requester_name):
+        self.schedule = schedule
+        self.requester_name = requester_name
+
+    @classmethod
+    def from_task_kwargs(cls, schedule_id, requester_name):
+        schedule = Schedule.objects.select_related(*SCHEDULE_RELATED).get(pk=schedule_id)
+        return cls(schedule, requester_name)
+
+    def task_kwargs(self):
+        return {"schedule_id": self.schedule.pk, "requester_name": self.requester_name}
+
+    def filename(self):
+        return f"agendamento_{self.schedule.protocol}_{datetime.now():%Y%m%d%H%M%S}.pdf"
+
+    @cached_property
+    def fields(self):
+        return json.loads(self.schedule.service.form.fields or "[]")
+
+    @cached_property
+    def answers(self):
+        return list(Answer.objects.filter(schedule=self.schedule, is_deleted=False))
+
+    @cached_property
+    def files(self):
+        return list(FormFile.objects.filter(answer__in=self.answers, is_deleted=False))
+
+    def inputs(self):
+        schedule = self.schedule
+        return {
+            "schedule": {
+                "id": schedule.pk,
+                "protocol": schedule.protocol,
+                "schedule_date": schedule.schedule_date,
+                "schedule_start_time": schedule.schedule_start_time,
+                "schedule_end_date": schedule.schedule_end_date,
+                "schedule_end_time": schedule.schedule_end_time,
+                "execution_started_at": schedule.execution_started_at,
+                "execution_finished_at": schedule.execution_finished_at,
+                "customer": _name(schedule.customer, "complete_name"),
+                "schedule_agent": _name(schedule.schedule_agent, "complete_name"),
+                "service": _name(schedule.service),
+                "service_opinion": _name(schedule.service_opinion),
+                "final_service_opinion": _name(schedule.final_service_opinion),
+                "final_service_opinion_user": _name(
+                    schedule.final_service_opinion_user, "complete_name"
+                ),
+            },
+            "fields": self.fields,
+            "answers": [(answer.pk, answer.answers) for answer in self.answers],
+            # Arquivos enviados recebem nomes únicos no upload
+            "files": [(f.pk, f.answer_id, f.field_id, f.file.name) for f in self.files],
+            "requester": self.requester_name,
+            "signer": signer_version(),
+        }
+
+    def render(self):
+        fields = self.fields
+
+        # Cria dicionário de labels e lista de fields para fallback
+        labels = {f"{f['type']}-{f['id']}": f['label'] for f in fields}
+        options_map = {f"select-{f['id']}": {opt['value']:opt['label'] for opt in f.get('options',[])}
+                       for f in fields if f['type']=='select'}
+
+        # Separa imagens e campos PDF
+        img_map, pdf_fields = {}, []
+        for f in self.files:
+            name = f.file.name.lower()
+            if name.endswith('.pdf'):
+                pdf_fields.append(f)
+            else:
+                try:
+                    # tenta abrir como imagem
+                    f.file.open()
+                    Image.open(f.file).verify()
+                    uri = compress_image(f.file)
+                    img_map.setdefault((f.answer_id, f.field_id), []).append(uri)
+                except UnidentifiedImageError:
+                    # não é imagem nem pdf -> ignora
+                    continue
+
+        attachment_labels = [labels.get(f"file-{pf.field_id}", pf.field_id) for pf in pdf_fields]
+
+        # Monta resposta com fallback de label
+        resp_list = []
+        for ans in self.answers:
+            items = []
+            for key, val in (ans.answers or {}).items():
+                # Resolve label: primeiro do dict, depois busca em fields
+                if key in labels:
+                    label = labels[key]
+                else:
+                    parts = key.split('-',1)
+                    if len(parts)==2:
+                        ftype, fid = parts
+                        found = next((f for f in fields if f['type']==ftype and f['id']==fid), None)
+                        label = found['label'] if found else key
+                    else:
+                        label = key
+                # Processa valor ou imagens
+                if key.startswith('file'):
+                    imgs = img_map.get((ans.id, key), [])
+                    if imgs:
+                        items.append({'label': label, 'images': imgs})
+                elif key.startswith('select'):
+                    vals = val if isinstance(val,list) else [val]
+                    disp = ", ".join(options_map.get(key,{}).get(v,v) for v in vals)
+                    items.append({'label': label, 'value': disp})
+                else:
+                    items.append({'label': label, 'value': val})
+            resp_list.append({'items': items})
+
+        # Renderiza HTML e gera PDF
+        html = render_to_string(self.template_name, {
+            'schedule': self.schedule,
+            'resp_list': resp_list,
+            'pdf_requester': self.requester_name,
+        })
+        html = html.replace('<head>', '<head><meta charset="utf-8"/>')
+        pdf_bytes = render_pdf(html)
+
+        # Anexa PDFs como páginas de apêndice com watermark de label
+        if pdf_fields:
+            pdf_bytes = self._append_attachments(pdf_bytes, pdf_fields, attachment_labels)
+
+        # Assinatura digital
+        return sign_pdf(pdf_bytes)
+
+    def _append_attachments(self, pdf_bytes, pdf_fields, attachment_labels):
+        from PyPDF2 import PdfReader, PdfWriter
+
+        writer = PdfWriter()
+        for page in PdfReader(io.BytesIO(pdf_bytes)).pages:
+            writer.add_page(page)
+        # Um watermark por label e tamanho de página, não um por página
+        watermarks = {}
+        for pf, label in zip(pdf_fields, attachment_labels):
+            with pf.file.open('rb') as stream:
+                for page in PdfReader(stream).pages:
+                    width = float(page.mediabox.upper_right[0])
+                    height = float(page.mediabox.upper_right[1])
+                    key = (label, width, height)
+                    if key not in watermarks:
+                        watermark = self._watermark(label, width, height)
+                        watermarks[key] = PdfReader(io.BytesIO(watermark)).pages[0]
+                    page.merge_page(watermarks[key])
+                    writer.add_page(page)
+        buf_out = io.BytesIO()
+        writer.write(buf_out)
+        return buf_out.getvalue()
+
+    def _watermark(self, label, width, height):
+        from reportlab.pdfgen.canvas import Canvas
+
+        buf_wm = io.BytesIO()
+        c = Canvas(buf_wm, pagesize=(width, height))
+        c.setFont("Helvetica", 10)
+        c.drawString(40, 30, label)
+        c.save()
+        return buf_wm.getvalue()
@@ -1,4 +1,5 @@
 import googlemaps
+from field_services.availability import AgentAvailability
 from field_services.models import *
 from accounts.serializers import BaseSerializer
 from rest_framework import serializers
@@ -85,12 +86,26 @@ class ScheduleSerializer(BaseSerializer):
 
         return attrs
 
-    def validate_agent_availability(self, schedule_agent, schedule_date, schedule_start_time, schedule_end_time):
-        disponibility = FreeTimeAgent.objects.filter(
-            agent=schedule_agent,
-            day_of_week=schedule_date.weekday(),
-            is_deleted=False
-        ).first()
+    def get_availability(self, schedule_agent, schedule_date, instance=None):
+        """
+        Disponibilidade do agente no dia, carregada uma única vez por
+        validação; o próprio agendamento é ignorado na edição.
+        """
+        key = (schedule_agent.pk, schedule_date, instance.pk if instance else None)
+        if getattr(self, "_availability_key", None) != key:
+            self._availability_key = key
+            self._availability = AgentAvailability(
+                [schedule_agent.pk],
+                schedule_date,
+                exclude_schedule_ids=[instance.pk] if instance else (),
+                schedule_related=["address"],
+            )
+        return self._availability
+
+    def validate_agent_availability(self, schedule_agent, schedule_date, schedule_start_time, schedule_end_time, instance=None):
+        availability = self.get_availability(schedule_agent, schedule_date, instance)
+        free_times = availability.free_times(schedule_agent.pk, schedule_date)
+        disponibility = free_times.items[0] if free_times else None
 
         if not disponibility:
             raise serializers.ValidationError({
@@ -107,19 +122,12 @@ class ScheduleSerializer(BaseSerializer):
                 }]
             })
 
-        blocked_time = BlockTimeAgent.objects.filter(
-            agent=schedule_agent,
-            start_date__lte=schedule_date,
-            end_date__gte=schedule_date,
-            is_deleted=False
-        ).filter(
-            models.Q(
-                start_time__lt=schedule_end_time,
-                end_time__gt=schedule_start_time
-            )
-        ).first()
+        blocked = availability.blocks(schedule_agent.pk, schedule_date).overlapping(
+            schedule_start_time, schedule_end_time
+        )
 
-        if blocked_time:
+        if blocked:
+            blocked_time = blocked[0]
             raise serializers.ValidationError({
                 "message": f"O agente possui um bloqueio de horário neste período.",
                 "available_time": [{
@@ -134,23 +142,11 @@ class ScheduleSerializer(BaseSerializer):
         return disponibility
 
     def check_schedule_conflicts(self, schedule_agent, schedule_date, schedule_start_time, schedule_end_time, instance=None, disponibility=None):
-        existing_schedules = Schedule.objects.filter(
-            schedule_agent=schedule_agent,
-            schedule_date=schedule_date,
-            is_deleted=False
-        ).order_by('schedule_start_time')
-
-        if instance:
-            existing_schedules = existing_schedules.exclude(pk=instance.pk)
-
-        conflicting_schedules = existing_schedules.filter(
-            models.Q(
-                schedule_start_time__lt=schedule_end_time,
-                schedule_end_time__gt=schedule_start_time
-            )
+        existing_schedules = self.get_availability(schedule_agent, schedule_date, instance).schedules(
+            schedule_agent.pk, schedule_date
         )
 
-        if conflicting_schedules.exists():
+        if existing_schedules.overlaps(schedule_start_time, schedule_end_time):
             available_slots = []
             current_time = disponibility.start_time
             
@@ -172,7 +168,7 @@ class ScheduleSerializer(BaseSerializer):
                 "message": "Já existe um agendamento para este agente no horário selecionado.",
                 "available_time": available_slots
             })
-        return existing_schedules
+        return existing_schedules.items
 
     def calculate_travel_times(self, address, all_schedules, position):
         travel_time_previous = 0
@@ -380,7 +376,7 @@ class ScheduleSerializer(BaseSerializer):
                 address = validated_data.get("address", instance.address)
 
                 disponibility = self.validate_agent_availability(
-                    schedule_agent, schedule_date, schedule_start_time, schedule_end_time
+                    schedule_agent, schedule_date, schedule_start_time, schedule_end_time, instance
                 )
 
                 existing_schedules = self.check_schedule_conflicts(
@@ -0,0 +1,21 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from accounts.models import User
+
+from .locations import invalidate_location_role
+
+
+@receiver(m2m_changed, sender=User.user_types.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def location_role_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_location_role(instance.pk)
+    elif action in ("post_add", "post_remove"):
+        invalidate_location_role(*pk_set)
+    elif action == "pre_clear":
+        # A partir do tipo/permissão, os usuários afetados só são conhecidos antes do clear
+        invalidate_location_role(*sender.objects.filter(
+            **{instance._meta.model_name: instance}
+        ).values_list("user_id", flat=True))
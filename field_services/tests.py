@@ -1,3 +1,311 @@
-from django.test import TestCase
+import json
+import random
+import time as timer
+from datetime import date, time
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from accounts.models import Address, Branch, Employee, User, UserType
+from core.tests import BaseAPITestCase
+from field_services.availability import AgentAvailability, IntervalSet
+from field_services.location_load_test import IN_MEMORY_CHANNEL_LAYERS, run_location_load_test
+from field_services.locations import get_location_role, parse_position, save_positions
+from field_services.models import AgentLocation, Answer, BlockTimeAgent, Category, Deadline, Forms, FreeTimeAgent, Route, Schedule, Service
+
+
+class IntervalSetTestCase(BaseAPITestCase):
+    def test_overlaps_uses_prefix_max_end(self):
+        intervals = IntervalSet([(time(8), time(17)), (time(9), time(10)), (time(12), time(13))])
+        self.assertTrue(intervals.overlaps(time(15), time(16)))
+        self.assertFalse(intervals.overlaps(time(17), time(18)))
+        self.assertFalse(intervals.overlaps(time(6), time(8)))
+        self.assertEqual(
+            intervals.overlapping(time(9, 30), time(12, 30)),
+            [(time(8), time(17)), (time(9), time(10)), (time(12), time(13))],
+        )
+        self.assertFalse(IntervalSet().overlaps(time(8), time(9)))
+
+
+class AgentAvailabilityTestCase(BaseAPITestCase):
+    # Segunda-feira
+    day = date(2030, 1, 7)
+
+    def setUp(self):
+        super().setUp()
+        agent_type, _ = UserType.objects.get_or_create(name='agent')
+        self.agents = [
+            User.objects.create_user(username=f'agent_{i}', password='123456', first_document=f'9000000000{i}', email=f'agent_{i}@example.com', complete_name=f'Agente {i}')
+            for i in range(3)
+        ]
+        category = Category.objects.create(name='Vistoria')
+        category.members.set(self.agents)
+        for agent in self.agents:
+            agent.user_types.add(agent_type)
+            FreeTimeAgent.objects.create(agent=agent, day_of_week=self.day.weekday(), start_time=time(8), end_time=time(18))
+
+        self.service = Service.objects.create(name='Serviço de Vistoria', category=category, form=Forms.objects.create(name='Formulário Vistoria'))
+        self.address = Address.objects.create(zip_code='66000000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua A', number='1')
+
+        # agente 0: ocupado 09:00-10:30; agente 1: bloqueado o dia todo; agente 2: livre
+        self.schedule = self.create_schedule(self.agents[0], time(9), time(10, 30))
+        self.create_schedule(self.agents[2], time(9), time(10, 30), is_deleted=True)
+        BlockTimeAgent.objects.create(agent=self.agents[1], start_date=date(2030, 1, 6), end_date=date(2030, 1, 8), start_time=time(8), end_time=time(18))
+        BlockTimeAgent.objects.create(agent=self.agents[2], start_date=self.day, end_date=self.day, start_time=time(8), end_time=time(18), is_deleted=True)
+
+    def create_schedule(self, agent, start, end, **kwargs):
+        return Schedule.objects.create(
+            protocol=f'{agent.id}-{start:%H%M}', schedule_creator=self.user, schedule_agent=agent, service=self.service, address=self.address,
+            schedule_date=self.day, schedule_start_time=start, schedule_end_date=self.day, schedule_end_time=end,
+            **kwargs,
+        )
+
+    def test_loads_everything_in_three_queries(self):
+        slots = [(time(9), time(10, 30)), (time(13), time(14, 30))]
+        with self.assertNumQueries(3):
+            availability = AgentAvailability([agent.id for agent in self.agents], self.day)
+            statuses = availability.check_many([agent.id for agent in self.agents], self.day, slots)
+
+        self.assertEqual([slot.status for slot in statuses[self.agents[0].id]], ['Ocupado', 'Livre'])
+        self.assertEqual([slot.status for slot in statuses[self.agents[1].id]], ['Bloqueado', 'Bloqueado'])
+        self.assertEqual([slot.status for slot in statuses[self.agents[2].id]], ['Livre', 'Livre'])
+        self.assertEqual(
+            availability.available_agents([agent.id for agent in self.agents], self.day, time(9), time(10)),
+            [self.agents[2].id],
+        )
+
+    def test_excluded_schedule_does_not_conflict(self):
+        availability = AgentAvailability([self.agents[0].id], self.day, exclude_schedule_ids=[self.schedule.id])
+        self.assertTrue(availability.check(self.agents[0].id, self.day, time(9), time(10)).available)
+
+    def test_timeline_query_count_does_not_grow_with_agents(self):
+        url = reverse('api:schedule-get-timeline')
+        params = {'date': f'{self.day.isoformat()}T00:00:00'}
+        self.client.get(url, params)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url, params)
+
+        agent_type = UserType.objects.get(name='agent')
+        for i in range(3, 23):
+            agent = User.objects.create_user(username=f'agent_{i}', password='123456', first_document=f'900000000{i:02d}', email=f'agent_{i}@example.com')
+            agent.user_types.add(agent_type)
+
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(url, params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 23)
+        self.assertEqual(len(many.captured_queries), len(few.captured_queries))
+        timeline = {item['agent']['id']: item['schedules'] for item in response.data}
+        self.assertEqual(timeline[self.agents[0].id][0]['status'], 'Ocupado')
+        self.assertEqual(timeline[self.agents[1].id][0]['status'], 'Bloqueado')
+        self.assertEqual(timeline[self.agents[2].id][0]['status'], 'Livre')
+
+    def test_available_agents_endpoint(self):
+        response = self.client.get(reverse('api:user-available'), {
+            'date': self.day.isoformat(), 'start_time': '09:00', 'end_time': '10:00', 'service': self.service.id,
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([agent['id'] for agent in response.data], [self.agents[2].id])
+        self.assertEqual(response.data[0]['schedule_inspection_count'], 0)
+
+    def test_agent_availability_endpoint(self):
+        response = self.client.get(reverse('api:user-availability', args=[self.agents[0].id]), {
+            'date': self.day.isoformat(), 'start_time': '10:00', 'end_time': '11:00',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['has_overlap'])
+        self.assertFalse(response.data['available'])
+        self.assertEqual(response.data['free_time_agent'], [{'start_time': '08:00', 'end_time': '18:00'}])
+
+    def test_create_schedule_rejects_conflict(self):
+        payload = {
+            'schedule_creator': self.user.id, 'service': self.service.id, 'address': self.address.id,
+            'schedule_date': self.day.isoformat(), 'schedule_end_date': self.day.isoformat(),
+            'schedule_start_time': '10:00', 'schedule_end_time': '11:00',
+        }
+        response = self.client.post(reverse('api:schedule-list'), {**payload, 'schedule_agent': self.agents[0].id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['available_time'], [
+            {'start': '08:00', 'end': '09:00'}, {'start': '10:30', 'end': '18:00'},
+        ])
+
+        response = self.client.post(reverse('api:schedule-list'), {**payload, 'schedule_agent': self.agents[1].id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse('api:schedule-list'), {**payload, 'schedule_agent': self.agents[2].id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+
+class RouteOptimizerTestCase(BaseAPITestCase):
+    # Segunda-feira
+    day = date(2030, 1, 7)
+
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Instalação')
+        self.service = Service.objects.create(name='Instalação Solar', category=self.category, form=Forms.objects.create(name='Formulário Instalação'))
+        self.url = reverse('api:schedule-optimize-routes')
+
+    def create_agent(self, name, lat, lon):
+        agent = User.objects.create_user(username=name, password='123456', email=f'{name}@example.com', complete_name=name)
+        branch = Branch.objects.create(name=f'Filial {name}', address=self.create_address(lat, lon))
+        Employee.objects.create(user=agent, branch=branch)
+        self.category.members.add(agent)
+        FreeTimeAgent.objects.create(agent=agent, day_of_week=self.day.weekday(), start_time=time(8), end_time=time(18))
+        return agent
+
+    def create_address(self, lat, lon):
+        return Address.objects.create(zip_code='66000000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua A', number='1', latitude=lat, longitude=lon)
+
+    def create_schedules(self, points, service=None, minutes=60, prefix='OPT'):
+        return Schedule.objects.bulk_create([
+            Schedule(
+                protocol=f'{prefix}-{index}', schedule_creator=self.user, service=service or self.service, address=self.create_address(lat, lon),
+                schedule_date=self.day, schedule_start_time=time(8), schedule_end_date=self.day, schedule_end_time=time(8 + minutes // 60, minutes % 60),
+            )
+            for index, (lat, lon) in enumerate(points)
+        ])
+
+    def test_assigns_nearest_agent_and_writes_draft_routes(self):
+        belem = self.create_agent('agente_belem', -1.45, -48.50)
+        castanhal = self.create_agent('agente_castanhal', -1.29, -47.92)
+        near_belem = self.create_schedules([(-1.44, -48.49), (-1.46, -48.48)])
+        near_castanhal = self.create_schedules([(-1.30, -47.93), (-1.28, -47.91)], prefix='OPT-C')
+
+        response = self.client.post(self.url, {'date': self.day.isoformat(), 'category': self.category.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['unassigned'], [])
+
+        routes = {route['agent']: set(route['schedules']) for route in response.data['routes']}
+        self.assertEqual(routes[belem.id], {s.id for s in near_belem})
+        self.assertEqual(routes[castanhal.id], {s.id for s in near_castanhal})
+
+        drafts = Route.objects.filter(status='R', agent=belem).order_by('sequence')
+        self.assertEqual([route.sequence for route in drafts], [1, 2])
+        self.assertLessEqual(drafts[0].end_time, drafts[1].start_time)
+
+        # Rodar de novo substitui os rascunhos anteriores
+        self.client.post(self.url, {'date': self.day.isoformat(), 'category': self.category.id}, format='json')
+        self.assertEqual(Route.objects.filter(status='R').count(), 4)
+
+    def test_respects_blocks_and_deadlines(self):
+        agent = self.create_agent('agente_unico', -1.45, -48.50)
+        BlockTimeAgent.objects.create(agent=agent, start_date=self.day, end_date=self.day, start_time=time(8), end_time=time(12))
+        urgent = Service.objects.create(name='Vistoria Urgente', category=self.category, deadline=Deadline.objects.create(name='24h', hours='24'), form=Forms.objects.create(name='Formulário Urgente'))
+        late, = self.create_schedules([(-1.44, -48.49)], service=urgent)
+        on_time, = self.create_schedules([(-1.46, -48.48)], prefix='OPT-OK')
+
+        response = self.client.post(self.url, {'date': self.day.isoformat(), 'category': self.category.id}, format='json')
+        self.assertEqual(response.data['unassigned'], [{'schedule': late.id, 'reason': 'Sem agente disponível'}])
+        route = Route.objects.get(schedule=on_time, status='R')
+        self.assertGreaterEqual(timezone.localtime(route.start_time).time(), time(12))
+
+    def test_week_with_500_schedules_runs_in_seconds(self):
+        rng = random.Random(42)
+        for index in range(40):
+            self.create_agent(f'agente_{index}', -1.45 + rng.uniform(-0.3, 0.3), -48.50 + rng.uniform(-0.3, 0.3))
+        self.create_schedules(
+            [(-1.45 + rng.uniform(-0.3, 0.3), -48.50 + rng.uniform(-0.3, 0.3)) for _ in range(500)],
+            minutes=30,
+        )
+
+        started = timer.monotonic()
+        response = self.client.post(self.url, {'date': self.day.isoformat(), 'category': self.category.id, 'week': True}, format='json')
+        elapsed = timer.monotonic() - started
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        assigned = sum(len(route['schedules']) for route in response.data['routes'])
+        self.assertEqual(assigned + len(response.data['unassigned']), 500)
+        self.assertGreater(assigned, 450)
+        self.assertLess(elapsed, 15)
+
+
+class LocationPipelineTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.agent = User.objects.create_user(username='agente_gps', password='123456', email='agente_gps@example.com', complete_name='Agente GPS')
+        self.agent_type, _ = UserType.objects.get_or_create(name='agent')
+
+    def test_role_is_cached_and_invalidated(self):
+        self.assertEqual(get_location_role(self.agent.id), '')
+        self.agent.user_types.add(self.agent_type)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_location_role(self.agent.id), 'agent')
+            self.assertEqual(get_location_role(self.agent.id), 'agent')
+
+        self.agent_type.user_set.clear()
+        self.assertEqual(get_location_role(self.agent.id), '')
+
+    def test_parse_and_save_positions(self):
+        self.assertIsNone(parse_position(self.agent.id, {'latitude': 'abc', 'longitude': 10}))
+        self.assertIsNone(parse_position(self.agent.id, {'latitude': 95, 'longitude': 10}))
+        position = parse_position(self.agent.id, {'latitude': '-1.45', 'longitude': -48.5, 'speed': 3, 'custumer_id': 7, 'extra': 'x'})
+        self.assertEqual(position['latitude'], -1.45)
+        self.assertEqual(position['custumer_id'], 7)
+        self.assertNotIn('extra', position)
+
+        with self.assertNumQueries(1):
+            save_positions([position, {**position, 'latitude': -1.46}])
+        self.assertEqual(AgentLocation.objects.filter(agent=self.agent).count(), 2)
+
+    @override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS)
+    def test_load_harness_coalesces_1000_agents(self):
+        result = async_to_sync(run_location_load_test)(agents=1000, messages_per_agent=3, interval=0.2)
+        self.assertEqual(result['messages_received'], 3000)
+        self.assertEqual(result['duplicated_positions'], 0)
+        self.assertEqual(result['max_agents_per_snapshot'], 1000)
+        # No máximo uma posição por agente por snapshot, poucos quadros no total
+        self.assertGreaterEqual(result['positions_persisted'], 1000)
+        self.assertLessEqual(result['positions_persisted'], 3000)
+        self.assertLessEqual(result['snapshots'], 10)
+
+
+class SchedulePdfTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.enterContext(override_settings(
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+                "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+            }
+        ))
+        form = Forms.objects.create(
+            name='Formulário Vistoria PDF',
+            fields=json.dumps([
+                {'type': 'select', 'id': '1', 'label': 'Telhado', 'options': [{'value': 'c', 'label': 'Cerâmico'}]},
+            ]),
+        )
+        service = Service.objects.create(name='Vistoria PDF', category=Category.objects.create(name='Vistoria PDF'), form=form)
+        address = Address.objects.create(zip_code='66000000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua PDF', number='1')
+        day = date(2030, 1, 7)
+        self.schedule = Schedule.objects.create(
+            protocol='PDF-1', schedule_creator=self.user, service=service, address=address,
+            schedule_date=day, schedule_start_time=time(8), schedule_end_date=day, schedule_end_time=time(9),
+        )
+        self.answer = Answer.objects.create(form=form, answers={'select-1': 'c'}, answerer=self.user, schedule=self.schedule)
+        self.url = reverse('api:schedule-pdf', args=[self.schedule.id])
+
+    def test_unchanged_schedule_reuses_stored_pdf(self):
+        with mock.patch('field_services.pdf.render_pdf', return_value=b'%PDF-agendamento') as render:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            self.assertEqual(render.call_count, 1)
+            self.assertIn('Cerâmico', render.call_args.args[0])
+
+            self.answer.answers = {'select-1': 'outro'}
+            self.answer.save()
+            self.client.get(self.url)
+            self.assertEqual(render.call_count, 2)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, b'%PDF-agendamento')
+        self.assertIn('agendamento_PDF-1_', second['Content-Disposition'])
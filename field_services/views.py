@@ -1,23 +1,14 @@
-import base64
-from collections import defaultdict
 from datetime import datetime
-import io
-import json
-import json
-import os
-from PIL import Image, UnidentifiedImageError
-from PIL.Image import Resampling
 
 from django.db.models import Prefetch, Q
 from django.http import HttpResponse
 from django.shortcuts import get_object_or_404
-from django.utils.dateparse import parse_datetime
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
 from django.utils.functional import cached_property
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from weasyprint import HTML 
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from accounts.models import Address, PhoneNumber, User
@@ -25,7 +16,8 @@ from api.views import BaseModelViewSet
 from core.models import Attachment
 from logistics.models import Product
 from resolve_crm.models import Lead
-from resolve_erp import settings
+from .availability import AgentAvailability
+from . import optimizer
 from .models import (
     Answer,
     FormAnswer,
@@ -58,22 +50,9 @@ from .serializers import (
 )
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
-from django.template.loader import render_to_string
-
-from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
-from pyhanko.sign                        import signers
-from pyhanko.sign.fields                 import SigFieldSpec
-from pyhanko.sign.general                import (
-    load_cert_from_pemder,
-    load_private_key_from_pemder
-)
-from pyhanko.sign.signers import PdfSignatureMetadata
-from pyhanko_certvalidator.registry      import SimpleCertificateStore
-
-from reportlab.pdfgen.canvas import Canvas
-from reportlab.lib.pagesizes import letter
 
-from PyPDF2 import PdfReader, PdfWriter
+from core.pdf import pdf_job_response
+from .pdf import SCHEDULE_RELATED, SchedulePdf
 
 class RoofTypeViewSet(BaseModelViewSet):
     queryset = RoofType.objects.all()
@@ -310,64 +289,40 @@ class ScheduleViewSet(BaseModelViewSet):
         else:
             agents_qs = User.objects.filter(user_types__name="agent")
 
-        agents = agents_qs.values_list("id", flat=True)
-        agent_objs = agents_qs.in_bulk()
-
-        schedules = Schedule.objects.filter(
-            schedule_date=date, schedule_agent_id__in=agents
-        )
-
-        schedules_by_agent = defaultdict(list)
-        for s in schedules:
-            schedules_by_agent[s.schedule_agent_id].append(s)
+        agents = list(agents_qs.distinct().values_list("id", "complete_name"))
+        slots = [(parse_time(start), parse_time(end)) for start, end in hours]
 
-        blocks = BlockTimeAgent.objects.filter(agent_id__in=agents, start_date=date)
+        # Disponibilidade de todos os agentes em três consultas
+        availability = AgentAvailability([agent_id for agent_id, _ in agents], date)
+        statuses = availability.check_many([agent_id for agent_id, _ in agents], date, slots)
 
-        blocks_by_agent = defaultdict(list)
-        for b in blocks:
-            blocks_by_agent[b.agent_id].append(b)
-
-        data = []
+        data = [
+            {
+                "agent": {"id": agent_id, "name": name},
+                "schedules": [
+                    {"start_time": start, "end_time": end, "status": slot.status}
+                    for (start, end), slot in zip(hours, statuses[agent_id])
+                ],
+            }
+            for agent_id, name in agents
+        ]
 
-        for agent_id in agents:
-            agent = agent_objs.get(agent_id)
-            if not agent:
-                continue
+        return Response(data, status=status.HTTP_200_OK)
 
-            agent_data = {
-                "agent": {
-                    "id": agent.id,
-                    "name": agent.complete_name,
-                },
-                "schedules": [],
-            }
 
-            agent_schedules = schedules_by_agent.get(agent_id, [])
-            agent_blocks = blocks_by_agent.get(agent_id, [])
-
-            for start, end in hours:
-                ocupado = any(
-                    s.schedule_start_time.strftime("%H:%M") < end
-                    and s.schedule_end_time.strftime("%H:%M") > start
-                    for s in agent_schedules
-                )
-                if ocupado:
-                    status_ = "Ocupado"
-                else:
-                    bloqueado = any(
-                        b.start_time.strftime("%H:%M") < end
-                        and b.end_time.strftime("%H:%M") > start
-                        for b in agent_blocks
-                    )
-                    status_ = "Bloqueado" if bloqueado else "Livre"
-
-                agent_data["schedules"].append(
-                    {"start_time": start, "end_time": end, "status": status_}
-                )
-
-            data.append(agent_data)
+    @action(detail=False, methods=["post"], url_path="optimize-routes")
+    def optimize_routes(self, request):
+        date = parse_date(str(request.data.get("date", "")))
+        category = request.data.get("category")
+        if not date or not category:
+            return Response(
+                {"detail": "Parâmetros date e category são obrigatórios."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        return Response(data, status=status.HTTP_200_OK)
+        week = str(request.data.get("week", "")).lower() in ("1", "true")
+        dates = optimizer.week_dates(date) if week else [date]
+        return Response(optimizer.optimize_routes(category, dates), status=status.HTTP_200_OK)
 
 
 class BlockTimeAgentViewSet(BaseModelViewSet):
@@ -436,143 +391,25 @@ class RouteViewSet(BaseModelViewSet):
     serializer_class = RouteSerializer
 
 
-def compress_image(fieldfile, max_w=600, quality=50):
-    fieldfile.open()
-    img = Image.open(fieldfile)
-    if img.width > max_w:
-        h = int(max_w * img.height / img.width)
-        img = img.resize((max_w, h), Resampling.LANCZOS)
-    buf = io.BytesIO()
-    img.save(buf, "JPEG", quality=quality, optimize=True)
-    data = base64.b64encode(buf.getvalue()).decode()
-    return f"data:image/jpeg;base64,{data}"
-
 class GenerateSchedulePDF(APIView):
+    """
+    PDF do agendamento. Com ?async=true a geração vai para o pool de PDFs
+    e a resposta traz as URLs de estado e download do job.
+    """
+
     def get(self, request, pk):
-        schedule = get_object_or_404(Schedule, pk=pk)
-        answers  = Answer.objects.filter(schedule=schedule, is_deleted=False)
-        fields   = json.loads(schedule.service.form.fields or '[]')
-
-        # Cria dicionário de labels e lista de fields para fallback
-        labels = {f"{f['type']}-{f['id']}": f['label'] for f in fields}
-        options_map = {f"select-{f['id']}": {opt['value']:opt['label'] for opt in f.get('options',[])}
-                       for f in fields if f['type']=='select'}
-
-        # Separa imagens e campos PDF
-        files_qs = FormFile.objects.filter(answer__in=answers, is_deleted=False)
-        img_map, pdf_fields = {}, []
-        for f in files_qs:
-            name = f.file.name.lower()
-            if name.endswith('.pdf'):
-                pdf_fields.append(f)
-            else:
-                try:
-                    # tenta abrir como imagem
-                    f.file.open()
-                    Image.open(f.file).verify()
-                    uri = compress_image(f.file)
-                    img_map.setdefault((f.answer_id, f.field_id), []).append(uri)
-                except UnidentifiedImageError:
-                    # não é imagem nem pdf -> ignora
-                    continue
-
-        attachment_labels = [labels.get(f"file-{pf.field_id}", pf.field_id) for pf in pdf_fields]
-
-        # Monta resposta com fallback de label
-        resp_list = []
-        for ans in answers:
-            items = []
-            for key, val in (ans.answers or {}).items():
-                # Resolve label: primeiro do dict, depois busca em fields
-                if key in labels:
-                    label = labels[key]
-                else:
-                    parts = key.split('-',1)
-                    if len(parts)==2:
-                        ftype, fid = parts
-                        found = next((f for f in fields if f['type']==ftype and f['id']==fid), None)
-                        label = found['label'] if found else key
-                    else:
-                        label = key
-                # Processa valor ou imagens
-                if key.startswith('file'):
-                    imgs = img_map.get((ans.id, key), [])
-                    if imgs:
-                        items.append({'label': label, 'images': imgs})
-                elif key.startswith('select'):
-                    vals = val if isinstance(val,list) else [val]
-                    disp = ", ".join(options_map.get(key,{}).get(v,v) for v in vals)
-                    items.append({'label': label, 'value': disp})
-                else:
-                    items.append({'label': label, 'value': val})
-            resp_list.append({'items': items})
-
-        # Renderiza HTML e gera PDF
-        html = render_to_string('schedule_pdf.html', {
-            'schedule': schedule,
-            'resp_list': resp_list,
-            'pdf_requester': request.user.complete_name.title(),
-        })
-        html = html.replace('<head>', '<head><meta charset="utf-8"/>')
-        pdf_bytes = HTML(string=html).write_pdf()
-
-        # Anexa PDFs como páginas de apêndice com watermark de label
-        if pdf_fields:
-            writer = PdfWriter()
-            main_reader = PdfReader(io.BytesIO(pdf_bytes))
-            for page in main_reader.pages:
-                writer.add_page(page)
-            for pf, label in zip(pdf_fields, attachment_labels):
-                with pf.file.open('rb') as stream:
-                    attach_reader = PdfReader(stream)
-                    for page in attach_reader.pages:
-                        # desenha watermark do label
-                        buf_wm = io.BytesIO()
-                        width = float(page.mediabox.upper_right[0])
-                        height = float(page.mediabox.upper_right[1])
-                        c = Canvas(buf_wm, pagesize=(width, height))
-                        c.setFont("Helvetica", 10)
-                        c.drawString(40, 30, label)
-                        c.save()
-                        buf_wm.seek(0)
-                        wm = PdfReader(buf_wm).pages[0]
-                        page.merge_page(wm)
-                        writer.add_page(page)
-            buf_out = io.BytesIO()
-            writer.write(buf_out)
-            pdf_bytes = buf_out.getvalue()
-
-        # Assinatura digital
-        pem = settings.SIGN_PEM
-        if pem and os.path.exists(pem):
-            cert = load_cert_from_pemder(pem)
-            key  = load_private_key_from_pemder(pem, None)
-            signer = signers.SimpleSigner(
-                signing_cert=cert,
-                signing_key=key,
-                cert_registry=SimpleCertificateStore()
-            )
-            meta = PdfSignatureMetadata(
-                field_name='Resolve Energia Solar',
-                reason='Assinado digitalmente pelo sistema',
-                location='Belém-PA'
-            )
-            spec = SigFieldSpec(sig_field_name='Resolve Energia Solar', box=(40,40,200,100), on_page=0)
-            in_buf = io.BytesIO(pdf_bytes)
-            writer_inc = IncrementalPdfFileWriter(in_buf)
-            out_buf = io.BytesIO()
-            signers.sign_pdf(
-                writer_inc, meta, signer,
-                new_field_spec=spec, existing_fields_only=False,
-                output=out_buf
-            )
-            pdf_bytes = out_buf.getvalue()
+        schedule = get_object_or_404(
+            Schedule.objects.select_related(*SCHEDULE_RELATED), pk=pk
+        )
+        document = SchedulePdf(schedule, request.user.complete_name.title())
+
+        if request.query_params.get("async") == "true":
+            return pdf_job_response(document)
 
-        filename = f"agendamento_{schedule.protocol}_{datetime.now():%Y%m%d%H%M%S}.pdf"
         return HttpResponse(
-            pdf_bytes,
+            document.get_pdf(),
             content_type='application/pdf',
-            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+            headers={'Content-Disposition': f'attachment; filename="{document.filename()}"'}
         )
 
 
@@ -0,0 +1,218 @@
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Payment, PaymentSummary, SalePaymentSummary
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+SUMMARY_FIELDS = (
+    "installments_count",
+    "installments_value",
+    "paid_count",
+    "paid_value",
+    "overdue_count",
+    "overdue_value",
+    "outstanding_count",
+    "outstanding_value",
+)
+
+
+def _sum(field, condition=None):
+    return Coalesce(
+        Sum(field, filter=condition, output_field=DecimalField()),
+        Value(Decimal("0"), output_field=DecimalField()),
+    )
+
+
+def compute_payment_summaries(payment_ids, today=None):
+    """
+    Retorna {payment_id: {campo: valor}} com uma única consulta agrupada
+    sobre as parcelas. Parcelas vencidas são as não pagas com vencimento
+    até `today`.
+    """
+    today = today or timezone.localdate()
+    unpaid = Q(installments__is_paid=False)
+    overdue = unpaid & Q(installments__due_date__lte=today)
+    rows = (
+        Payment.objects.filter(pk__in=payment_ids)
+        .order_by()
+        .values("pk", "sale_id")
+        .annotate(
+            installments_count=Count("installments"),
+            installments_value=_sum("installments__installment_value"),
+            paid_count=Count("installments", filter=Q(installments__is_paid=True)),
+            paid_value=_sum("installments__installment_value", Q(installments__is_paid=True)),
+            overdue_count=Count("installments", filter=overdue),
+            overdue_value=_sum("installments__installment_value", overdue),
+            outstanding_count=Count("installments", filter=unpaid),
+            outstanding_value=_sum("installments__installment_value", unpaid),
+            next_due_date=Min(
+                "installments__due_date",
+                filter=unpaid & Q(installments__due_date__gt=today),
+            ),
+        )
+    )
+    summaries = {}
+    for row in rows:
+        payment_id = row.pop("pk")
+        row["computed_on"] = today
+        summaries[payment_id] = row
+    return summaries
+
+
+def refresh_sale_summaries(sale_ids):
+    """
+    Recalcula os resumos das vendas somando os resumos dos seus pagamentos.
+    Vendas sem pagamentos perdem o resumo.
+    """
+    sale_ids = {pk for pk in sale_ids if pk}
+    if not sale_ids:
+        return 0
+
+    rows = (
+        Payment.objects.filter(sale_id__in=sale_ids)
+        .order_by()
+        .values("sale_id")
+        .annotate(
+            payments_count=Count("pk"),
+            payments_value=_sum("value"),
+            installments_count=Coalesce(Sum("summary__installments_count"), 0),
+            installments_value=_sum("summary__installments_value"),
+            paid_count=Coalesce(Sum("summary__paid_count"), 0),
+            paid_value=_sum("summary__paid_value"),
+            overdue_count=Coalesce(Sum("summary__overdue_count"), 0),
+            overdue_value=_sum("summary__overdue_value"),
+            outstanding_count=Coalesce(Sum("summary__outstanding_count"), 0),
+            outstanding_value=_sum("summary__outstanding_value"),
+        )
+    )
+    objs = [SalePaymentSummary(**row) for row in rows]
+    SalePaymentSummary.objects.filter(sale_id__in=sale_ids).exclude(
+        sale_id__in=[obj.sale_id for obj in objs]
+    ).delete()
+    SalePaymentSummary.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["sale"],
+        update_fields=["payments_count", "payments_value", *SUMMARY_FIELDS, "updated_at"],
+    )
+    return len(objs)
+
+
+def refresh_payment_summaries(payment_ids, sale_ids=(), today=None):
+    """
+    Recalcula e grava os resumos dos pagamentos informados e das vendas
+    afetadas, incluindo a venda anterior de um pagamento que mudou de venda.
+    """
+    payment_ids = {pk for pk in payment_ids if pk}
+    sale_ids = {pk for pk in sale_ids if pk}
+    if not payment_ids and not sale_ids:
+        return 0
+
+    with transaction.atomic():
+        summaries = compute_payment_summaries(payment_ids, today)
+        sale_ids.update(
+            PaymentSummary.objects.filter(payment_id__in=payment_ids).values_list(
+                "sale_id", flat=True
+            )
+        )
+        sale_ids.update(values["sale_id"] for values in summaries.values())
+        PaymentSummary.objects.bulk_create(
+            [
+                PaymentSummary(payment_id=payment_id, **values)
+                for payment_id, values in summaries.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["payment"],
+            update_fields=[
+                "sale",
+                *SUMMARY_FIELDS,
+                "next_due_date",
+                "computed_on",
+                "updated_at",
+            ],
+        )
+        refresh_sale_summaries(sale_ids)
+    return len(summaries)
+
+
+def refresh_overdue_summaries(today=None):
+    """
+    Recalcula apenas os resumos em que alguma parcela em aberto venceu
+    desde o último cálculo.
+    """
+    today = today or timezone.localdate()
+    payment_ids = list(
+        PaymentSummary.objects.filter(next_due_date__lte=today).values_list(
+            "payment_id", flat=True
+        )
+    )
+    total = 0
+    for start in range(0, len(payment_ids), DEFAULT_BATCH_SIZE):
+        total += refresh_payment_summaries(
+            payment_ids[start:start + DEFAULT_BATCH_SIZE], today=today
+        )
+    return total
+
+
+def rebuild_payment_summaries(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Reconstrói os resumos de todos os pagamentos em lotes de `batch_size`.
+    """
+    payment_ids = list(Payment.objects.order_by("pk").values_list("pk", flat=True))
+    total = 0
+    for start in range(0, len(payment_ids), batch_size):
+        total += refresh_payment_summaries(payment_ids[start:start + batch_size])
+        logger.info(f"[PaymentSummary] {total} pagamentos reconstruídos")
+    return total
+
+
+# Coalescência por transação
+
+def _transaction_state():
+    """
+    Pagamentos e vendas a recalcular na transação corrente. Se o callback de
+    on_commit registrado não está mais pendente, começa um estado novo.
+    """
+    connection = transaction.get_connection()
+    state = getattr(connection, "_payment_summary_state", None)
+    if state is not None and not state["done"] and any(
+        func is state["refresh"] for _, func, _ in connection.run_on_commit
+    ):
+        return state
+
+    def refresh():
+        state["done"] = True
+        refresh_payment_summaries(state["payments"], state["sales"])
+
+    state = {"payments": set(), "sales": set(), "done": False, "refresh": refresh}
+    connection._payment_summary_state = state
+    transaction.on_commit(state["refresh"])
+    return state
+
+
+def schedule_payment_summary_refresh(payment_ids=(), sale_ids=()):
+    """
+    Recalcula os resumos após o commit da transação corrente, uma única vez
+    por transação, para que a leitura veja os dados já gravados.
+    """
+    payment_ids = {pk for pk in payment_ids if pk}
+    sale_ids = {pk for pk in sale_ids if pk}
+    if not payment_ids and not sale_ids:
+        return
+
+    if not transaction.get_connection().in_atomic_block:
+        refresh_payment_summaries(payment_ids, sale_ids)
+        return
+
+    state = _transaction_state()
+    state["payments"].update(payment_ids)
+    state["sales"].update(sale_ids)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from financial.ledger import DEFAULT_BATCH_SIZE, rebuild_payment_summaries
+
+
+class Command(BaseCommand):
+    help = "Reconstrói os resumos PaymentSummary e SalePaymentSummary a partir das parcelas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Quantidade de pagamentos calculados e gravados por lote.",
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_payment_summaries(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Resumos reconstruídos para {total} pagamentos.")
+        )
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.9 on 2026-10-18 04:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resolve_crm', '0102_distance_to_matriz'),
+        ('financial', '0052_alter_financialrecord_audit_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalePaymentSummary',
+            fields=[
+                ('sale', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='payment_summary', serialize=False, to='resolve_crm.sale', verbose_name='Venda')),
+                ('payments_count', models.PositiveIntegerField(default=0, verbose_name='Pagamentos')),
+                ('payments_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor dos Pagamentos')),
+                ('installments_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas')),
+                ('installments_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor das Parcelas')),
+                ('paid_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas Pagas')),
+                ('paid_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor Pago')),
+                ('overdue_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas Vencidas')),
+                ('overdue_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor Vencido')),
+                ('outstanding_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas em Aberto')),
+                ('outstanding_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor em Aberto')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Resumo Financeiro da Venda',
+                'verbose_name_plural': 'Resumos Financeiros das Vendas',
+            },
+        ),
+        migrations.CreateModel(
+            name='PaymentSummary',
+            fields=[
+                ('payment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='financial.payment', verbose_name='Pagamento')),
+                ('installments_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas')),
+                ('installments_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor das Parcelas')),
+                ('paid_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas Pagas')),
+                ('paid_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor Pago')),
+                ('overdue_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas Vencidas')),
+                ('overdue_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor Vencido')),
+                ('outstanding_count', models.PositiveIntegerField(default=0, verbose_name='Parcelas em Aberto')),
+                ('outstanding_value', models.DecimalField(decimal_places=6, default=0, max_digits=20, verbose_name='Valor em Aberto')),
+                ('next_due_date', models.DateField(blank=True, null=True, verbose_name='Próximo Vencimento')),
+                ('computed_on', models.DateField(verbose_name='Calculado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('sale', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_summaries', to='resolve_crm.sale', verbose_name='Venda')),
+            ],
+            options={
+                'verbose_name': 'Resumo do Pagamento',
+                'verbose_name_plural': 'Resumos dos Pagamentos',
+                'indexes': [models.Index(fields=['next_due_date'], name='financial_p_next_du_ed0459_idx')],
+            },
+        ),
+    ]
@@ -103,13 +103,30 @@ class Payment(models.Model):
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     history = HistoricalRecords()
 
+    @cached_property
+    def payment_summary(self):
+        try:
+            return self.summary
+        except PaymentSummary.DoesNotExist:
+            return None
+
     @cached_property
     def is_paid(self):
+        summary = self.payment_summary
+        if summary is not None:
+            return summary.paid_count == summary.installments_count
         return all(installment.is_paid for installment in self.installments.all())
 
     @cached_property
     def total_paid(self):
-        return sum(inst.installment_value for inst in getattr(self, "paid_installments", []))
+        summary = self.payment_summary
+        if summary is not None:
+            return summary.paid_value
+        return sum(
+            installment.installment_value
+            for installment in self.installments.all()
+            if installment.is_paid
+        )
 
 
     @cached_property
@@ -175,6 +192,94 @@ class PaymentInstallment(models.Model):
         ordering = ["-payment__created_at", "installment_number"]
 
 
+class PaymentSummary(models.Model):
+    """
+    Totais pagos, vencidos e em aberto das parcelas de um pagamento,
+    mantidos pelos signals de financial e reconstruídos pelo comando
+    rebuild_payment_summaries.
+    """
+
+    payment = models.OneToOneField(
+        Payment,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="summary",
+        verbose_name="Pagamento",
+    )
+    sale = models.ForeignKey(
+        "resolve_crm.Sale",
+        on_delete=models.CASCADE,
+        related_name="payment_summaries",
+        verbose_name="Venda",
+    )
+    installments_count = models.PositiveIntegerField("Parcelas", default=0)
+    installments_value = models.DecimalField(
+        "Valor das Parcelas", max_digits=20, decimal_places=6, default=0
+    )
+    paid_count = models.PositiveIntegerField("Parcelas Pagas", default=0)
+    paid_value = models.DecimalField(
+        "Valor Pago", max_digits=20, decimal_places=6, default=0
+    )
+    overdue_count = models.PositiveIntegerField("Parcelas Vencidas", default=0)
+    overdue_value = models.DecimalField(
+        "Valor Vencido", max_digits=20, decimal_places=6, default=0
+    )
+    outstanding_count = models.PositiveIntegerField("Parcelas em Aberto", default=0)
+    outstanding_value = models.DecimalField(
+        "Valor em Aberto", max_digits=20, decimal_places=6, default=0
+    )
+    # Próximo vencimento em aberto: a partir dele o resumo precisa ser recalculado
+    next_due_date = models.DateField("Próximo Vencimento", null=True, blank=True)
+    computed_on = models.DateField("Calculado em")
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumo do Pagamento"
+        verbose_name_plural = "Resumos dos Pagamentos"
+        indexes = [
+            models.Index(fields=["next_due_date"]),
+        ]
+
+
+class SalePaymentSummary(models.Model):
+    """
+    Soma dos resumos dos pagamentos de uma venda.
+    """
+
+    sale = models.OneToOneField(
+        "resolve_crm.Sale",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="payment_summary",
+        verbose_name="Venda",
+    )
+    payments_count = models.PositiveIntegerField("Pagamentos", default=0)
+    payments_value = models.DecimalField(
+        "Valor dos Pagamentos", max_digits=20, decimal_places=6, default=0
+    )
+    installments_count = models.PositiveIntegerField("Parcelas", default=0)
+    installments_value = models.DecimalField(
+        "Valor das Parcelas", max_digits=20, decimal_places=6, default=0
+    )
+    paid_count = models.PositiveIntegerField("Parcelas Pagas", default=0)
+    paid_value = models.DecimalField(
+        "Valor Pago", max_digits=20, decimal_places=6, default=0
+    )
+    overdue_count = models.PositiveIntegerField("Parcelas Vencidas", default=0)
+    overdue_value = models.DecimalField(
+        "Valor Vencido", max_digits=20, decimal_places=6, default=0
+    )
+    outstanding_count = models.PositiveIntegerField("Parcelas em Aberto", default=0)
+    outstanding_value = models.DecimalField(
+        "Valor em Aberto", max_digits=20, decimal_places=6, default=0
+    )
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumo Financeiro da Venda"
+        verbose_name_plural = "Resumos Financeiros das Vendas"
+
+
 class FranchiseInstallmentQuerySet(QuerySet):
     def with_annotations(self):
         
@@ -1,8 +1,9 @@
 import logging
 import os
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from financial.models import FinancialRecord
+from financial.ledger import schedule_payment_summary_refresh
+from financial.models import FinancialRecord, Payment, PaymentInstallment
 from financial.views import OmieIntegrationView
 from resolve_crm.models import Sale
 from decimal import Decimal
@@ -218,3 +219,15 @@ def request_responsible_approval(sender, instance, created, **kwargs):
                     raise ValidationError(f"Erro ao solicitar aprovação: {e}")
             else:
                 raise ValidationError("Responsável não configurado para a solicitação de pagamento.")
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_summary_on_payment(sender, instance, **kwargs):
+    schedule_payment_summary_refresh([instance.pk], [instance.sale_id])
+
+
+@receiver(post_save, sender=PaymentInstallment)
+@receiver(post_delete, sender=PaymentInstallment)
+def refresh_summary_on_installment(sender, instance, **kwargs):
+    schedule_payment_summary_refresh([instance.payment_id])
@@ -1,5 +1,6 @@
 from celery import shared_task
 import os, requests, logging
+from financial.ledger import refresh_overdue_summaries
 from financial.models import FinancialRecord
 from financial.views import OmieIntegrationView
 from django.core.mail import EmailMessage
@@ -203,3 +204,10 @@ def notify_requester_on_audit_change_task(record_id):
             exc_info=True,
         )
         return {"status": "error", "message": f"Failed to send email: {e}"}
+
+
+@shared_task
+def refresh_overdue_payment_summaries():
+    updated = refresh_overdue_summaries()
+    logger.info(f"[PaymentSummary] {updated} resumos com parcelas vencidas recalculados")
+    return updated
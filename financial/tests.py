@@ -3,8 +3,11 @@ from rest_framework import status
 from accounts.models import Address, Branch, User
 from core.tests import BaseAPITestCase
 from resolve_crm.models import Sale
+from django.core.management import call_command
+from financial.ledger import refresh_overdue_summaries
 from financial.models import (
-    FinancialRecord, Financier, Payment, PaymentInstallment, FranchiseInstallment
+    FinancialRecord, Financier, Payment, PaymentInstallment, FranchiseInstallment,
+    PaymentSummary, SalePaymentSummary
 )
 from unittest.mock import patch
 from datetime import date, datetime, timedelta
@@ -159,6 +162,78 @@ class PaymentViewSetTestCase(BaseAPITestCase):
         self.assertFalse(Payment.objects.filter(id=self.payment.id).exists())
 
 
+class PaymentSummaryTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(username='customer_summary', password='123456', first_document='12345678911', email='customer_summary@example.com')
+        self.sale = Sale.objects.create(
+            customer=customer,
+            seller=customer,
+            sales_supervisor=customer,
+            sales_manager=customer,
+            total_value=900,
+            branch=Branch.objects.create(name='Filial Resumo', address=Address.objects.create(zip_code='12345-000', country='Brasil', state='SP', city='São Paulo', neighborhood='Centro', street='Rua Resumo', number='1')),
+        )
+        self.today = timezone.localdate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payment = Payment.objects.create(
+                borrower=customer, sale=self.sale, value=900, payment_type="B", due_date=self.today,
+            )
+            self.installments = [
+                PaymentInstallment.objects.create(payment=self.payment, installment_value=300, installment_number=1, due_date=self.today - timedelta(days=30), is_paid=True),
+                PaymentInstallment.objects.create(payment=self.payment, installment_value=300, installment_number=2, due_date=self.today - timedelta(days=1)),
+                PaymentInstallment.objects.create(payment=self.payment, installment_value=300, installment_number=3, due_date=self.today + timedelta(days=29)),
+            ]
+
+    def test_installment_writes_maintain_payment_and_sale_summaries(self):
+        summary = PaymentSummary.objects.get(payment=self.payment)
+        self.assertEqual((summary.installments_count, summary.paid_count, summary.overdue_count, summary.outstanding_count), (3, 1, 1, 2))
+        self.assertEqual((summary.paid_value, summary.overdue_value, summary.outstanding_value), (300, 300, 600))
+        self.assertEqual(summary.next_due_date, self.today + timedelta(days=29))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.installments[1].is_paid = True
+            self.installments[1].save()
+        sale_summary = SalePaymentSummary.objects.get(sale=self.sale)
+        self.assertEqual((sale_summary.paid_value, sale_summary.overdue_value), (600, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.payment.installments.all().delete()
+            self.payment.delete()
+        self.assertFalse(SalePaymentSummary.objects.filter(sale=self.sale).exists())
+
+    def test_writes_in_one_transaction_refresh_once(self):
+        with patch('financial.ledger.refresh_payment_summaries') as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                for installment in self.installments:
+                    installment.save()
+        refresh.assert_called_once_with({self.payment.id}, set())
+
+    def test_overdue_refresh_only_touches_crossed_due_dates(self):
+        self.assertEqual(refresh_overdue_summaries(self.today), 0)
+        later = self.today + timedelta(days=29)
+        self.assertEqual(refresh_overdue_summaries(later), 1)
+        summary = PaymentSummary.objects.get(payment=self.payment)
+        self.assertEqual((summary.overdue_count, summary.next_due_date), (2, None))
+        self.assertEqual(refresh_overdue_summaries(later), 0)
+
+    def test_endpoints_read_from_summaries(self):
+        PaymentInstallment.objects.filter(payment=self.payment).update(installment_value=0)
+        response = self.client.get(reverse('api:payment-indicators'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        installments = response.data['indicators']['installments']
+        self.assertEqual(installments['overdue_installments_count'], 1)
+        self.assertEqual(installments['on_time_installments_value'], 300)
+        self.assertEqual(response.data['indicators']['consistency']['inconsistent_payments'], 1)
+
+        response = self.client.get(reverse('api:sale-detail', args=[self.sale.id]), {'fields': 'id,total_paid'})
+        self.assertEqual(float(response.data['total_paid']), 300)
+
+        # O comando reconstrói a partir das parcelas
+        call_command('rebuild_payment_summaries', stdout=None)
+        self.assertEqual(SalePaymentSummary.objects.get(sale=self.sale).paid_value, 0)
+
+
 class PaymentInstallmentViewSetTestCase(BaseAPITestCase):
     def setUp(self):
         super().setUp()
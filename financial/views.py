@@ -9,11 +9,7 @@ from django.db.models import (
     Count,
     Q,
     Sum,
-    Prefetch,
     Value,
-    Case,
-    When,
-    BooleanField,
     F,
     DecimalField,
 )
@@ -27,12 +23,18 @@ from rest_framework.views import APIView
 from weasyprint import HTML
 from rest_framework.decorators import action
 from accounts.models import User
+from api.cache import (
+    get_cached,
+    get_permission_scope,
+    indicator_cache_key,
+    set_cached,
+)
+from api.querysets import lean_aggregate
 from api.views import BaseModelViewSet
 from core.models import Comment
+from .ledger import refresh_overdue_summaries
 from .models import *
 from .serializers import *
-from django.core.cache import cache
-from hashlib import md5
 from django.db.models.functions import Coalesce
 
 
@@ -61,7 +63,8 @@ class PaymentViewSet(BaseModelViewSet):
                 "sale",
                 "sale__customer",
                 "sale__branch",
-                'financier'
+                'financier',
+                "summary",
             )
             .prefetch_related(
                 "installments",
@@ -69,11 +72,6 @@ class PaymentViewSet(BaseModelViewSet):
                 "borrower__addresses",
                 "borrower__user_types",
                 "borrower__attachments",
-                Prefetch(
-                    "installments",
-                    queryset=PaymentInstallment.objects.filter(is_paid=True),
-                    to_attr="paid_installments"
-            )
             )
             .order_by("-created_at")
         )
@@ -118,8 +116,7 @@ class PaymentViewSet(BaseModelViewSet):
                 installment_number=i + 1,
             )
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+    def apply_list_filters(self, queryset, request):
         sale_status = request.query_params.get("sale_status", None)
         sale_customer = request.query_params.get("sale_customer", None)
         sale_payment_status = request.query_params.get("sale_payment_status", None)
@@ -167,6 +164,18 @@ class PaymentViewSet(BaseModelViewSet):
             sale_status_list = sale_status.split(",")
             queryset = queryset.filter(sale__status__in=sale_status_list)
 
+        return queryset
+
+    def get_export_queryset(self):
+        return self.apply_list_filters(
+            self.filter_queryset(self.get_queryset()), self.request
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.apply_list_filters(
+            self.filter_queryset(self.get_queryset()), request
+        )
+
         page = self.paginate_queryset(queryset)
         if page is not None:
             serialized_data = self.get_serializer(page, many=True).data
@@ -177,110 +186,56 @@ class PaymentViewSet(BaseModelViewSet):
 
     @action(detail=False, methods=["get"])
     def indicators(self, request, *args, **kwargs):
-        filter_params = request.GET.dict()
-        filter_hash = md5(str(filter_params).encode()).hexdigest()
-        cache_key = f"payments_indicators_{filter_hash}"
-
-        combined_indicators = cache.get(cache_key)
-        if combined_indicators:
+        cache_key = indicator_cache_key(
+            request,
+            "payments_indicators",
+            tags=("payment", "sale"),
+            scope=get_permission_scope(request.user, "financial.view_payment"),
+        )
+        combined_indicators = get_cached("payments_indicators", cache_key)
+        if combined_indicators is not None:
             return Response({"indicators": combined_indicators})
 
-        # Base queryset com os filtros aplicados
+        # Resumos com parcelas que venceram desde o último cálculo
+        refresh_overdue_summaries()
+
+        # Base queryset com os filtros aplicados, lido dos resumos por pagamento
         qs = self.filter_queryset(self.get_queryset())
 
-        installments_indicators = qs.aggregate(
-            overdue_installments_count=Count(
-                "installments",
-                filter=Q(
-                    installments__is_paid=False,
-                    installments__due_date__lte=timezone.now(),
-                ),
-            ),
-            overdue_installments_value=Coalesce(
-                Sum(
-                    "installments__installment_value",
-                    filter=Q(
-                        installments__is_paid=False,
-                        installments__due_date__lte=timezone.now(),
-                    ),
-                    output_field=DecimalField(),
-                ),
-                Value(0, output_field=DecimalField()),
-            ),
-            on_time_installments_count=Count(
-                "installments",
-                filter=Q(
-                    installments__is_paid=False,
-                    installments__due_date__gt=timezone.now(),
-                ),
-            ),
-            on_time_installments_value=Coalesce(
-                Sum(
-                    "installments__installment_value",
-                    filter=Q(
-                        installments__is_paid=False,
-                        installments__due_date__gt=timezone.now(),
-                    ),
-                    output_field=DecimalField(),
-                ),
-                Value(0, output_field=DecimalField()),
-            ),
-            paid_installments_count=Count(
-                "installments", filter=Q(installments__is_paid=True)
-            ),
-            paid_installments_value=Coalesce(
-                Sum(
-                    "installments__installment_value",
-                    filter=Q(installments__is_paid=True),
-                    output_field=DecimalField(),
-                ),
+        def total(field, condition=None):
+            return Coalesce(
+                Sum(field, filter=condition, output_field=DecimalField()),
                 Value(0, output_field=DecimalField()),
+            )
+
+        installments_indicators = lean_aggregate(
+            qs,
+            overdue_installments_count=Coalesce(Sum("summary__overdue_count"), 0),
+            overdue_installments_value=total("summary__overdue_value"),
+            on_time_installments_count=Coalesce(
+                Sum(F("summary__outstanding_count") - F("summary__overdue_count")), 0
             ),
-            total_installments=Count("installments"),
-            total_installments_value=Coalesce(
-                Sum("installments__installment_value", output_field=DecimalField()),
-                Value(0, output_field=DecimalField()),
+            on_time_installments_value=total(
+                F("summary__outstanding_value") - F("summary__overdue_value")
             ),
+            paid_installments_count=Coalesce(Sum("summary__paid_count"), 0),
+            paid_installments_value=total("summary__paid_value"),
+            total_installments=Coalesce(Sum("summary__installments_count"), 0),
+            total_installments_value=total("summary__installments_value"),
         )
 
-        qs_consistency = qs.annotate(
-            total_installments_value=Coalesce(
-                Sum("installments__installment_value", output_field=DecimalField()),
-                Value(0, output_field=DecimalField()),
-            ),
-            total_installments_count=Count("installments"),
-            paid_installments_count=Count(
-                "installments", filter=Q(installments__is_paid=True)
-            ),
-        ).annotate(
-            is_consistent=Case(
-                When(
-                    Q(total_installments_count=F("paid_installments_count"))
-                    & Q(value=F("total_installments_value")),
-                    then=Value(True),
-                ),
-                default=Value(False),
-                output_field=BooleanField(),
-            )
+        is_consistent = Q(
+            summary__paid_count=F("summary__installments_count"),
+            value=F("summary__installments_value"),
         )
-        consistency_indicators = qs_consistency.aggregate(
+        consistency_indicators = lean_aggregate(
+            qs,
             total_payments=Count("id"),
-            total_payments_value=Coalesce(
-                Sum("value", output_field=DecimalField()),
-                Value(0, output_field=DecimalField()),
-            ),
-            consistent_payments=Count("id", filter=Q(is_consistent=True)),
-            consistent_payments_value=Coalesce(
-                Sum("value", filter=Q(is_consistent=True), output_field=DecimalField()),
-                Value(0, output_field=DecimalField()),
-            ),
-            inconsistent_payments_value=Coalesce(
-                Sum(
-                    "value", filter=~Q(is_consistent=True), output_field=DecimalField()
-                ),
-                Value(0, output_field=DecimalField()),
-            ),
-            inconsistent_payments=Count("id", filter=~Q(is_consistent=True)),
+            total_payments_value=total("value"),
+            consistent_payments=Count("id", filter=is_consistent),
+            consistent_payments_value=total("value", is_consistent),
+            inconsistent_payments_value=total("value", ~is_consistent),
+            inconsistent_payments=Count("id", filter=~is_consistent),
         )
 
         # Combina os dois conjuntos de indicadores
@@ -289,7 +244,7 @@ class PaymentViewSet(BaseModelViewSet):
             "consistency": consistency_indicators,
         }
 
-        cache.set(cache_key, combined_indicators, 60)
+        set_cached(cache_key, combined_indicators)
         return Response({"indicators": combined_indicators})
 
 
@@ -424,12 +379,16 @@ class FinancialRecordViewSet(BaseModelViewSet):
 
     @action(detail=False, methods=["get"], url_path="financial-record-indicators")
     def financial_record_indicators(self, request, *args, **kwargs):
-        filter_params = request.GET.dict()
-        filter_hash = md5(str(filter_params).encode()).hexdigest()
-        cache_key = f"financial_record_indicators_{filter_hash}"
-
-        indicators = cache.get(cache_key)
-        if indicators:
+        cache_key = indicator_cache_key(
+            request,
+            "financial_record_indicators",
+            tags=("financial_record",),
+            scope=get_permission_scope(
+                request.user, "financial.view_all_payable_financial_records"
+            ),
+        )
+        indicators = get_cached("financial_record_indicators", cache_key)
+        if indicators is not None:
             return Response({"indicators": indicators})
 
         request.query_params._mutable = True
@@ -437,7 +396,8 @@ class FinancialRecordViewSet(BaseModelViewSet):
 
         queryset = self.filter_queryset(self.get_queryset())
 
-        indicators = queryset.aggregate(
+        indicators = lean_aggregate(
+            queryset,
             total_records=Count("id"),
             total_value=Coalesce(
                 Sum("value", output_field=DecimalField()),
@@ -456,7 +416,7 @@ class FinancialRecordViewSet(BaseModelViewSet):
             ),
         )
 
-        cache.set(cache_key, indicators, 60)
+        set_cached(cache_key, indicators)
         return Response({"indicators": indicators})
 
 
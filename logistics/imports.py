@@ -0,0 +1,191 @@
+import csv
+import io
+import os
+
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from simple_history.utils import bulk_create_with_history
+
+from .models import Materials, ProjectMaterials
+
+MATERIALS_IMPORT_HEADERS = ["material_class", "id_material", "amount"]
+MATERIALS_IMPORT_DELIMITER = ";"
+MATERIALS_BATCH_SIZE = 500
+
+# Mesmas regras do campo do modelo (e do ProjectMaterialsSerializer)
+_amount_field = serializers.DecimalField(max_digits=20, decimal_places=6)
+
+
+class MaterialsImportError(Exception):
+    """
+    Arquivo ou linhas inválidas. `errors` traz todas as linhas com problema,
+    cada uma como {"row": número da linha, "message": descrição}.
+    """
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.errors = errors or []
+
+
+# Leitura do arquivo
+
+def _iter_csv(file):
+    # Lê o upload em fluxo, sem decodificar o arquivo inteiro em memória
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.reader(stream, delimiter=MATERIALS_IMPORT_DELIMITER)
+    finally:
+        stream.detach()
+
+
+def _iter_xlsx(file):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def iter_material_rows(upload):
+    """
+    Linhas do arquivo enviado (CSV separado por ';' ou XLSX), com o número
+    da linha, sem o cabeçalho. Linhas vazias são ignoradas.
+    """
+    extension = os.path.splitext(upload.name or "")[1].lower()
+    upload.seek(0)
+    rows = _iter_xlsx(upload) if extension == ".xlsx" else _iter_csv(upload.file)
+
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise MaterialsImportError("Arquivo vazio.")
+        header = [str(value).strip() for value in header]
+        while header and not header[-1]:
+            header.pop()
+        if header != MATERIALS_IMPORT_HEADERS:
+            raise MaterialsImportError(
+                f"Invalid headers. Expected: {MATERIALS_IMPORT_HEADERS}, Got: {header}"
+            )
+
+        for line, row in enumerate(rows, start=2):
+            if not any(str(value).strip() for value in row):
+                continue
+            yield line, row
+    except UnicodeDecodeError:
+        raise MaterialsImportError("O arquivo CSV deve estar em UTF-8.")
+    except MaterialsImportError:
+        raise
+    except Exception as e:
+        raise MaterialsImportError(f"Não foi possível ler o arquivo: {e}")
+
+
+# Validação
+
+def _parse_material_id(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return None
+
+
+def _parse_amount(value):
+    if isinstance(value, str):
+        # Planilhas em pt-BR exportam a vírgula como separador decimal
+        value = value.strip().replace(",", ".")
+    elif isinstance(value, float):
+        value = str(value)
+    return _amount_field.to_internal_value(value)
+
+
+def parse_material_rows(rows):
+    """
+    Valida todas as linhas antes de gravar qualquer uma. Os materiais são
+    buscados numa única consulta. Retorna os dados prontos para gravação
+    ou levanta MaterialsImportError com todos os erros encontrados.
+    """
+    parsed, errors = [], []
+    for line, row in rows:
+        row = list(row)
+        while len(row) > len(MATERIALS_IMPORT_HEADERS) and not str(row[-1]).strip():
+            row.pop()
+        if len(row) != len(MATERIALS_IMPORT_HEADERS):
+            errors.append({
+                "row": line,
+                "message": f"Esperadas {len(MATERIALS_IMPORT_HEADERS)} colunas, encontradas {len(row)}.",
+            })
+            continue
+
+        material_class, id_material, amount = row
+        material_id = _parse_material_id(id_material)
+        if material_id is None:
+            errors.append({"row": line, "message": f"id_material inválido: {id_material}."})
+            continue
+        try:
+            amount = _parse_amount(amount)
+        except ValidationError as e:
+            errors.append({"row": line, "message": f"amount inválido: {e.detail[0]}"})
+            continue
+
+        parsed.append({
+            "row": line,
+            "material_id": material_id,
+            "amount": amount,
+            "material_class": "P" if str(material_class).strip() == "MAT.PADRAO" else "K",
+        })
+
+    materials = Materials.objects.in_bulk({item["material_id"] for item in parsed})
+    for item in parsed:
+        if item["material_id"] not in materials:
+            errors.append({
+                "row": item["row"],
+                "message": f"Material com id {item['material_id']} não encontrado.",
+            })
+
+    if errors:
+        errors.sort(key=lambda error: error["row"])
+        raise MaterialsImportError(
+            f"{len(errors)} linha(s) inválida(s). Nenhum material foi importado.", errors
+        )
+    return parsed
+
+
+# Gravação
+
+def save_project_materials(project, items, replace=False, user=None):
+    """
+    Grava os materiais do projeto numa única transação, com um bulk_create
+    (e o histórico correspondente). Com `replace=True` a lista atual do
+    projeto é substituída.
+    """
+    objects = [
+        ProjectMaterials(
+            project=project,
+            material_id=item["material_id"],
+            amount=item.get("amount", 1),
+            material_class=item.get("material_class"),
+            is_exit=item.get("is_exit", False),
+            serial_number=item.get("serial_number"),
+        )
+        for item in items
+    ]
+    with transaction.atomic():
+        if replace:
+            project.materials.clear()
+        return bulk_create_with_history(
+            objects, ProjectMaterials, batch_size=MATERIALS_BATCH_SIZE, default_user=user
+        )
+
+
+def import_project_materials(project, upload, user=None):
+    """
+    Importa a lista de materiais do arquivo para o projeto: tudo ou nada.
+    """
+    items = parse_material_rows(iter_material_rows(upload))
+    return save_project_materials(project, items, user=user)
@@ -5,7 +5,10 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
 from PIL import Image
 
+from django.contrib.contenttypes.models import ContentType
+
 from accounts.models import Address, Branch, User
+from core.models import Attachment, DocumentType
 from core.tests import BaseAPITestCase
 from mobile_app.models import Discount
 from resolve_crm.models import Sale, Project
@@ -200,3 +203,33 @@ class AttachDocumentViewTestCase(BaseAPITestCase):
         }
         response = self.client.post(self.url, data, format='multipart')
         self.assertIn(response.status_code, [status.HTTP_201_CREATED, status.HTTP_400_BAD_REQUEST])
+
+
+class DocumentationViewTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(username='cust_docs', password='123456', first_document='15151515151', email='cust_docs@example.com')
+        sale = Sale.objects.create(
+            customer=customer,
+            seller=customer,
+            sales_supervisor=customer,
+            sales_manager=customer,
+            branch=Branch.objects.create(name='Filial Docs', address=Address.objects.create(zip_code='00000000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua D', number='40')),
+            total_value=1000.000,
+        )
+        self.project = Project.objects.create(sale=sale, status='P')
+        self.contract = DocumentType.objects.create(name='Contrato', app_label='contracts', required=True)
+        self.bill = DocumentType.objects.create(name='Conta de Energia', app_label='contracts', required=True)
+        Attachment.objects.create(
+            content_type=ContentType.objects.get_for_model(Project), object_id=self.project.id,
+            file='contrato.pdf', status='A', document_type=self.contract,
+        )
+        self.url = reverse('mobile_app:documentation', args=[self.project.id])
+
+    def test_documentation_lists_missing_and_approved(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['missing_documents'], [{'id': self.bill.id, 'name': 'Conta de Energia'}])
+        self.assertEqual(response.data['approved_documents'], [{'id': self.contract.id, 'name': 'Contrato'}])
+        self.assertEqual(response.data['completeness'], 50.0)
+        self.assertEqual(len(response.data['attachments']), 1)
@@ -1,5 +1,6 @@
 import logging
 import os
+from decimal import Decimal
 
 import requests
 from django.utils import timezone
@@ -160,8 +161,10 @@ class DocumentationView(APIView):
                 'message': 'Projeto não encontrado.'
             }, status=status.HTTP_404_NOT_FOUND)
 
+        # Faltantes e aprovados calculados em uma única consulta agrupada
+        completeness = project.document_completeness_info
         missing_documents = project.missing_documents
-        attached_documents = project.attachments.all()
+        attached_documents = project.attachments.select_related('document_type', 'document_subtype')
         
         attachments_data = AttachmentSerializer(attached_documents, many=True).data
 
@@ -177,6 +180,8 @@ class DocumentationView(APIView):
 
         data = {
             'missing_documents': missing_documents,
+            'approved_documents': completeness.approved,
+            'completeness': completeness.percentage,
             'attachments': attachments_data,
             'is_completed': project.is_documentation_completed
         }
@@ -204,19 +209,24 @@ class FinancialView(APIView):
 
     def get(self, request, sale_id):
         try:
-            sale = Sale.objects.get(id=sale_id)
+            sale = Sale.objects.select_related('payment_summary').get(id=sale_id)
         except Sale.DoesNotExist:
             return Response({
                 'message': 'Venda não encontrada.'
             }, status=status.HTTP_404_NOT_FOUND)
-        
-        percentual_paid = (sale.total_paid * 100 / sale.total_value) if sale.total_value != 0 else 0
+
+        # Totais lidos do resumo mantido pelos signals de financial
+        summary = getattr(sale, 'payment_summary', None)
+        total_paid = summary.paid_value if summary else Decimal('0')
+        percentual_paid = (total_paid * 100 / sale.total_value) if sale.total_value != 0 else 0
 
         data = {
-            'total_paid': sale.total_paid,
+            'total_paid': total_paid,
             'percentual_paid': percentual_paid,
+            'overdue_value': summary.overdue_value if summary else Decimal('0'),
+            'outstanding_value': summary.outstanding_value if summary else Decimal('0'),
             'payment_status': sale.payment_status,
-            'is_paid': sale.total_paid == sale.total_value,
+            'is_paid': total_paid == sale.total_value,
             'is_completed': sale.payment_status != 'PENDENTE'
         }
 
@@ -0,0 +1,136 @@
+import hashlib
+import logging
+import threading
+from uuid import uuid4
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+from weasyprint import CSS
+
+from core.pdf import get_font_config, render_pdf
+
+logger = logging.getLogger(__name__)
+
+
+CONTRACT_BASE_TEMPLATE = "contract_base.html"
+CONTRACT_STYLESHEET = "contract_base.css"
+CONTRACT_STORAGE_PREFIX = "contracts/generated"
+# Modelos compilados mantidos por processo; acima disso o cache é refeito
+COMPILED_TEMPLATES_MAX = 64
+
+PLACEHOLDER_OPEN = "{{"
+PLACEHOLDER_CLOSE = "}}"
+
+# (template_id, hash do conteúdo) -> segmentos compilados
+_compiled_templates = {}
+_pdf_resources = None
+_pdf_resources_lock = threading.Lock()
+
+
+# Modelos de contrato
+
+def compile_contract(content):
+    """
+    Divide o conteúdo do modelo em segmentos: texto literal e o texto
+    original de cada placeholder `{{ nome }}` com o nome normalizado.
+    Renderizar passa a ser uma junção de strings, sem uma expressão
+    regular por variável.
+    """
+    segments = []
+    position = 0
+    while True:
+        start = content.find(PLACEHOLDER_OPEN, position)
+        if start == -1:
+            break
+        end = content.find(PLACEHOLDER_CLOSE, start + len(PLACEHOLDER_OPEN))
+        if end == -1:
+            break
+        end += len(PLACEHOLDER_CLOSE)
+        name = content[start + len(PLACEHOLDER_OPEN):end - len(PLACEHOLDER_CLOSE)].strip()
+        if not name or PLACEHOLDER_OPEN in name:
+            # Chaves abertas sem um placeholder válido seguem como texto
+            segments.append(content[position:start + 1])
+            position = start + 1
+            continue
+        segments.append(content[position:start])
+        segments.append((name, content[start:end]))
+        position = end
+    segments.append(content[position:])
+    return tuple(segment for segment in segments if segment)
+
+
+def _content_version(content):
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def get_compiled_contract(template):
+    """
+    Segmentos do ContractTemplate compilados uma vez por processo. O
+    modelo não tem versão própria: o hash do conteúdo faz esse papel, e
+    editar o modelo gera uma nova chave.
+    """
+    key = (template.pk, _content_version(template.content))
+    segments = _compiled_templates.get(key)
+    if segments is None:
+        if len(_compiled_templates) >= COMPILED_TEMPLATES_MAX:
+            _compiled_templates.clear()
+        segments = compile_contract(template.content)
+        _compiled_templates[key] = segments
+    return segments
+
+
+def render_contract(template, variables):
+    """
+    Substitui os placeholders do modelo pelos valores de `variables`.
+    Placeholders sem valor permanecem no texto, como antes.
+    """
+    parts = []
+    for segment in get_compiled_contract(template):
+        if isinstance(segment, str):
+            parts.append(segment)
+            continue
+        name, original = segment
+        parts.append(str(variables[name]) if name in variables else original)
+    return "".join(parts)
+
+
+# PDF
+
+def get_pdf_resources():
+    """
+    Configuração de fontes e folha de estilos do contrato, carregadas uma
+    única vez por processo (no worker, ao iniciar; na API, na primeira
+    geração).
+    """
+    global _pdf_resources
+    if _pdf_resources is None:
+        with _pdf_resources_lock:
+            if _pdf_resources is None:
+                font_config = get_font_config()
+                stylesheet = CSS(
+                    string=render_to_string(CONTRACT_STYLESHEET),
+                    font_config=font_config,
+                )
+                _pdf_resources = (font_config, [stylesheet])
+    return _pdf_resources
+
+
+def render_contract_pdf(content):
+    _, stylesheets = get_pdf_resources()
+    rendered_html = render_to_string(CONTRACT_BASE_TEMPLATE, {"content": content})
+    return render_pdf(rendered_html, stylesheets=stylesheets)
+
+
+def store_contract_pdf(sale_id, pdf):
+    """
+    Grava o PDF no storage padrão e retorna a chave, que é o que trafega
+    pelo broker até a task do Clicksign.
+    """
+    name = f"{CONTRACT_STORAGE_PREFIX}/sale_{sale_id}/{uuid4().hex}.pdf"
+    return default_storage.save(name, ContentFile(pdf))
+
+
+def read_contract_pdf(key):
+    with default_storage.open(key, "rb") as file:
+        return file.read()
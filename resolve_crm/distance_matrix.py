@@ -0,0 +1,87 @@
+import logging
+import math
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+# Limite de destinos por requisição da Distance Matrix API
+MAX_DESTINATIONS = 25
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    dlat = math.radians(lat2 - lat1)
+    dlon = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dlat / 2) ** 2
+        + math.cos(math.radians(lat1))
+        * math.cos(math.radians(lat2))
+        * math.sin(dlon / 2) ** 2
+    )
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+class GoogleDistanceMatrixClient:
+    """
+    Cliente da Distance Matrix API que agrupa até 25 destinos por chamada,
+    reaproveitando a conexão entre os lotes.
+    """
+
+    url = "https://maps.googleapis.com/maps/api/distancematrix/json"
+    timeout = 10
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key or settings.GMAPS_API_KEY
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(max_retries=2))
+
+    def route_distances(self, origin, destinations):
+        """
+        Distâncias de rota em km de `origin` para cada destino, na mesma ordem.
+        Destinos sem rota ou com erro na API retornam None.
+        """
+        distances = []
+        for start in range(0, len(destinations), MAX_DESTINATIONS):
+            chunk = destinations[start:start + MAX_DESTINATIONS]
+            distances.extend(self._request(origin, chunk))
+        return distances
+
+    def _request(self, origin, destinations):
+        params = {
+            "origins": f"{origin[0]},{origin[1]}",
+            "destinations": "|".join(f"{lat},{lon}" for lat, lon in destinations),
+            "mode": "driving",
+            "key": self.api_key,
+        }
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            elements = response.json()["rows"][0]["elements"]
+        except Exception as e:
+            logger.error(f"Erro chamando Google API: {e}")
+            return [None] * len(destinations)
+
+        return [
+            element["distance"]["value"] / 1000.0 if element.get("status") == "OK" else None
+            for element in elements
+        ]
+
+
+class HaversineDistanceMatrixClient:
+    """
+    Substituto local, sem rede: distância linear. Usado nos testes e em
+    ambientes sem chave da API.
+    """
+
+    def route_distances(self, origin, destinations):
+        return [haversine_km(*origin, *destination) for destination in destinations]
+
+
+def get_distance_matrix_client():
+    return import_string(settings.DISTANCE_MATRIX_CLIENT)()
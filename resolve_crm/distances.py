@@ -0,0 +1,235 @@
+import logging
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import Branch
+from engineering.models import Units
+
+from .distance_matrix import EARTH_RADIUS_KM, get_distance_matrix_client, haversine_km
+from .models import Project, RouteDistance
+
+logger = logging.getLogger(__name__)
+
+
+# Acima desta distância de rota a entrega é direta, abaixo passa pelo CD
+DIRECT_DELIVERY_MIN_KM = 200
+
+# 4 casas decimais ≈ 11 m: coordenadas equivalentes compartilham o cache
+COORDINATE_PRECISION = Decimal("0.0001")
+
+DEFAULT_BATCH_SIZE = 2000
+
+
+def get_matriz_address():
+    matriz = (
+        Branch.objects.select_related("address")
+        .filter(name__icontains="Matriz")
+        .first()
+    )
+    return matriz.address if matriz else None
+
+
+def coordinates(address):
+    """
+    (latitude, longitude) como float, ou None se faltar alguma coordenada.
+    """
+    if not address:
+        return None
+    try:
+        return float(address.latitude), float(address.longitude)
+    except (TypeError, ValueError):
+        return None
+
+
+def address_distance_km(origin, destination):
+    """
+    Distância linear (Haversine) em km entre dois endereços, ou None se
+    faltar algum endereço ou coordenada.
+    """
+    origin, destination = coordinates(origin), coordinates(destination)
+    if not (origin and destination):
+        return None
+    return round(haversine_km(*origin, *destination), 2)
+
+
+def _round(value):
+    return Decimal(str(value)).quantize(COORDINATE_PRECISION, rounding=ROUND_HALF_UP)
+
+
+def route_key(origin, destination):
+    return (_round(origin[0]), _round(origin[1]), _round(destination[0]), _round(destination[1]))
+
+
+def route_distances(origin, destinations):
+    """
+    Distâncias de rota em km da origem para cada destino. Pares já
+    conhecidos vêm do RouteDistance; os demais são consultados em lotes no
+    cliente de distance matrix. Sem rota, cai na distância linear, que não
+    é gravada no cache.
+    """
+    keys = [route_key(origin, destination) for destination in destinations]
+    unique_keys = set(keys)
+
+    condition = Q()
+    for o_lat, o_lon, d_lat, d_lon in unique_keys:
+        condition |= Q(
+            origin_latitude=o_lat,
+            origin_longitude=o_lon,
+            destination_latitude=d_lat,
+            destination_longitude=d_lon,
+        )
+    cached = {}
+    if unique_keys:
+        for route in RouteDistance.objects.filter(condition):
+            cached[
+                (
+                    route.origin_latitude,
+                    route.origin_longitude,
+                    route.destination_latitude,
+                    route.destination_longitude,
+                )
+            ] = route.distance_km
+
+    missing = [key for key in dict.fromkeys(keys) if key not in cached]
+    if missing:
+        rounded_origin = (float(missing[0][0]), float(missing[0][1]))
+        results = get_distance_matrix_client().route_distances(
+            rounded_origin, [(float(key[2]), float(key[3])) for key in missing]
+        )
+        new_routes = []
+        for key, distance in zip(missing, results):
+            if distance is None:
+                continue
+            cached[key] = distance
+            new_routes.append(
+                RouteDistance(
+                    origin_latitude=key[0],
+                    origin_longitude=key[1],
+                    destination_latitude=key[2],
+                    destination_longitude=key[3],
+                    distance_km=distance,
+                )
+            )
+        RouteDistance.objects.bulk_create(new_routes, ignore_conflicts=True)
+        logger.info(
+            f"[Distâncias] {len(missing)} rotas consultadas, {len(new_routes)} gravadas no cache"
+        )
+
+    return [
+        cached.get(key, haversine_km(*origin, *destination))
+        for key, destination in zip(keys, destinations)
+    ]
+
+
+def delivery_type_for(distance_km):
+    return "D" if distance_km > DIRECT_DELIVERY_MIN_KM else "C"
+
+
+def main_unit_coordinates(project_ids=None):
+    """
+    {project_id: (lat, lon)} do endereço da unidade geradora, com a mesma
+    unidade escolhida por Project.address (ordenação por nome).
+    """
+    units = Units.objects.filter(
+        main_unit=True,
+        project__isnull=False,
+        address__latitude__isnull=False,
+        address__longitude__isnull=False,
+    )
+    if project_ids is not None:
+        units = units.filter(project_id__in=project_ids)
+
+    result = {}
+    for project_id, lat, lon in units.order_by("project_id", "name", "id").values_list(
+        "project_id", "address__latitude", "address__longitude"
+    ):
+        result.setdefault(project_id, (float(lat), float(lon)))
+    return result
+
+
+def vectorized_haversine_km(origin, latitudes, longitudes):
+    lat1, lon1 = np.radians(origin[0]), np.radians(origin[1])
+    lat2, lon2 = np.radians(latitudes), np.radians(longitudes)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return np.round(EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a)), 2)
+
+
+def recompute_matriz_distances(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Recalcula distance_to_matriz_km de todos os projetos de uma vez, com a
+    Haversine vetorizada em NumPy. Projetos sem coordenadas ficam nulos.
+    Retorna a quantidade de projetos com distância calculada.
+    """
+    origin = coordinates(get_matriz_address())
+    points = main_unit_coordinates() if origin else {}
+
+    project_ids = np.fromiter(points.keys(), dtype=np.int64, count=len(points))
+    coords = np.array(list(points.values()), dtype=float).reshape(-1, 2)
+    distances = (
+        vectorized_haversine_km(origin, coords[:, 0], coords[:, 1])
+        if len(coords)
+        else np.array([])
+    )
+
+    with transaction.atomic():
+        Project.objects.exclude(pk__in=project_ids.tolist()).exclude(
+            distance_to_matriz_km=None
+        ).update(distance_to_matriz_km=None)
+        for start in range(0, len(project_ids), batch_size):
+            objs = [
+                Project(pk=int(pk), distance_to_matriz_km=float(distance))
+                for pk, distance in zip(
+                    project_ids[start:start + batch_size],
+                    distances[start:start + batch_size],
+                )
+            ]
+            Project.objects.bulk_update(objs, ["distance_to_matriz_km"])
+
+    logger.info(f"[Distâncias] distance_to_matriz_km recalculado para {len(project_ids)} projetos")
+    return len(project_ids)
+
+
+def refresh_delivery_types(project_ids=None):
+    """
+    Recalcula distance_to_matriz_km e delivery_type dos projetos usando o
+    cache de rotas; destinos novos são consultados em lotes de 25.
+    Retorna {project_id: (distância de rota, delivery_type)}.
+    """
+    origin = coordinates(get_matriz_address())
+    if not origin:
+        logger.warning("[Distâncias] Matriz sem endereço ou coordenadas")
+        return {}
+
+    points = main_unit_coordinates(project_ids)
+    if not points:
+        return {}
+
+    ids = list(points)
+    routes = route_distances(origin, [points[pk] for pk in ids])
+    linear = vectorized_haversine_km(
+        origin,
+        np.array([points[pk][0] for pk in ids]),
+        np.array([points[pk][1] for pk in ids]),
+    )
+
+    current = {
+        pk: (distance, delivery_type)
+        for pk, distance, delivery_type in Project.objects.filter(pk__in=ids).values_list(
+            "pk", "distance_to_matriz_km", "delivery_type"
+        )
+    }
+    results = {}
+    for pk, route_km, linear_km in zip(ids, routes, linear):
+        delivery_type = delivery_type_for(route_km)
+        results[pk] = (round(route_km, 2), delivery_type)
+        if current.get(pk) != (float(linear_km), delivery_type):
+            Project.objects.filter(pk=pk).update(
+                distance_to_matriz_km=float(linear_km), delivery_type=delivery_type
+            )
+    return results
@@ -0,0 +1,159 @@
+import logging
+
+from django.db import transaction
+
+from .models import Project, ProjectJourneyState
+
+logger = logging.getLogger(__name__)
+
+
+JOURNEY_STATE_FIELDS = (
+    "current_step",
+    "is_released_to_engineering",
+    "purchase_status",
+    "delivery_status",
+    "is_released_to_installation",
+    "installation_status",
+    "final_inspection_status",
+)
+
+# Métricas do ProjectViewSet que podem ser servidas pela tabela
+# desnormalizada, com os campos que cada anotação "ao vivo" expõe.
+MATERIALIZED_METRICS = {
+    "current_step": ("current_step",),
+    "is_released_to_engineering": ("is_released_to_engineering",),
+    "purchase_status": (
+        "is_released_to_engineering",
+        "purchase_status",
+        "delivery_status",
+    ),
+    "delivery_status": (
+        "is_released_to_engineering",
+        "purchase_status",
+        "delivery_status",
+    ),
+    "is_released_to_installation": (
+        "is_released_to_engineering",
+        "purchase_status",
+        "delivery_status",
+        "is_released_to_installation",
+    ),
+    "installation_status": (
+        "is_released_to_engineering",
+        "purchase_status",
+        "delivery_status",
+        "is_released_to_installation",
+        "installation_status",
+    ),
+    "final_inspection_status": (
+        "is_released_to_engineering",
+        "final_inspection_status",
+    ),
+}
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def compute_journey_states(queryset):
+    """
+    Retorna {project_id: {campo: valor}} calculado com as anotações ao vivo
+    do ProjectQuerySet. Projetos com mais de uma compra geram linhas
+    duplicadas no JOIN; mantemos a primeira, como faria a listagem.
+    """
+    rows = (
+        queryset.with_live_journey_state()
+        .order_by()
+        .values("pk", *JOURNEY_STATE_FIELDS)
+    )
+    states = {}
+    for row in rows:
+        states.setdefault(row.pop("pk"), row)
+    return states
+
+
+def _save_states(states):
+    objs = [
+        ProjectJourneyState(project_id=project_id, **values)
+        for project_id, values in states.items()
+    ]
+    ProjectJourneyState.objects.bulk_create(
+        objs,
+        update_conflicts=True,
+        unique_fields=["project"],
+        update_fields=[*JOURNEY_STATE_FIELDS, "updated_at"],
+    )
+    return len(objs)
+
+
+def refresh_journey_states(project_ids):
+    """
+    Recalcula e grava o estado de jornada dos projetos informados.
+    """
+    project_ids = {pk for pk in project_ids if pk}
+    if not project_ids:
+        return 0
+
+    states = compute_journey_states(Project.objects.filter(pk__in=project_ids))
+    with transaction.atomic():
+        return _save_states(states)
+
+
+def _iter_project_id_batches(batch_size):
+    project_ids = list(
+        Project.objects.order_by("pk").values_list("pk", flat=True)
+    )
+    for start in range(0, len(project_ids), batch_size):
+        yield project_ids[start:start + batch_size]
+
+
+def rebuild_journey_states(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Reconstrói a tabela inteira em lotes de `batch_size` projetos.
+    """
+    total = 0
+    for batch in _iter_project_id_batches(batch_size):
+        total += refresh_journey_states(batch)
+        logger.info(f"[JourneyState] {total} projetos reconstruídos")
+    return total
+
+
+def diff_journey_states(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Compara a tabela desnormalizada com as anotações ao vivo e retorna uma
+    lista de divergências (project_id, campo, valor_gravado, valor_ao_vivo).
+    Projetos sem linha na tabela aparecem com valor_gravado None.
+    """
+    differences = []
+    for batch in _iter_project_id_batches(batch_size):
+        live = compute_journey_states(Project.objects.filter(pk__in=batch))
+        stored = {
+            row.pop("project_id"): row
+            for row in ProjectJourneyState.objects.filter(
+                project_id__in=batch
+            ).values("project_id", *JOURNEY_STATE_FIELDS)
+        }
+        for project_id, live_values in live.items():
+            stored_values = stored.get(project_id)
+            for field in JOURNEY_STATE_FIELDS:
+                stored_value = stored_values[field] if stored_values else None
+                if stored_values is None or stored_value != live_values[field]:
+                    differences.append(
+                        (project_id, field, stored_value, live_values[field])
+                    )
+    return differences
+
+
+def schedule_journey_state_refresh(project_ids):
+    """
+    Enfileira o recálculo após o commit da transação corrente, para que a
+    task leia os dados já gravados.
+    """
+    from .task import refresh_project_journey_states
+
+    project_ids = sorted({pk for pk in project_ids if pk})
+    if not project_ids:
+        return
+
+    transaction.on_commit(
+        lambda: refresh_project_journey_states.delay(project_ids)
+    )
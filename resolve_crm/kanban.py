@@ -0,0 +1,217 @@
+import base64
+import math
+
+from django.conf import settings
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    F,
+    IntegerField,
+    Q,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+
+from .models import Project
+from .search import search_by_text
+
+
+KANBAN_COLUMNS = {
+    "vistoria": "Vistoria",
+    "documentacao": "Documentação",
+    "financeiro": "Financeiro",
+    "projeto_engenharia": "Projeto de Engenharia",
+    "lista_materiais": "Lista de Materiais",
+    "logistica": "Logística",
+    "instalacao": "Instalação",
+    "vistoria_final": "Vistoria Final",
+    "homologado": "Homologado",
+}
+
+DEFAULT_PER_PAGE = 10
+
+KANBAN_FIELDS = (
+    "id",
+    "project_number",
+    "current_step",
+    "customer_name",
+    "sale",
+    "contract_number",
+    "signature_date",
+)
+
+KANBAN_ORDERING = (F("created_at").desc(), F("id").desc())
+
+
+def kanban_queryset(search_query=None):
+    """
+    Projetos anotados com a etapa atual e os campos exibidos nos cards.
+    Com USE_PROJECT_JOURNEY_STATE a etapa vem da tabela desnormalizada.
+    """
+    if settings.USE_PROJECT_JOURNEY_STATE:
+        queryset = Project.objects.with_journey_state(["current_step"])
+    else:
+        queryset = Project.objects.with_current_step()
+
+    queryset = queryset.annotate(
+        customer_name=Case(
+            When(
+                sale__customer__complete_name__isnull=False,
+                then=F("sale__customer__complete_name"),
+            ),
+            default=Value(""),
+            output_field=CharField(),
+        ),
+        contract_number=Case(
+            When(
+                sale__contract_number__isnull=False,
+                then=F("sale__contract_number"),
+            ),
+            default=Value(""),
+            output_field=CharField(),
+        ),
+        signature_date=Case(
+            When(
+                sale__signature_date__isnull=False,
+                then=F("sale__signature_date"),
+            ),
+            default=Value(""),
+            output_field=CharField(),
+        ),
+    )
+
+    if search_query:
+        queryset = search_by_text(queryset, search_query)
+
+    return queryset
+
+
+def column_counts(queryset):
+    """
+    Conta os projetos de todas as colunas em um único GROUP BY current_step.
+    """
+    rows = (
+        queryset.order_by()
+        .values("current_step")
+        .annotate(total=Count("id"))
+        .values_list("current_step", "total")
+    )
+    counts = dict(rows)
+    return {key: counts.get(label, 0) for key, label in KANBAN_COLUMNS.items()}
+
+
+def fetch_pages(queryset, pages, per_page=DEFAULT_PER_PAGE):
+    """
+    Busca a página pedida de cada coluna em uma única query, numerando os
+    projetos com ROW_NUMBER() OVER (PARTITION BY current_step).
+
+    `pages` mapeia a chave da coluna para o número da página (1-based).
+    """
+    offsets = {
+        KANBAN_COLUMNS[key]: (page - 1) * per_page for key, page in pages.items()
+    }
+    rows = (
+        queryset.filter(current_step__in=offsets.keys())
+        .annotate(
+            row_number=Window(
+                RowNumber(),
+                partition_by=F("current_step"),
+                order_by=KANBAN_ORDERING,
+            ),
+            page_offset=Case(
+                *[
+                    When(current_step=label, then=Value(offset))
+                    for label, offset in offsets.items()
+                ],
+                output_field=IntegerField(),
+            ),
+        )
+        .filter(
+            row_number__gt=F("page_offset"),
+            row_number__lte=F("page_offset") + per_page,
+        )
+        .order_by("current_step", "row_number")
+        .values(*KANBAN_FIELDS)
+    )
+
+    projects = {label: [] for label in offsets}
+    for row in rows:
+        projects[row["current_step"]].append(row)
+    return projects
+
+
+def build_board(queryset, requested_pages, per_page=DEFAULT_PER_PAGE):
+    """
+    Monta o quadro completo com duas queries: contagem e páginas.
+    Páginas fora do intervalo voltam para a primeira, como no Paginator.
+    """
+    counts = column_counts(queryset)
+
+    pages = {}
+    for key in KANBAN_COLUMNS:
+        total_pages = max(1, math.ceil(counts[key] / per_page))
+        page = requested_pages.get(key, 1)
+        pages[key] = page if 1 <= page <= total_pages else 1
+
+    projects = fetch_pages(queryset, pages, per_page)
+
+    return {
+        key: {
+            "count": counts[key],
+            "total_pages": max(1, math.ceil(counts[key] / per_page)),
+            "current_page": pages[key],
+            "projects": projects[label],
+        }
+        for key, label in KANBAN_COLUMNS.items()
+    }
+
+
+def encode_cursor(row):
+    value = f"{row['created_at'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Retorna (created_at, id) ou None se o cursor for inválido.
+    """
+    try:
+        created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, pk
+
+
+def fetch_column_after(queryset, column, cursor=None, limit=DEFAULT_PER_PAGE):
+    """
+    Modo cursor para rolagem infinita dentro de uma coluna: busca `limit`
+    projetos depois do cursor (keyset em created_at, id), sem OFFSET.
+    """
+    queryset = queryset.filter(current_step=KANBAN_COLUMNS[column])
+
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_at, pk = position
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+        )
+
+    rows = list(
+        queryset.order_by(*KANBAN_ORDERING).values(*KANBAN_FIELDS, "created_at")[
+            : limit + 1
+        ]
+    )
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    rows = rows[:limit]
+    for row in rows:
+        row.pop("created_at", None)
+
+    return {"projects": rows, "next_cursor": next_cursor}
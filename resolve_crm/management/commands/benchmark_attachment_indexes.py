@@ -0,0 +1,241 @@
+import time
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import Address, Branch, User
+from core.models import Attachment, DocumentType
+from engineering.models import Units
+from field_services.models import Category, Forms, Schedule, Service, ServiceOpinion
+from resolve_crm.models import Project, Sale
+
+BENCHMARK_INDEXES = ("attachment_object_status_idx", "attachment_object_type_idx")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede a anotação is_released_to_engineering sobre uma massa sintética "
+        "de anexos, com e sem os índices compostos de Attachment. A massa é "
+        "removida ao final. No MySQL, remover e recriar índices confirma a "
+        "transação corrente, por isso os dados são apagados explicitamente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--attachments",
+            type=int,
+            default=1_000_000,
+            help="Quantidade de anexos sintéticos.",
+        )
+        parser.add_argument(
+            "--sales",
+            type=int,
+            default=20000,
+            help="Quantidade de vendas (e projetos) sintéticas.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Tamanho dos lotes de bulk_create.",
+        )
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=500,
+            help=(
+                "Projetos avaliados em cada medição. Sem os índices cada "
+                "subquery percorre os anexos do tipo de conteúdo inteiro."
+            ),
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="Execuções por cenário; vale o menor tempo.",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        user = self._create_fixture(
+            options["sales"], options["attachments"], options["batch_size"]
+        )
+        try:
+            sample_ids = list(
+                Project.objects.filter(sale__customer=user)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["sample"]]
+            )
+            queryset = Project.objects.filter(id__in=sample_ids).with_is_released_to_engineering()
+            self._explain(queryset)
+
+            indexed, indexed_stats = self._measure(queryset, options["repeat"])
+            self._drop_indexes()
+            try:
+                plain, plain_stats = self._measure(queryset, options["repeat"])
+            finally:
+                self._create_indexes()
+        finally:
+            self._delete_fixture(user)
+
+        self._report("Sem índices compostos", plain_stats)
+        self._report("Com índices compostos", indexed_stats)
+
+        if indexed != plain:
+            self.stderr.write(self.style.ERROR("Resultados divergentes entre os cenários."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Resultados idênticos ({indexed} projetos liberados)."))
+
+    def _create_fixture(self, total_sales, total_attachments, batch_size):
+        user = User.objects.create_user(
+            username="benchmark_attachments",
+            password="benchmark",
+            first_document="00000000001",
+            email="benchmark_attachments@example.com",
+        )
+        address = Address.objects.create(
+            zip_code="00000000",
+            country="Brazil",
+            state="PA",
+            city="Belém",
+            neighborhood="Centro",
+            street="Rua Benchmark",
+            number="1",
+        )
+        branch = Branch.objects.create(name="Filial Benchmark Anexos", address=address)
+        service = Service.objects.create(
+            name="Vistoria Benchmark",
+            category=Category.objects.create(name="Vistoria Benchmark"),
+            form=Forms.objects.create(name="Formulário Benchmark"),
+        )
+        opinion = ServiceOpinion.objects.create(name="Aprovado", service=service)
+        today = timezone.localdate()
+        document_types = [
+            DocumentType.objects.create(name=name, app_label="resolve_crm")
+            for name in ("Contrato Benchmark", "CNH Homologador Benchmark", "Conta de Luz Benchmark")
+        ]
+        sale_ct = ContentType.objects.get_for_model(Sale)
+
+        sale_ids = []
+        with transaction.atomic():
+            for start in range(0, total_sales, batch_size):
+                size = min(batch_size, total_sales - start)
+                sales = Sale.objects.bulk_create(
+                    [
+                        Sale(
+                            customer=user,
+                            seller=user,
+                            sales_supervisor=user,
+                            sales_manager=user,
+                            branch=branch,
+                            payment_status="L",
+                            status="EA",
+                            is_pre_sale=False,
+                        )
+                        for _ in range(size)
+                    ]
+                )
+                # Demais condições atendidas: a liberação depende só dos anexos
+                inspections = Schedule.objects.bulk_create(
+                    [
+                        Schedule(
+                            service=service,
+                            address=address,
+                            schedule_creator=user,
+                            schedule_date=today,
+                            schedule_start_time="08:00",
+                            schedule_end_date=today,
+                            schedule_end_time="12:00",
+                            final_service_opinion=opinion,
+                        )
+                        for _ in sales
+                    ]
+                )
+                projects = Project.objects.bulk_create(
+                    [
+                        Project(sale=sale, status="P", inspection=inspection)
+                        for sale, inspection in zip(sales, inspections)
+                    ]
+                )
+                Units.objects.bulk_create(
+                    [Units(project=project, new_contract_number=True) for project in projects]
+                )
+                sale_ids.extend(sale.id for sale in sales)
+
+        # Ciclos de tamanhos diferentes combinam todos os status e tipos
+        statuses = ("A", "EA")
+        for start in range(0, total_attachments, batch_size):
+            size = min(batch_size, total_attachments - start)
+            with transaction.atomic():
+                Attachment.objects.bulk_create(
+                    [
+                        Attachment(
+                            content_type=sale_ct,
+                            object_id=sale_ids[index % len(sale_ids)],
+                            file="benchmark.pdf",
+                            status=statuses[index % len(statuses)],
+                            document_type=document_types[index % len(document_types)],
+                        )
+                        for index in range(start, start + size)
+                    ]
+                )
+
+        self.stdout.write(
+            f"{total_sales} vendas e {total_attachments} anexos sintéticos criados."
+        )
+        return user
+
+    def _delete_fixture(self, user):
+        sale_ct = ContentType.objects.get_for_model(Sale)
+        document_types = DocumentType.objects.filter(name__endswith="Benchmark")
+        # Remoção direta, sem sinais nem histórico para cada anexo
+        Attachment.objects.filter(
+            content_type=sale_ct, document_type__in=document_types
+        )._raw_delete(Attachment.objects.db)
+        projects = Project.objects.filter(sale__customer=user)
+        inspection_ids = list(projects.values_list("inspection_id", flat=True))
+        Units.objects.filter(project__in=projects).delete()
+        projects.delete()
+        Schedule.objects.filter(id__in=inspection_ids).delete()
+        Sale.objects.filter(customer=user).delete()
+        document_types.delete()
+        Service.objects.filter(name="Vistoria Benchmark").delete()
+        Category.objects.filter(name="Vistoria Benchmark").delete()
+        Forms.objects.filter(name="Formulário Benchmark").delete()
+        Branch.objects.filter(name="Filial Benchmark Anexos").delete()
+        Address.objects.filter(street="Rua Benchmark", zip_code="00000000").delete()
+        user.delete()
+
+    def _indexes(self):
+        return [index for index in Attachment._meta.indexes if index.name in BENCHMARK_INDEXES]
+
+    def _drop_indexes(self):
+        with connection.schema_editor() as editor:
+            for index in self._indexes():
+                editor.remove_index(Attachment, index)
+
+    def _create_indexes(self):
+        with connection.schema_editor() as editor:
+            for index in self._indexes():
+                editor.add_index(Attachment, index)
+
+    def _explain(self, queryset):
+        if self.verbosity > 1:
+            self.stdout.write(queryset.explain())
+
+    def _measure(self, queryset, repeat):
+        best, result, query_count = None, None, 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                result = queryset.filter(is_released_to_engineering=True).count()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+            query_count = len(queries)
+        return result, {"seconds": best, "queries": query_count}
+
+    def _report(self, label, stats):
+        self.stdout.write(f"{label}: {stats['seconds']:.3f}s, {stats['queries']} queries")
@@ -0,0 +1,164 @@
+import time
+import tracemalloc
+from itertools import cycle
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import Address, Branch, User
+from logistics.models import Purchase
+from resolve_crm.models import Project, Sale
+from resolve_crm.querysets.project import (
+    LOGISTICS_DELIVERY_STATUSES,
+    LOGISTICS_PURCHASE_STATUSES,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a contagem em Python (iterando os projetos) com a agregação "
+        "em SQL usada por ProjectViewSet.logistics_indicators. Os dados "
+        "sintéticos são criados em uma transação revertida ao final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--projects",
+            type=int,
+            default=50000,
+            help="Quantidade de projetos sintéticos.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Tamanho dos lotes de bulk_create.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._create_fixture(options["projects"], options["batch_size"])
+
+            queryset = Project.objects.with_purchase_and_delivery_status()
+
+            legacy, legacy_stats = self._measure(
+                lambda: self._python_counts(queryset)
+            )
+            aggregated, aggregated_stats = self._measure(
+                lambda: queryset.logistics_status_counts()
+            )
+
+            transaction.set_rollback(True)
+
+        self._report("Python (legado)", legacy_stats)
+        self._report("SQL agregado", aggregated_stats)
+
+        if legacy != aggregated:
+            self.stderr.write(
+                self.style.ERROR(f"Resultados divergentes: {legacy} != {aggregated}")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Resultados idênticos."))
+
+    def _create_fixture(self, total, batch_size):
+        user = User.objects.create_user(
+            username="benchmark_logistics",
+            password="benchmark",
+            first_document="00000000000",
+            email="benchmark_logistics@example.com",
+        )
+        branch = Branch.objects.create(
+            name="Filial Benchmark",
+            address=Address.objects.create(
+                zip_code="00000000",
+                country="Brazil",
+                state="PA",
+                city="Belém",
+                neighborhood="Centro",
+                street="Rua Benchmark",
+                number="1",
+            ),
+        )
+
+        purchase_statuses = cycle(["R", "C", "D", "A", "P", "F", None])
+        today = timezone.localdate()
+
+        for start in range(0, total, batch_size):
+            size = min(batch_size, total - start)
+            sales = Sale.objects.bulk_create(
+                [
+                    Sale(
+                        customer=user,
+                        seller=user,
+                        sales_supervisor=user,
+                        sales_manager=user,
+                        branch=branch,
+                    )
+                    for _ in range(size)
+                ]
+            )
+            projects = Project.objects.bulk_create(
+                [Project(sale=sale, status="P") for sale in sales]
+            )
+            purchases = []
+            for project in projects:
+                status = next(purchase_statuses)
+                if status:
+                    purchases.append(
+                        Purchase(
+                            project=project,
+                            supplier=user,
+                            purchase_date=today,
+                            status=status,
+                        )
+                    )
+            Purchase.objects.bulk_create(purchases)
+
+        self.stdout.write(f"{total} projetos sintéticos criados.")
+
+    def _python_counts(self, queryset):
+        """
+        Reproduz a implementação anterior do endpoint: count() seguido da
+        iteração de todos os projetos com os relacionamentos carregados.
+        """
+        purchase_result = {status: 0 for status in LOGISTICS_PURCHASE_STATUSES}
+        delivery_result = {status: 0 for status in LOGISTICS_DELIVERY_STATUSES}
+        total_count = queryset.count()
+
+        projects = queryset.select_related(
+            "sale", "sale__customer", "sale__branch", "inspection", "product"
+        ).prefetch_related("attachments", "units", "purchases")
+
+        for project in projects:
+            if project.purchase_status in purchase_result:
+                purchase_result[project.purchase_status] += 1
+            if project.delivery_status in delivery_result:
+                delivery_result[project.delivery_status] += 1
+
+        return {
+            "purchase_status": purchase_result,
+            "delivery_status": delivery_result,
+            "total_count": total_count,
+        }
+
+    def _measure(self, func):
+        tracemalloc.start()
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            result = func()
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, {
+            "seconds": elapsed,
+            "queries": len(queries),
+            "peak_mb": peak / (1024 * 1024),
+        }
+
+    def _report(self, label, stats):
+        self.stdout.write(
+            f"{label}: {stats['seconds']:.2f}s, {stats['queries']} queries, "
+            f"pico de memória {stats['peak_mb']:.1f} MB"
+        )
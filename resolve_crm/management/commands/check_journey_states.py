@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from resolve_crm.journey_state import (
+    DEFAULT_BATCH_SIZE,
+    diff_journey_states,
+    refresh_journey_states,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a tabela ProjectJourneyState com as anotações ao vivo do "
+        "ProjectQuerySet e lista as divergências."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Quantidade de projetos comparados por lote.",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Recalcula os projetos divergentes.",
+        )
+
+    def handle(self, *args, **options):
+        differences = diff_journey_states(batch_size=options["batch_size"])
+
+        for project_id, field, stored, live in differences:
+            self.stdout.write(
+                f"Projeto {project_id}: {field} gravado={stored!r} ao_vivo={live!r}"
+            )
+
+        project_ids = {project_id for project_id, *_ in differences}
+        if not project_ids:
+            self.stdout.write(self.style.SUCCESS("Nenhuma divergência encontrada."))
+            return
+
+        if options["fix"]:
+            refresh_journey_states(project_ids)
+            self.stdout.write(
+                self.style.SUCCESS(f"{len(project_ids)} projetos recalculados.")
+            )
+            return
+
+        raise CommandError(f"{len(project_ids)} projetos divergentes.")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from resolve_crm.journey_state import DEFAULT_BATCH_SIZE, rebuild_journey_states
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a tabela ProjectJourneyState a partir das anotações ao vivo."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Quantidade de projetos calculados e gravados por lote.",
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_journey_states(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Estado da jornada reconstruído para {total} projetos.")
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from resolve_crm.search import DEFAULT_BATCH_SIZE, rebuild_search_text
+
+
+class Command(BaseCommand):
+    help = "Reconstrói a coluna search_text de vendas e projetos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Quantidade de registros calculados e gravados por lote.",
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_search_text(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Texto de busca reconstruído para {total} registros.")
+        )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from resolve_crm.distances import (
+    DEFAULT_BATCH_SIZE,
+    recompute_matriz_distances,
+    refresh_delivery_types,
+)
+
+
+class Command(BaseCommand):
+    help = "Recalcula a distância até a Matriz de todos os projetos."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help="Quantidade de projetos gravados por lote.",
+        )
+        parser.add_argument(
+            "--routes",
+            action="store_true",
+            help="Também recalcula o delivery_type pelas distâncias de rota "
+            "(consulta a API apenas para coordenadas fora do cache).",
+        )
+
+    def handle(self, *args, **options):
+        total = recompute_matriz_distances(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Distância até a Matriz recalculada para {total} projetos.")
+        )
+
+        if options["routes"]:
+            results = refresh_delivery_types()
+            self.stdout.write(
+                self.style.SUCCESS(f"delivery_type recalculado para {len(results)} projetos.")
+            )
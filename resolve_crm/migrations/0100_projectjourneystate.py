@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-18 01:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resolve_crm', '0099_alter_historicalproject_financier_monitoring_status_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectJourneyState',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='journey_state', serialize=False, to='resolve_crm.project', verbose_name='Projeto')),
+                ('current_step', models.CharField(blank=True, max_length=50, null=True, verbose_name='Etapa Atual')),
+                ('is_released_to_engineering', models.BooleanField(default=False, verbose_name='Liberado para Engenharia')),
+                ('purchase_status', models.CharField(blank=True, max_length=50, null=True, verbose_name='Status da Compra')),
+                ('delivery_status', models.CharField(blank=True, max_length=50, null=True, verbose_name='Status da Entrega')),
+                ('is_released_to_installation', models.BooleanField(default=False, verbose_name='Liberado para Instalação')),
+                ('installation_status', models.CharField(blank=True, max_length=50, null=True, verbose_name='Status da Instalação')),
+                ('final_inspection_status', models.CharField(blank=True, max_length=50, null=True, verbose_name='Status da Vistoria Final')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Estado da Jornada do Projeto',
+                'verbose_name_plural': 'Estados da Jornada dos Projetos',
+                'indexes': [models.Index(fields=['current_step'], name='resolve_crm_current_872e3f_idx'), models.Index(fields=['purchase_status'], name='resolve_crm_purchas_70f8df_idx'), models.Index(fields=['delivery_status'], name='resolve_crm_deliver_18a3b2_idx'), models.Index(fields=['installation_status'], name='resolve_crm_install_de066c_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.9 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+FULLTEXT_INDEXES = [
+    ("resolve_crm_sale", "resolve_crm_sale_search_text_ft"),
+    ("resolve_crm_project", "resolve_crm_project_search_text_ft"),
+]
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for table, index in FULLTEXT_INDEXES:
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {index} ON {table} (search_text)"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    for table, index in FULLTEXT_INDEXES:
+        schema_editor.execute(f"DROP INDEX {index} ON {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resolve_crm', '0100_projectjourneystate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Texto de Busca'),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Texto de Busca'),
+        ),
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
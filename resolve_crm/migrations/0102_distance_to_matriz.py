@@ -0,0 +1,38 @@
+# Generated by Django 4.2.9 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resolve_crm', '0101_search_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteDistance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin_latitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Latitude de Origem')),
+                ('origin_longitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Longitude de Origem')),
+                ('destination_latitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Latitude de Destino')),
+                ('destination_longitude', models.DecimalField(decimal_places=4, max_digits=8, verbose_name='Longitude de Destino')),
+                ('distance_km', models.FloatField(verbose_name='Distância (km)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+            ],
+            options={
+                'verbose_name': 'Distância de Rota',
+                'verbose_name_plural': 'Distâncias de Rota',
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='distance_to_matriz_km',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='Distância até a Matriz (km)'),
+        ),
+        migrations.AddConstraint(
+            model_name='routedistance',
+            constraint=models.UniqueConstraint(fields=('origin_latitude', 'origin_longitude', 'destination_latitude', 'destination_longitude'), name='unique_route_distance_coordinates'),
+        ),
+    ]
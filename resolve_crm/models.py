@@ -4,7 +4,8 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericRelation
 from django.urls import reverse_lazy
 from django.utils.timezone import now
-from core.models import Attachment, DocumentType
+from core.documents import document_completeness, get_required_document_types
+from core.models import Attachment
 from simple_history.models import HistoricalRecords
 from django.contrib.auth import get_user_model
 from accounts.models import Branch
@@ -13,10 +14,12 @@ from datetime import timedelta
 from django.db import models
 from django.utils.functional import cached_property
 from field_services.models import Schedule
-import math
 
 from resolve_crm.querysets.project import ProjectQuerySet
 
+# Tipos de documento obrigatórios considerados na documentação do projeto
+PROJECT_DOCUMENTS_APP_LABEL = "contracts"
+
 
 class Origin(models.Model):
     TYPE_CHOICES = [
@@ -527,10 +530,14 @@ class Sale(models.Model):
     financier_date = models.DateField(
         "Data do Financeiro", auto_now=False, auto_now_add=False, null=True, blank=True
     )
+    # Documento de busca desnormalizado (índice FULLTEXT no MySQL)
+    search_text = models.TextField(
+        "Texto de Busca", blank=True, default="", editable=False
+    )
 
     # Logs
     created_at = models.DateTimeField("Criado em", auto_now_add=True, db_index=True)
-    history = HistoricalRecords()
+    history = HistoricalRecords(excluded_fields=["search_text"])
 
     def calculate_franchise_installment_value(
         self, reference_value: Decimal
@@ -582,14 +589,9 @@ class Sale(models.Model):
         return self.franchise_installments.exists()
 
     def missing_documents(self):
-        required_documents = DocumentType.objects.filter(required=True)
-        missing_documents = []
-        if required_documents:
-            for document in required_documents:
-                if not self.attachments.filter(document_type=document):
-                    missing_documents.append({"id": document.id, "name": document.name})
-            return missing_documents
-        return None
+        if not get_required_document_types():
+            return None
+        return document_completeness([self])[self.pk].missing
 
     def save(self, *args, **kwargs):
         if not self.billing_date and self.signature_date:
@@ -661,6 +663,38 @@ class Step(models.Model):
         return self.name
 
 
+class RouteDistance(models.Model):
+    """
+    Cache de distâncias de rota, indexado pelas coordenadas arredondadas de
+    origem e destino. Evita repetir chamadas à Distance Matrix API.
+    """
+
+    origin_latitude = models.DecimalField("Latitude de Origem", max_digits=8, decimal_places=4)
+    origin_longitude = models.DecimalField("Longitude de Origem", max_digits=8, decimal_places=4)
+    destination_latitude = models.DecimalField("Latitude de Destino", max_digits=8, decimal_places=4)
+    destination_longitude = models.DecimalField("Longitude de Destino", max_digits=8, decimal_places=4)
+    distance_km = models.FloatField("Distância (km)")
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Distância de Rota"
+        verbose_name_plural = "Distâncias de Rota"
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    "origin_latitude",
+                    "origin_longitude",
+                    "destination_latitude",
+                    "destination_longitude",
+                ],
+                name="unique_route_distance_coordinates",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.distance_km:.2f} km"
+
+
 class Project(models.Model):
     sale = models.ForeignKey(
         "resolve_crm.Sale",
@@ -820,39 +854,16 @@ class Project(models.Model):
         null=True,
         blank=True,
     )
+    # Distância linear até a Matriz, recalculada por resolve_crm.distances
+    distance_to_matriz_km = models.FloatField(
+        "Distância até a Matriz (km)", blank=True, null=True, editable=False
+    )
+    # Documento de busca desnormalizado (índice FULLTEXT no MySQL)
+    search_text = models.TextField(
+        "Texto de Busca", blank=True, default="", editable=False
+    )
     objects = ProjectQuerySet.as_manager()
-    history = HistoricalRecords()
-
-    @cached_property
-    def distance_to_matriz_km(self):
-        """
-        Distância linear (Haversine) entre o endereço da Matriz e o do projeto.
-        Retorna None se qualquer dado estiver faltando.
-        """
-        matriz = Branch.objects.filter(name__icontains="Matriz").first()
-        proj_addr = self.address
-
-        if not (matriz and matriz.address and proj_addr):
-            return None
-
-        try:
-            lat1, lon1 = float(matriz.address.latitude), float(matriz.address.longitude)
-            lat2, lon2 = float(proj_addr.latitude), float(proj_addr.longitude)
-        except (TypeError, ValueError):
-            return None
-
-        # Haversine
-        R = 6371.0
-        dlat = math.radians(lat2 - lat1)
-        dlon = math.radians(lon2 - lon1)
-        a = (
-            math.sin(dlat / 2) ** 2
-            + math.cos(math.radians(lat1))
-            * math.cos(math.radians(lat2))
-            * math.sin(dlon / 2) ** 2
-        )
-        c = 2 * math.asin(math.sqrt(a))
-        return round(R * c, 2)
+    history = HistoricalRecords(excluded_fields=["search_text", "distance_to_matriz_km"])
 
     @cached_property
     def address(self):
@@ -879,19 +890,15 @@ class Project(models.Model):
         # you could cache this if you like:
         return Schedule.objects.get(pk=pk)
 
-    # @property
-    # def missing_documents(self):
-    #     required_documents = DocumentType.objects.filter(required=True, app_label='contracts')
-    #     missing_documents = []
-    #     if required_documents:
-    #         for document in required_documents:
-    #             if not self.attachments.filter(document_type=document).exists():
-    #                 missing_documents.append({
-    #                     'id': document.id,
-    #                     'name': document.name
-    #                 })
-    #         return missing_documents
-    #     return None
+    @property
+    def missing_documents(self):
+        if not get_required_document_types(PROJECT_DOCUMENTS_APP_LABEL):
+            return None
+        return self.document_completeness_info.missing
+
+    @cached_property
+    def document_completeness_info(self):
+        return document_completeness([self], app_label=PROJECT_DOCUMENTS_APP_LABEL)[self.pk]
 
     def create_deadlines(self):
         steps = Step.objects.all()
@@ -952,6 +959,54 @@ class Project(models.Model):
             self.create_deadlines()
 
 
+class ProjectJourneyState(models.Model):
+    """
+    Estado desnormalizado da jornada do projeto, mantido pelos signals de
+    resolve_crm e reconstruído pelo comando rebuild_journey_states.
+    """
+
+    project = models.OneToOneField(
+        Project,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="journey_state",
+        verbose_name="Projeto",
+    )
+    current_step = models.CharField("Etapa Atual", max_length=50, null=True, blank=True)
+    is_released_to_engineering = models.BooleanField(
+        "Liberado para Engenharia", default=False
+    )
+    purchase_status = models.CharField(
+        "Status da Compra", max_length=50, null=True, blank=True
+    )
+    delivery_status = models.CharField(
+        "Status da Entrega", max_length=50, null=True, blank=True
+    )
+    is_released_to_installation = models.BooleanField(
+        "Liberado para Instalação", default=False
+    )
+    installation_status = models.CharField(
+        "Status da Instalação", max_length=50, null=True, blank=True
+    )
+    final_inspection_status = models.CharField(
+        "Status da Vistoria Final", max_length=50, null=True, blank=True
+    )
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Estado da Jornada do Projeto"
+        verbose_name_plural = "Estados da Jornada dos Projetos"
+        indexes = [
+            models.Index(fields=["current_step"]),
+            models.Index(fields=["purchase_status"]),
+            models.Index(fields=["delivery_status"]),
+            models.Index(fields=["installation_status"]),
+        ]
+
+    def __str__(self):
+        return f"{self.project} - {self.current_step}"
+
+
 class ProjectStep(models.Model):
     project = models.ForeignKey(
         Project, on_delete=models.CASCADE, related_name="project_steps"
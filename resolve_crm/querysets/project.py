@@ -1,3 +1,4 @@
+from api.querysets import lean_aggregate
 from core.models import Attachment
 from engineering.models import (
     CivilConstruction,
@@ -43,6 +44,26 @@ from datetime import timedelta
 from django.db.models.functions import Concat, Trim, Replace
 
 
+LOGISTICS_PURCHASE_STATUSES = [
+    "Bloqueado",
+    "Liberado",
+    "Pendente",
+    "Compra Realizada",
+    "Cancelado",
+    "Distrato",
+    "Aguardando Previsão de Entrega",
+    "Aguardando Pagamento",
+]
+
+LOGISTICS_DELIVERY_STATUSES = [
+    "Bloqueado",
+    "Liberado",
+    "Agendado",
+    "Entregue",
+    "Cancelado",
+]
+
+
 class TimestampDiff(Func):
     function = "TIMESTAMPDIFF"
     template = "%(function)s(DAY, %(expressions)s)"
@@ -1047,3 +1068,57 @@ class ProjectQuerySet(django_models.QuerySet):
                 .values("id")
             )
         )
+
+    def with_live_journey_state(self):
+        """
+        Calcula, a partir das tabelas de origem, os mesmos campos persistidos
+        em ProjectJourneyState.
+        """
+        return (
+            self.with_current_step()
+            .with_final_inspection_status()
+            .with_installation_status()
+        )
+
+    def with_journey_state(self, fields):
+        """
+        Lê os campos de jornada da tabela desnormalizada ProjectJourneyState
+        em vez de recalcular as subqueries por requisição.
+        """
+        return self.annotate(
+            **{field: F(f"journey_state__{field}") for field in fields}
+        )
+
+    def logistics_status_counts(
+        self,
+        purchase_statuses=LOGISTICS_PURCHASE_STATUSES,
+        delivery_statuses=LOGISTICS_DELIVERY_STATUSES,
+    ):
+        """
+        Conta purchase_status e delivery_status em um único SELECT agregado,
+        sem instanciar projetos nem executar prefetch. O queryset precisa
+        estar anotado com os dois status.
+        """
+        aggregates = {"total_count": Count("id")}
+        for index, status in enumerate(purchase_statuses):
+            aggregates[f"purchase_{index}"] = Count(
+                "id", filter=Q(purchase_status=status)
+            )
+        for index, status in enumerate(delivery_statuses):
+            aggregates[f"delivery_{index}"] = Count(
+                "id", filter=Q(delivery_status=status)
+            )
+
+        result = lean_aggregate(self, **aggregates)
+
+        return {
+            "purchase_status": {
+                status: result[f"purchase_{index}"]
+                for index, status in enumerate(purchase_statuses)
+            },
+            "delivery_status": {
+                status: result[f"delivery_{index}"]
+                for index, status in enumerate(delivery_statuses)
+            },
+            "total_count": result["total_count"],
+        }
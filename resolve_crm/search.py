@@ -0,0 +1,217 @@
+import logging
+import re
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Func, Q, Value
+
+from .models import Project, Sale
+
+logger = logging.getLogger(__name__)
+
+
+USER_SEARCH_FIELDS = ("first_document", "complete_name", "email")
+
+
+def _user_fields(*relations):
+    return [
+        f"{relation}__{field}"
+        for relation in relations
+        for field in USER_SEARCH_FIELDS
+    ]
+
+
+SALE_SEARCH_FIELDS = [
+    "contract_number",
+    *_user_fields(
+        "customer",
+        "seller",
+        "sales_supervisor",
+        "sales_manager",
+        "supplier",
+        "payments__borrower",
+        "projects__homologator",
+    ),
+]
+
+PROJECT_SEARCH_FIELDS = [
+    "project_number",
+    "sale__contract_number",
+    *_user_fields(
+        "designer",
+        "homologator",
+        "sale__customer",
+        "sale__seller",
+        "sale__sales_supervisor",
+        "sale__sales_manager",
+        "sale__supplier",
+        "sale__payments__borrower",
+    ),
+]
+
+DEFAULT_BATCH_SIZE = 1000
+
+# innodb_ft_min_token_size padrão: termos menores não entram no índice
+FULLTEXT_MIN_TOKEN_SIZE = 3
+
+
+class FullTextMatch(Func):
+    """
+    MATCH ... AGAINST em modo booleano, usado com o índice FULLTEXT da
+    coluna search_text.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, expression, query):
+        super().__init__(expression, Value(query))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        column_sql, column_params = compiler.compile(self.source_expressions[0])
+        query_sql, query_params = compiler.compile(self.source_expressions[1])
+        return (
+            f"MATCH ({column_sql}) AGAINST ({query_sql} IN BOOLEAN MODE)",
+            [*column_params, *query_params],
+        )
+
+
+def search_by_text(queryset, query):
+    """
+    Filtra Sale ou Project pela coluna search_text. Cada termo precisa
+    aparecer no documento; no MySQL os termos indexáveis usam o FULLTEXT
+    (prefixo) e os curtos caem no LIKE sobre a mesma coluna.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return queryset
+
+    fulltext_terms = []
+    if connection.vendor == "mysql":
+        fulltext_terms = [
+            term for term in terms if len(term) >= FULLTEXT_MIN_TOKEN_SIZE
+        ]
+
+    for term in terms:
+        if term not in fulltext_terms:
+            queryset = queryset.filter(search_text__icontains=term)
+
+    if fulltext_terms:
+        boolean_query = " ".join(f"+{term}*" for term in fulltext_terms)
+        queryset = queryset.alias(
+            search_rank=FullTextMatch("search_text", boolean_query)
+        ).filter(search_rank__gt=0)
+
+    return queryset
+
+
+def build_search_documents(queryset, fields):
+    """
+    Retorna {pk: texto} com os valores distintos dos campos, em minúsculas.
+    Relações múltiplas (pagamentos, projetos) geram várias linhas por pk.
+    """
+    documents = defaultdict(list)
+    for pk, *values in queryset.order_by().values_list("pk", *fields):
+        words = documents[pk]
+        for value in values:
+            if not value:
+                continue
+            value = str(value).lower()
+            if value not in words:
+                words.append(value)
+    return {pk: " ".join(words) for pk, words in documents.items()}
+
+
+def _save_documents(model, documents):
+    objs = [model(pk=pk, search_text=text) for pk, text in documents.items()]
+    model.objects.bulk_update(objs, ["search_text"], batch_size=DEFAULT_BATCH_SIZE)
+    return len(objs)
+
+
+def refresh_search_text(sale_ids=(), project_ids=()):
+    """
+    Recalcula o search_text das vendas e projetos informados.
+    """
+    sale_ids = {pk for pk in sale_ids if pk}
+    project_ids = {pk for pk in project_ids if pk}
+    updated = 0
+
+    with transaction.atomic():
+        if sale_ids:
+            documents = build_search_documents(
+                Sale.objects.filter(pk__in=sale_ids), SALE_SEARCH_FIELDS
+            )
+            updated += _save_documents(Sale, documents)
+        if project_ids:
+            documents = build_search_documents(
+                Project.objects.filter(pk__in=project_ids), PROJECT_SEARCH_FIELDS
+            )
+            updated += _save_documents(Project, documents)
+
+    return updated
+
+
+def refresh_user_search_text(user_id):
+    """
+    Recalcula os documentos que exibem dados do usuário informado.
+    """
+    sale_ids = set(
+        Sale.objects.filter(
+            Q(customer_id=user_id)
+            | Q(seller_id=user_id)
+            | Q(sales_supervisor_id=user_id)
+            | Q(sales_manager_id=user_id)
+            | Q(supplier_id=user_id)
+            | Q(payments__borrower_id=user_id)
+            | Q(projects__homologator_id=user_id)
+        ).values_list("pk", flat=True)
+    )
+    project_ids = set(
+        Project.objects.filter(
+            Q(designer_id=user_id)
+            | Q(homologator_id=user_id)
+            | Q(sale_id__in=sale_ids)
+        ).values_list("pk", flat=True)
+    )
+    return refresh_search_text(sale_ids, project_ids)
+
+
+def _iter_id_batches(model, batch_size):
+    ids = list(model.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), batch_size):
+        yield ids[start:start + batch_size]
+
+
+def rebuild_search_text(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Reconstrói o search_text de todas as vendas e projetos em lotes.
+    """
+    total = 0
+    for batch in _iter_id_batches(Sale, batch_size):
+        total += refresh_search_text(sale_ids=batch)
+        logger.info(f"[SearchText] {total} documentos reconstruídos")
+    for batch in _iter_id_batches(Project, batch_size):
+        total += refresh_search_text(project_ids=batch)
+        logger.info(f"[SearchText] {total} documentos reconstruídos")
+    return total
+
+
+def schedule_search_text_refresh(sale_ids=(), project_ids=()):
+    """
+    Enfileira o recálculo após o commit da transação corrente.
+    """
+    from .task import refresh_search_text_task
+
+    sale_ids = sorted({pk for pk in sale_ids if pk})
+    project_ids = sorted({pk for pk in project_ids if pk})
+    if not sale_ids and not project_ids:
+        return
+
+    transaction.on_commit(
+        lambda: refresh_search_text_task.delay(sale_ids, project_ids)
+    )
+
+
+def schedule_user_search_text_refresh(user_id):
+    from .task import refresh_user_search_text_task
+
+    transaction.on_commit(lambda: refresh_user_search_text_task.delay(user_id))
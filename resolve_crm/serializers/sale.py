@@ -11,6 +11,7 @@ class SaleListSerializer(serializers.ModelSerializer):
     final_service_opinion = serializers.SerializerMethodField()
     signature_status = serializers.SerializerMethodField()
     is_released_to_engineering = serializers.BooleanField(read_only=True)
+    document_completeness = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Sale
@@ -29,6 +30,7 @@ class SaleListSerializer(serializers.ModelSerializer):
             'final_service_opinion',
             'signature_status',
             'is_released_to_engineering',
+            'document_completeness',
         ]
 
     def get_projects_info(self, obj):
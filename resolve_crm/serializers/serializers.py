@@ -4,6 +4,7 @@ from decimal import Decimal
 
 from django.db import transaction
 from django.db.models import F, Sum, Value, DecimalField
+from django.db.models.manager import BaseManager
 from django.db.models.functions import Coalesce
 
 from rest_framework import serializers
@@ -13,8 +14,10 @@ from rest_framework.serializers import ValidationError
 from api.serializers import BaseSerializer
 from core.serializers import AttachmentSerializer
 from accounts.serializers import AddressSerializer
+from field_services.models import Schedule
 from financial.models import Financier, FranchiseInstallment
 from financial.serializers import FinancierSerializer
+from logistics.imports import save_project_materials
 from logistics.models import Materials, Product, ProjectMaterials, SaleProduct
 from resolve_crm.models import *
 
@@ -77,11 +80,21 @@ class SaleSerializer(BaseSerializer):
         fields = "__all__"
 
     def get_financiers(self, obj):
-        financiers = (
-            Financier.objects.select_related("address")
-            .filter(payment__sale=obj, is_deleted=False)
-            .distinct()
-        )
+        payments = getattr(obj, "_prefetched_objects_cache", {}).get("payments")
+        if payments is None:
+            financiers = (
+                Financier.objects.select_related("address")
+                .filter(payment__sale=obj, is_deleted=False)
+                .distinct()
+            )
+        else:
+            # Reaproveita o prefetch de payments__financier do SaleViewSet
+            unique = {
+                payment.financier_id: payment.financier
+                for payment in payments
+                if payment.financier and not payment.financier.is_deleted
+            }
+            financiers = sorted(unique.values(), key=lambda financier: financier.name)
         return FinancierSerializer(
             financiers, many=True, fields=("id", "name"), context=self.context
         ).data
@@ -97,9 +110,11 @@ class SaleSerializer(BaseSerializer):
         return AttachmentSerializer(attachments, many=True, context=self.context).data
 
     def get_is_released_to_engineering(self, obj):
-        projects = getattr(obj, "cached_projects", None)
-        if projects is None:
-            projects = obj.projects.with_is_released_to_engineering()
+        # Anotado com um Exists no queryset do SaleViewSet
+        released = getattr(obj, "is_released_to_engineering", None)
+        if released is not None:
+            return released
+        projects = obj.projects.with_is_released_to_engineering()
         return any(getattr(p, "is_released_to_engineering", False) for p in projects)
 
     def get_signature_status(self, obj):
@@ -322,6 +337,71 @@ class SaleSerializer(BaseSerializer):
         return total_value
 
 
+def panel_count_queryset(project_ids):
+    return ProjectMaterials.objects.filter(
+        project_id__in=project_ids,
+        is_deleted=False,
+        material__attributes__key="Tipo",
+        material__attributes__value="MODULO",
+        material__attributes__is_deleted=False,
+    )
+
+
+class ProjectListSerializer(serializers.ListSerializer):
+    """
+    Resolve em lote, para a página inteira, os campos que o ProjectSerializer
+    calcularia por linha: uma busca dos agendamentos de instalação e um
+    GROUP BY com a contagem de módulos.
+    """
+
+    def to_representation(self, data):
+        projects = list(data.all() if isinstance(data, BaseManager) else data)
+        self.child.batch = self.resolve_batch(projects)
+        try:
+            return super().to_representation(projects)
+        finally:
+            self.child.batch = None
+
+    def resolve_batch(self, projects):
+        fields = self.child.fields
+        batch = {}
+        if "latest_installation" in fields:
+            batch["latest_installation"] = self.resolve_latest_installations(projects)
+        return batch
+
+    def resolve_latest_installations(self, projects):
+        schedule_ids = {
+            getattr(project, "latest_installation", None) for project in projects
+        } - {None}
+        if not schedule_ids:
+            return {}
+
+        schedules = Schedule.objects.select_related("address").in_bulk(schedule_ids)
+        project_ids = {s.project_id for s in schedules.values() if s.project_id}
+        panel_counts = dict(
+            panel_count_queryset(project_ids)
+            .values("project_id")
+            .annotate(total=Sum("amount", output_field=DecimalField()))
+            .values_list("project_id", "total")
+        )
+
+        installations = {}
+        for project in projects:
+            inst = schedules.get(getattr(project, "latest_installation", None))
+            if inst is None:
+                continue
+            addr = AddressSerializer(inst.address).data if inst.address else None
+            installations[project.pk] = {
+                "id": inst.id,
+                "schedule_agent": inst.schedule_agent_id,
+                "final_service_opinion_user": inst.final_service_opinion_user_id,
+                "panel_count": panel_counts.get(inst.project_id) or Decimal(0),
+                "complete_address": addr.get("complete_address") if addr else None,
+                "neighborhood": addr.get("neighborhood") if addr else None,
+            }
+        return installations
+
+
 class ProjectSerializer(BaseSerializer):
     address = serializers.SerializerMethodField()
     access_opnion = serializers.CharField(read_only=True)
@@ -366,6 +446,18 @@ class ProjectSerializer(BaseSerializer):
     class Meta:
         model = Project
         fields = "__all__"
+        list_serializer_class = ProjectListSerializer
+
+    batch = None
+
+    def get_batched(self, name, obj):
+        """
+        Valor pré-calculado pelo ProjectListSerializer, ou None fora de listas.
+        Retorna (encontrado, valor).
+        """
+        if self.batch is None or name not in self.batch:
+            return False, None
+        return True, self.batch[name].get(obj.pk)
 
     def get_distance_to_matriz_km(self, obj):
         if obj.distance_to_matriz_km is not None:
@@ -397,18 +489,16 @@ class ProjectSerializer(BaseSerializer):
         )
 
     def get_latest_installation(self, obj):
+        found, installation = self.get_batched("latest_installation", obj)
+        if found:
+            return installation
+
         inst = obj.latest_installation_obj
         if not inst:
             return None
 
         # 1 query para soma dos módulos
-        panel_count = ProjectMaterials.objects.filter(
-            project=inst.project,
-            is_deleted=False,
-            material__attributes__key="Tipo",
-            material__attributes__value="MODULO",
-            material__attributes__is_deleted=False,
-        ).aggregate(
+        panel_count = panel_count_queryset([inst.project_id]).aggregate(
             total=Coalesce(
                 Sum("amount", output_field=DecimalField()),
                 Value(0, output_field=DecimalField()),
@@ -435,55 +525,62 @@ class ProjectSerializer(BaseSerializer):
 
     def create(self, validated_data):
         materials_data = validated_data.pop("materials_data", [])
-        
+        # Valida os materiais antes de criar o projeto
+        self._validate_materials(materials_data)
+
         # Pass current_user if available in context
         current_user = self.context.get('current_user')
-        instance = super().create(validated_data)
-        instance.save(current_user=current_user)
+        with transaction.atomic():
+            instance = super().create(validated_data)
+            instance.save(current_user=current_user)
 
-        if materials_data:
-            self._save_materials(instance, materials_data)
+            if materials_data:
+                self._save_materials(instance, materials_data)
 
         return instance
 
     def update(self, instance, validated_data):
         materials_data = validated_data.pop("materials_data", [])
+        self._validate_materials(materials_data)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         
         # Pass current_user if available in context
         current_user = self.context.get('current_user')
-        instance.save(current_user=current_user)
+        with transaction.atomic():
+            instance.save(current_user=current_user)
 
-        if materials_data:
-            self._save_materials(instance, materials_data)
+            if materials_data:
+                self._save_materials(instance, materials_data)
 
         return instance
 
-    def _save_materials(self, project, materials_data):
-        project.materials.clear()
-        for material_data in materials_data:
-            material_id = material_data.get("material_id")
-            amount = material_data.get("amount", 1)
-            is_exit = material_data.get("is_exit", False)
-            serial_number = material_data.get("serial_number", None)
-
-            try:
-                material = Materials.objects.get(id=material_id)
-            except Materials.DoesNotExist:
-                raise ValidationError(
-                    {"detail": f"Material com id {material_id} não encontrado."},
-                    code=404,
-                )
+    def _validate_materials(self, materials_data):
+        """
+        Busca todos os materiais numa única consulta e informa de uma vez
+        todos os ids inexistentes.
+        """
+        material_ids = {data.get("material_id") for data in materials_data}
+        if not material_ids:
+            return
+        found = {str(pk) for pk in Materials.objects.in_bulk(material_ids)}
+        missing = [
+            f"Material com id {material_id} não encontrado."
+            for material_id in material_ids
+            if str(material_id) not in found
+        ]
+        if missing:
+            raise ValidationError({"detail": sorted(missing)}, code=404)
 
-            ProjectMaterials.objects.create(
-                project=project,
-                material=material,
-                amount=amount,
-                is_exit=is_exit,
-                serial_number=serial_number,
-            )
+    def _save_materials(self, project, materials_data):
+        user = self.context.get('current_user')
+        save_project_materials(
+            project,
+            materials_data,
+            replace=True,
+            user=user if getattr(user, "is_authenticated", False) else None,
+        )
 
 
 class ComercialProposalSerializer(BaseSerializer):
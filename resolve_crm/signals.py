@@ -1,10 +1,22 @@
-from django.db.models.signals import post_save
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from engineering.models import Units
+from accounts.models import Address, Branch, User
+from engineering.models import CivilConstruction, RequestsEnergyCompany, Units
+from field_services.models import Schedule
+from financial.models import Payment
+from logistics.models import Purchase
+from .journey_state import schedule_journey_state_refresh
+from .search import (
+    USER_SEARCH_FIELDS,
+    schedule_search_text_refresh,
+    schedule_user_search_text_refresh,
+)
 from .task import (
     generate_project_number,
     generate_sale_contract_number,
+    recompute_matriz_distances_task,
     remove_tag_from_sale,
     update_project_delivery_type,
 )
@@ -34,6 +46,24 @@ def post_units(sender, instance, created, **kwargs):
         update_project_delivery_type.delay(instance.project.id)
 
 
+def schedule_matriz_distances_recompute():
+    transaction.on_commit(recompute_matriz_distances_task.delay)
+
+
+@receiver(post_save, sender=Branch)
+def matriz_branch_changed(sender, instance, **kwargs):
+    if "matriz" in (instance.name or "").lower():
+        schedule_matriz_distances_recompute()
+
+
+@receiver(post_save, sender=Address)
+def matriz_address_changed(sender, instance, created, **kwargs):
+    if not created and Branch.objects.filter(
+        address=instance, name__icontains="Matriz"
+    ).exists():
+        schedule_matriz_distances_recompute()
+
+
 @receiver(post_save, sender=Attachment)
 def attachment_changed(sender, instance, **kwargs):
     if instance.document_type and any(
@@ -88,3 +118,94 @@ def project_changed(sender, instance, **kwargs):
 
     if annotated and annotated.is_released_to_engineering:
         update_or_create_sale_tag.delay(annotated.sale.id, annotated.sale.status)
+
+
+
+# Estado desnormalizado da jornada (ProjectJourneyState)
+
+@receiver(post_save, sender=Project)
+def refresh_journey_state_on_project(sender, instance, **kwargs):
+    schedule_journey_state_refresh([instance.pk])
+
+
+@receiver(post_save, sender=Sale)
+def refresh_journey_state_on_sale(sender, instance, **kwargs):
+    schedule_journey_state_refresh(
+        Project.objects.filter(sale=instance).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_save, sender=Units)
+@receiver(post_delete, sender=Units)
+@receiver(post_save, sender=RequestsEnergyCompany)
+@receiver(post_delete, sender=RequestsEnergyCompany)
+@receiver(post_save, sender=Purchase)
+@receiver(post_delete, sender=Purchase)
+@receiver(post_save, sender=CivilConstruction)
+@receiver(post_delete, sender=CivilConstruction)
+def refresh_journey_state_on_project_child(sender, instance, **kwargs):
+    schedule_journey_state_refresh([instance.project_id])
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def refresh_journey_state_on_schedule(sender, instance, **kwargs):
+    # A vistoria também é referenciada por Project.inspection
+    project_ids = list(
+        Project.objects.filter(inspection_id=instance.pk).values_list("pk", flat=True)
+    )
+    project_ids.append(instance.project_id)
+    schedule_journey_state_refresh(project_ids)
+
+
+@receiver(post_save, sender=Attachment)
+@receiver(post_delete, sender=Attachment)
+def refresh_journey_state_on_attachment(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Project).id:
+        schedule_journey_state_refresh([instance.object_id])
+    elif instance.content_type_id == ContentType.objects.get_for_model(Sale).id:
+        schedule_journey_state_refresh(
+            Project.objects.filter(sale_id=instance.object_id).values_list(
+                "pk", flat=True
+            )
+        )
+
+
+# Documento de busca desnormalizado (search_text)
+
+@receiver(post_save, sender=Project)
+def refresh_search_text_on_project(sender, instance, **kwargs):
+    schedule_search_text_refresh(
+        sale_ids=[instance.sale_id], project_ids=[instance.pk]
+    )
+
+
+@receiver(post_save, sender=Sale)
+def refresh_search_text_on_sale(sender, instance, **kwargs):
+    schedule_search_text_refresh(
+        sale_ids=[instance.pk],
+        project_ids=Project.objects.filter(sale=instance).values_list(
+            "pk", flat=True
+        ),
+    )
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_search_text_on_payment(sender, instance, **kwargs):
+    schedule_search_text_refresh(
+        sale_ids=[instance.sale_id],
+        project_ids=Project.objects.filter(sale_id=instance.sale_id).values_list(
+            "pk", flat=True
+        ),
+    )
+
+
+@receiver(post_save, sender=User)
+def refresh_search_text_on_user(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    # Ignora saves parciais que não mexem nos campos buscáveis (ex.: last_login)
+    if update_fields and not set(update_fields) & set(USER_SEARCH_FIELDS):
+        return
+    schedule_user_search_text_refresh(instance.pk)
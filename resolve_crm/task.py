@@ -2,13 +2,12 @@ import datetime
 import logging
 import os
 from celery import shared_task
+from celery.signals import worker_process_init
 from django.contrib.contenttypes.models import ContentType
 from django.db import connection, transaction
 from django.utils import timezone
 import requests
-import math
-from django.conf import settings
-from accounts.models import Branch, MonthlyGoal
+from accounts.models import MonthlyGoal
 from core.models import Tag
 from logistics.models import SaleProduct
 from datetime import timedelta
@@ -22,6 +21,15 @@ from .clicksign import (
     send_notification,
     update_clicksign_document,
 )
+from .contract_rendering import (
+    get_pdf_resources,
+    read_contract_pdf,
+    render_contract_pdf,
+    store_contract_pdf,
+)
+from .distances import recompute_matriz_distances, refresh_delivery_types
+from .journey_state import refresh_journey_states
+from .search import refresh_search_text, refresh_user_search_text
 from .models import ContractSubmission, Project, Sale
 
 logger = logging.getLogger(__name__)
@@ -54,6 +62,12 @@ def generate_sale_contract_number(sale_id):
         finally:
             cursor.execute("SELECT RELEASE_LOCK(%s)", [lock_name])
 
+    # O UPDATE direto não dispara signals
+    refresh_search_text(
+        sale_ids=[sale_id],
+        project_ids=Project.objects.filter(sale_id=sale_id).values_list("id", flat=True),
+    )
+
     return ("success", f"Contract number {new_cn} generated for sale {sale_id}.")
 
 
@@ -79,6 +93,9 @@ def generate_project_number(project_id):
         finally:
             cursor.execute("SELECT RELEASE_LOCK('project_number_lock')")
 
+        # O UPDATE direto não dispara signals
+        refresh_search_text(project_ids=[project_id])
+
         return (
             "success",
             f"Project number {proj_num} generated for project {project_id}.",
@@ -220,13 +237,45 @@ def send_clicksign_url_to_teams(customer_name, seller_name, clicksign_url):
         return {"status": "error", "message": f"Erro ao enviar mensagem: {str(e)}"}
 
 
+@worker_process_init.connect
+def warm_contract_renderer(**kwargs):
+    # Fontes e folha de estilos do contrato carregadas uma vez por processo
+    try:
+        get_pdf_resources()
+    except Exception as e:
+        logger.warning(f"Não foi possível pré-carregar o gerador de contratos: {e}")
+
+
 @shared_task
-def send_contract_to_clicksign(sale_id, pdf_content):
+def generate_contract_pdf(sale_id, contract_content):
+    """
+    Gera o PDF do contrato, grava no storage e enfileira o envio ao
+    Clicksign com a chave do arquivo, sem trafegar o PDF pelo broker.
+    """
+    try:
+        pdf = render_contract_pdf(contract_content)
+        pdf_key = store_contract_pdf(sale_id, pdf)
+    except Exception as e:
+        logger.error(f"Erro ao gerar o PDF do contrato da venda {sale_id}: {e}")
+        return {"status": "error", "message": f"Erro ao gerar o PDF: {e}"}
+
+    send_contract_to_clicksign.delay(sale_id, pdf_key)
+    return {"status": "success", "pdf_key": pdf_key}
+
+
+@shared_task
+def send_contract_to_clicksign(sale_id, pdf_key):
     try:
         sale = Sale.objects.get(id=sale_id)
     except Sale.DoesNotExist:
         return {"status": "error", "message": f"Sale {sale_id} não encontrada."}
 
+    try:
+        pdf_content = read_contract_pdf(pdf_key)
+    except Exception as e:
+        logger.error(f"Erro ao ler o PDF do contrato {pdf_key}: {e}")
+        return {"status": "error", "message": f"PDF {pdf_key} não encontrado."}
+
     existing_submission = (
         ContractSubmission.objects.filter(sale=sale).order_by("-id").first()
     )
@@ -370,21 +419,27 @@ def create_projects_for_sale(sale_id):
     return {"status": "success", "message": f"Projetos criados para a venda {sale_id}."}
 
 
-def _linear_distance_km(lat1, lon1, lat2, lon2):
-    """
-    Haversine fallback caso a API do Google retorne ZERO_RESULTS.
-    """
-    R = 6371.0
-    dlat = math.radians(lat2 - lat1)
-    dlon = math.radians(lon2 - lon1)
-    a = (
-        math.sin(dlat / 2) ** 2
-        + math.cos(math.radians(lat1))
-        * math.cos(math.radians(lat2))
-        * math.sin(dlon / 2) ** 2
+@shared_task
+def refresh_project_journey_states(project_ids):
+    updated = refresh_journey_states(project_ids)
+    logger.info(f"📌 Task: Estado da jornada atualizado para {updated} projetos.")
+    return {"status": "success", "updated": updated}
+
+
+@shared_task
+def refresh_search_text_task(sale_ids, project_ids):
+    updated = refresh_search_text(sale_ids, project_ids)
+    logger.info(f"📌 Task: Texto de busca atualizado para {updated} registros.")
+    return {"status": "success", "updated": updated}
+
+
+@shared_task
+def refresh_user_search_text_task(user_id):
+    updated = refresh_user_search_text(user_id)
+    logger.info(
+        f"📌 Task: Texto de busca atualizado para {updated} registros do usuário {user_id}."
     )
-    c = 2 * math.asin(math.sqrt(a))
-    return R * c
+    return {"status": "success", "updated": updated}
 
 
 @shared_task
@@ -392,75 +447,36 @@ def update_project_delivery_type(project_id):
     logger.info(
         f"🔄 Iniciando cálculo de delivery_type por rota para Project {project_id}"
     )
-    try:
-        project = Project.objects.get(pk=project_id)
-    except Project.DoesNotExist:
+    if not Project.objects.filter(pk=project_id).exists():
         logger.warning(f"Project {project_id} não encontrado")
         return {"status": "error", "message": "Projeto não encontrado"}
 
-    matriz = Branch.objects.filter(name__icontains="Matriz").first()
-    proj_addr = project.address
-
-    if not matriz:
-        logger.warning(f"Matriz não encontrada para o Projeto {project_id}")
-        return {"status": "error", "message": "Matriz não encontrada"}
-    if not matriz.address:
-        logger.warning(f"Endereço da Matriz ausente para o Projeto {project_id}")
-        return {"status": "error", "message": "Endereço da Matriz ausente"}
-    if not proj_addr:
-        logger.warning(f"Endereço do Projeto {project_id} ausente")
-        return {"status": "error", "message": "Endereço do Projeto ausente"}
-
-    # extrai e valida coordenadas
-    try:
-        lat1 = float(matriz.address.latitude)
-        lon1 = float(matriz.address.longitude)
-        lat2 = float(proj_addr.latitude)
-        lon2 = float(proj_addr.longitude)
-    except (TypeError, ValueError) as e:
-        logger.warning(f"Coordenadas inválidas para Project {project_id}: {e}")
-        return {"status": "error", "message": "Coordenadas inválidas"}
-
-    url = "https://maps.googleapis.com/maps/api/distancematrix/json"
-    params = {
-        "origins": f"{lat1},{lon1}",
-        "destinations": f"{lat2},{lon2}",
-        "mode": "driving",
-        "key": settings.GMAPS_API_KEY,
-    }
+    # Rotas já conhecidas vêm do cache; a API só é chamada para coordenadas novas
+    result = refresh_delivery_types([project_id]).get(project_id)
+    if result is None:
+        logger.warning(f"Coordenadas da Matriz ou do Projeto {project_id} ausentes")
+        return {"status": "error", "message": "Coordenadas ausentes"}
 
-    try:
-        resp = requests.get(url, params=params, timeout=10)
-        resp.raise_for_status()
-        elm = resp.json()["rows"][0]["elements"][0]
-    except Exception as e:
-        logger.error(f"Erro chamando Google API: {e}")
-        elm = {"status": "ZERO_RESULTS"}
-
-    # se a API retornar OK, usa distance.value; senão fallback Haversine
-    if elm.get("status") == "OK":
-        dist_km = elm["distance"]["value"] / 1000.0
-        logger.info(f"Distância de rota (Google): {dist_km:.2f} km")
-    else:
-        dist_km = _linear_distance_km(lat1, lon1, lat2, lon2)
-        logger.info(f"ZERO_RESULTS → fallback linear: {dist_km:.2f} km")
-
-    # atualiza delivery_type
-    project.delivery_type = "D" if dist_km > 200 else "C"
-    project.save(update_fields=["delivery_type"])
+    dist_km, delivery_type = result
     logger.info(
         f"Project {project_id} delivery_type atualizado para "
-        f"{project.delivery_type} ({dist_km:.2f} km)"
+        f"{delivery_type} ({dist_km:.2f} km)"
     )
 
     return {
         "status": "success",
         "project_id": project_id,
-        "delivery_type": project.delivery_type,
-        "distance_km": round(dist_km, 2),
+        "delivery_type": delivery_type,
+        "distance_km": dist_km,
     }
 
 
+@shared_task
+def recompute_matriz_distances_task():
+    updated = recompute_matriz_distances()
+    logger.info(f"📌 Task: Distância até a Matriz recalculada para {updated} projetos.")
+    return {"status": "success", "updated": updated}
+
 
 @shared_task
 def finalize_monthly_goals():
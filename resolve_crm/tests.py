@@ -1,19 +1,47 @@
 from datetime import timedelta
 import io
+from unittest import mock
 
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from PIL import Image
 from rest_framework import status
 
 from accounts.models import User, Branch, Address
+from core.models import Attachment, DocumentType
 from core.tests import BaseAPITestCase
+from engineering.models import Units
+from field_services.models import Category, Forms, Schedule, Service, ServiceOpinion
+from financial.models import Financier, Payment
+from logistics.models import MaterialAttributes, Materials, ProjectMaterials
 from resolve_crm.models import (
     Origin, Lead, MarketingCampaign, 
     ComercialProposal, Sale, Project, 
-    ContractSubmission
+    ContractSubmission, ContractTemplate, ProjectJourneyState, RouteDistance
 )
+from resolve_crm import contract_rendering
+from resolve_crm.contract_rendering import (
+    compile_contract,
+    get_compiled_contract,
+    read_contract_pdf,
+    render_contract,
+)
+from resolve_crm.distances import (
+    recompute_matriz_distances,
+    refresh_delivery_types,
+    route_distances,
+)
+from resolve_crm.journey_state import (
+    diff_journey_states, rebuild_journey_states, refresh_journey_states
+)
+from resolve_crm.kanban import build_board, kanban_queryset
+from resolve_crm.search import refresh_search_text
 
 
 class OriginViewSetTestCase(BaseAPITestCase):
@@ -295,6 +323,112 @@ class SaleViewSetTestCase(BaseAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Sale.objects.filter(id=self.sale.id).exists())
 
+    def test_search_uses_search_text(self):
+        self.user_customer.complete_name = 'Maria Busca'
+        self.user_customer.save()
+        refresh_search_text(sale_ids=[self.sale.id])
+        self.sale.refresh_from_db()
+        self.assertIn('maria busca', self.sale.search_text)
+
+        response = self.client.get(self.list_url, {'q': 'busca MARIA'})
+        self.assertEqual([sale['id'] for sale in response.data['results']], [self.sale.id])
+        response = self.client.get(self.list_url, {'q': 'inexistente'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_list_cache_is_scoped_per_user(self):
+        cache.clear()
+        other_seller = User.objects.create_user(username='other_seller', password='123456', first_document='99999999999', email='other_seller@example.com')
+        other_sale = Sale.objects.create(
+            customer=self.user_customer,
+            seller=other_seller,
+            sales_supervisor=self.user_supervisor,
+            sales_manager=self.user_manager,
+            branch=self.branch,
+            total_value=500.000,
+        )
+
+        self.client.force_authenticate(user=self.user_seller)
+        response = self.client.get(self.list_url)
+        self.assertEqual([sale['id'] for sale in response.data['results']], [self.sale.id])
+
+        self.client.force_authenticate(user=other_seller)
+        response = self.client.get(self.list_url)
+        self.assertEqual([sale['id'] for sale in response.data['results']], [other_sale.id])
+        self.assertEqual(response.data['meta']['indicators']['pending_count'], 1)
+
+    def test_list_cache_is_invalidated_on_sale_change(self):
+        cache.clear()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['meta']['pagination']['total_count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sale.objects.create(
+                customer=self.user_customer,
+                seller=self.user_seller,
+                sales_supervisor=self.user_supervisor,
+                sales_manager=self.user_manager,
+                branch=self.branch,
+                total_value=500.000,
+            )
+
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.data['meta']['pagination']['total_count'], 2)
+
+
+class SaleListQueryCountTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(username='cust_sale_batch', password='123456', first_document='13131313131', email='cust_sale_batch@example.com')
+        address = Address.objects.create(zip_code='66000000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua I', number='90')
+        branch = Branch.objects.create(name='Filial Lote Vendas', address=address)
+        service = Service.objects.create(name='Vistoria Lote', category=Category.objects.create(name='Vistoria Lote'), form=Forms.objects.create(name='Formulário Vistoria Lote'))
+        opinion = ServiceOpinion.objects.create(name='Aprovado', service=service)
+        self.financiers = [Financier.objects.create(name='Banco B'), Financier.objects.create(name='Banco A')]
+        today = timezone.localdate()
+
+        inspections = Schedule.objects.bulk_create([
+            Schedule(
+                service=service, address=address, schedule_creator=self.user, final_service_opinion=opinion,
+                schedule_date=today, schedule_start_time='08:00', schedule_end_date=today, schedule_end_time='12:00',
+            )
+            for _ in range(12)
+        ])
+        self.sales = []
+        for inspection in inspections:
+            sale = Sale.objects.create(customer=customer, seller=customer, sales_supervisor=customer, sales_manager=customer, branch=branch, total_value=1000)
+            Project.objects.create(sale=sale, status='P', inspection=inspection)
+            for financier in self.financiers:
+                Payment.objects.create(borrower=customer, sale=sale, value=500, payment_type='F', financier=financier, due_date=today)
+            self.sales.append(sale)
+
+    def get_page(self, limit):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('api:sale-list'), {'limit': limit})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(context.captured_queries)
+
+    def test_page_query_count_does_not_grow_with_rows(self):
+        # A primeira requisição aquece o cache de ContentType
+        self.get_page(1)
+        _, queries_2 = self.get_page(2)
+        response, queries_12 = self.get_page(12)
+
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertEqual(queries_12, queries_2)
+
+        item = response.data['results'][0]
+        self.assertEqual([financier['name'] for financier in item['financiers']], ['Banco A', 'Banco B'])
+        self.assertEqual(item['final_service_opinion'], [{'id': ServiceOpinion.objects.get().id, 'name': 'Aprovado'}])
+        self.assertFalse(item['is_released_to_engineering'])
+
+    def test_retrieve_matches_list(self):
+        response, _ = self.get_page(12)
+        listed = next(item for item in response.data['results'] if item['id'] == self.sales[0].id)
+        detail = self.client.get(reverse('api:sale-detail', args=[self.sales[0].id]))
+        for field in ('financiers', 'final_service_opinion', 'is_released_to_engineering'):
+            self.assertEqual(detail.data[field], listed[field])
+
 
 class ProjectViewSetTestCase(BaseAPITestCase):
     def setUp(self):
@@ -351,6 +485,315 @@ class ProjectViewSetTestCase(BaseAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Project.objects.filter(id=self.project.id).exists())
 
+    def test_update_project_materials(self):
+        materials = [Materials.objects.create(name=f"Material {i}", price=10) for i in range(2)]
+        ProjectMaterials.objects.create(project=self.project, material=materials[0], amount=5)
+
+        data = {
+            "materials_data": [
+                {"material_id": materials[0].id, "amount": 2},
+                {"material_id": 999998},
+                {"material_id": 999999},
+            ],
+        }
+        response = self.client.patch(self.detail_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['detail']), 2)
+        # A lista anterior é mantida quando há materiais inválidos
+        self.assertEqual(ProjectMaterials.objects.get(project=self.project).amount, 5)
+
+        data["materials_data"] = [
+            {"material_id": material.id, "amount": 2} for material in materials
+        ]
+        response = self.client.patch(self.detail_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(ProjectMaterials.objects.filter(project=self.project).values_list("material_id", "amount")),
+            {(material.id, 2) for material in materials},
+        )
+
+    def test_logistics_indicators(self):
+        response = self.client.get(reverse('api:project-logistics-indicators'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        indicators = response.data['indicators']
+        self.assertEqual(indicators['total_count'], 1)
+        self.assertEqual(indicators['purchase_status']['Bloqueado'], 1)
+        self.assertEqual(indicators['delivery_status']['Bloqueado'], 1)
+        self.assertEqual(sum(indicators['purchase_status'].values()), 1)
+
+
+class ProjectJourneyStateTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user_customer = User.objects.create_user(username='cust_journey', password='123456', first_document='77777777777', email='cust_journey@example.com')
+        self.branch = Branch.objects.create(name='Filial Jornada', address=Address.objects.create(zip_code='22222222', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua D', number='40'))
+        self.sale = Sale.objects.create(
+            customer=self.user_customer,
+            seller=self.user_customer,
+            sales_supervisor=self.user_customer,
+            sales_manager=self.user_customer,
+            branch=self.branch,
+            total_value=1000.000,
+        )
+        self.project = Project.objects.create(
+            sale=self.sale,
+            status="P"
+        )
+        self.list_url = reverse('api:project-list')
+
+    def test_rebuild_matches_live_annotations(self):
+        ProjectJourneyState.objects.all().delete()
+        self.assertEqual(rebuild_journey_states(batch_size=1), 1)
+        self.assertTrue(ProjectJourneyState.objects.filter(project=self.project).exists())
+        self.assertEqual(diff_journey_states(), [])
+
+    def test_refresh_is_idempotent(self):
+        refresh_journey_states([self.project.id])
+        refresh_journey_states([self.project.id])
+        self.assertEqual(ProjectJourneyState.objects.filter(project=self.project).count(), 1)
+
+    @override_settings(USE_PROJECT_JOURNEY_STATE=True)
+    def test_list_uses_journey_state(self):
+        refresh_journey_states([self.project.id])
+        state = ProjectJourneyState.objects.get(project=self.project)
+        response = self.client.get(self.list_url, {'metrics': 'current_step', 'fields': 'id,current_step'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['current_step'], state.current_step)
+
+
+class ProjectListBatchTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        Branch.objects.create(name='Matriz', address=Address.objects.create(zip_code='66000000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua Matriz', number='1', latitude='-1.455833', longitude='-48.503887'))
+        self.user_customer = User.objects.create_user(username='cust_batch', password='123456', first_document='12121212121', email='cust_batch@example.com')
+        branch = Branch.objects.create(name='Filial Lote', address=Address.objects.create(zip_code='55555555', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua G', number='70'))
+        sale = Sale.objects.create(
+            customer=self.user_customer,
+            seller=self.user_customer,
+            sales_supervisor=self.user_customer,
+            sales_manager=self.user_customer,
+            branch=branch,
+            total_value=1000.000,
+        )
+        address = Address.objects.create(zip_code='68740000', country='Brazil', state='PA', city='Castanhal', neighborhood='Centro', street='Rua H', number='80', latitude='-1.297', longitude='-47.926')
+        self.projects = Project.objects.bulk_create([Project(sale=sale, status='P') for _ in range(100)])
+        Units.objects.bulk_create([Units(project=project, main_unit=True, address=address) for project in self.projects])
+
+        service = Service.objects.create(name='Instalação Solar', category=Category.objects.create(name='Instalação'), form=Forms.objects.create(name='Formulário Instalação'))
+        today = timezone.localdate()
+        Schedule.objects.bulk_create([
+            Schedule(
+                project=project, service=service, address=address, schedule_creator=self.user,
+                schedule_date=today, schedule_start_time='08:00', schedule_end_date=today, schedule_end_time='12:00',
+            )
+            for project in self.projects
+        ])
+        material = Materials.objects.create(name='Módulo 550W', price=100)
+        MaterialAttributes.objects.create(material=material, key='Tipo', value='MODULO')
+        ProjectMaterials.objects.create(project=self.projects[0], material=material, amount=12)
+        recompute_matriz_distances()
+
+    def get_page(self, limit):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('api:project-list'), {
+                'metrics': 'latest_installation',
+                'fields': 'id,distance_to_matriz_km,latest_installation',
+                'limit': limit,
+            })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(context.captured_queries)
+
+    def test_page_query_count_does_not_grow_with_rows(self):
+        # A primeira requisição aquece o cache de ContentType
+        self.get_page(1)
+        _, queries_10 = self.get_page(10)
+        response, queries_100 = self.get_page(100)
+
+        self.assertEqual(len(response.data['results']), 100)
+        self.assertEqual(queries_100, queries_10)
+
+        results = {item['id']: item for item in response.data['results']}
+        first = results[self.projects[0].id]
+        self.assertAlmostEqual(first['distance_to_matriz_km'], 65.67, delta=1)
+        self.assertEqual(first['latest_installation']['panel_count'], 12)
+        self.assertEqual(results[self.projects[1].id]['latest_installation']['panel_count'], 0)
+
+    def test_retrieve_matches_batched_values(self):
+        response, _ = self.get_page(100)
+        listed = next(item for item in response.data['results'] if item['id'] == self.projects[0].id)
+        detail = self.client.get(
+            reverse('api:project-detail', args=[self.projects[0].id]),
+            {'metrics': 'latest_installation', 'fields': 'id,distance_to_matriz_km,latest_installation'},
+        )
+        self.assertEqual(detail.data, listed)
+
+
+@override_settings(DISTANCE_MATRIX_CLIENT='resolve_crm.distance_matrix.HaversineDistanceMatrixClient')
+class MatrizDistanceTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.matriz_address = Address.objects.create(zip_code='66000000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua Matriz', number='1', latitude='-1.455833', longitude='-48.503887')
+        Branch.objects.create(name='Matriz', address=self.matriz_address)
+        self.user_customer = User.objects.create_user(username='cust_distance', password='123456', first_document='13131313131', email='cust_distance@example.com')
+        sale = Sale.objects.create(
+            customer=self.user_customer,
+            seller=self.user_customer,
+            sales_supervisor=self.user_customer,
+            sales_manager=self.user_customer,
+            branch=Branch.objects.create(name='Filial Distância', address=Address.objects.create(zip_code='66100000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua I', number='90')),
+            total_value=1000.000,
+        )
+        near = Address.objects.create(zip_code='68740000', country='Brazil', state='PA', city='Castanhal', neighborhood='Centro', street='Rua H', number='80', latitude='-1.297', longitude='-47.926')
+        far = Address.objects.create(zip_code='68500000', country='Brazil', state='PA', city='Marabá', neighborhood='Centro', street='Rua J', number='100', latitude='-5.368', longitude='-49.117')
+        self.near, self.far, self.without_address = Project.objects.bulk_create([Project(sale=sale, status='P') for _ in range(3)])
+        Units.objects.bulk_create([
+            Units(project=self.near, main_unit=True, address=near),
+            Units(project=self.far, main_unit=True, address=far),
+        ])
+
+    def test_recompute_persists_vectorized_distances(self):
+        self.assertEqual(recompute_matriz_distances(batch_size=1), 2)
+        self.near.refresh_from_db()
+        self.far.refresh_from_db()
+        self.without_address.refresh_from_db()
+        self.assertAlmostEqual(self.near.distance_to_matriz_km, 65.67, delta=1)
+        self.assertGreater(self.far.distance_to_matriz_km, 400)
+        self.assertIsNone(self.without_address.distance_to_matriz_km)
+
+    def test_route_distances_are_cached_and_batched(self):
+        origin = (-1.455833, -48.503887)
+        destinations = [(-1.297, -47.926), (-1.29701, -47.92601), (-5.368, -49.117)]
+        with mock.patch('resolve_crm.distance_matrix.HaversineDistanceMatrixClient.route_distances', autospec=True, side_effect=lambda client, o, d: [100.0] * len(d)) as client:
+            first = route_distances(origin, destinations)
+            second = route_distances(origin, destinations)
+
+        # Coordenadas que coincidem com 4 casas decimais compartilham a rota
+        self.assertEqual(client.call_count, 1)
+        self.assertEqual(len(client.call_args.args[2]), 2)
+        self.assertEqual(RouteDistance.objects.count(), 2)
+        self.assertEqual(first, [100.0] * 3)
+        self.assertEqual(second, first)
+
+    def test_refresh_delivery_types_skips_api_for_known_coordinates(self):
+        results = refresh_delivery_types([self.near.id, self.far.id])
+        self.assertEqual(results[self.near.id][1], 'C')
+        self.assertEqual(results[self.far.id][1], 'D')
+
+        with mock.patch('resolve_crm.distance_matrix.HaversineDistanceMatrixClient.route_distances') as client:
+            refresh_delivery_types([self.near.id, self.far.id])
+        client.assert_not_called()
+        self.far.refresh_from_db()
+        self.assertEqual(self.far.delivery_type, 'D')
+        self.assertIsNotNone(self.far.distance_to_matriz_km)
+
+    def test_matriz_address_change_schedules_recompute(self):
+        with mock.patch('resolve_crm.signals.recompute_matriz_distances_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.matriz_address.latitude = '-1.4'
+                self.matriz_address.save()
+        delay.assert_called_once()
+
+
+class EngineeringReleaseLargeIdTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        customer = User.objects.create_user(username='cust_large_id', password='123456', first_document='14141414141', email='cust_large_id@example.com')
+        branch = Branch.objects.create(name='Filial Ids', address=Address.objects.create(zip_code='66200000', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua K', number='110'))
+        sale = Sale.objects.create(
+            customer=customer,
+            seller=customer,
+            sales_supervisor=customer,
+            sales_manager=customer,
+            branch=branch,
+            total_value=1000.000,
+            payment_status='L',
+            status='EA',
+            is_pre_sale=False,
+        )
+        # Id acima do limite do antigo PositiveSmallIntegerField
+        Sale.objects.filter(pk=sale.pk).update(id=5_000_000_000)
+        self.sale = Sale.objects.get(pk=5_000_000_000)
+        service = Service.objects.create(name='Vistoria', category=Category.objects.create(name='Vistoria'), form=Forms.objects.create(name='Formulário Vistoria'))
+        address = Address.objects.create(zip_code='68740000', country='Brazil', state='PA', city='Castanhal', neighborhood='Centro', street='Rua H', number='80')
+        today = timezone.localdate()
+        inspection = Schedule.objects.create(
+            protocol='VISTORIA-IDS', service=service, address=address, schedule_creator=self.user,
+            schedule_date=today, schedule_start_time='08:00', schedule_end_date=today, schedule_end_time='12:00',
+            final_service_opinion=ServiceOpinion.objects.create(name='Aprovado', service=service),
+        )
+        self.project = Project.objects.create(sale=self.sale, status='P', inspection=inspection)
+        Units.objects.create(project=self.project, new_contract_number=True)
+
+        sale_ct = ContentType.objects.get_for_model(Sale)
+        self.contract = Attachment.objects.create(
+            content_type=sale_ct, object_id=self.sale.id, file='contrato.pdf', status='A',
+            document_type=DocumentType.objects.create(name='Contrato', app_label='resolve_crm'),
+        )
+        Attachment.objects.create(
+            content_type=sale_ct, object_id=self.sale.id, file='cnh.pdf', status='A',
+            document_type=DocumentType.objects.create(name='CNH do Homologador', app_label='resolve_crm'),
+        )
+
+    def is_released(self):
+        return Project.objects.with_is_released_to_engineering().get(pk=self.project.pk).is_released_to_engineering
+
+    def test_attachment_keeps_large_object_id(self):
+        self.contract.refresh_from_db()
+        self.assertEqual(self.contract.object_id, 5_000_000_000)
+        self.assertEqual(self.contract.content_object, self.sale)
+
+    def test_release_matches_attachments_of_large_sale_id(self):
+        self.assertTrue(self.is_released())
+
+        # O contrato de outra venda não libera o projeto
+        self.contract.object_id = self.sale.id % 32768
+        self.contract.save()
+        self.assertFalse(self.is_released())
+
+
+class JourneyKanbanViewTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user_customer = User.objects.create_user(username='cust_kanban', password='123456', first_document='88888888888', email='cust_kanban@example.com')
+        self.branch = Branch.objects.create(name='Filial Kanban', address=Address.objects.create(zip_code='44444444', country='Brazil', state='PA', city='Belém', neighborhood='Centro', street='Rua F', number='60'))
+        self.sale = Sale.objects.create(
+            customer=self.user_customer,
+            seller=self.user_customer,
+            sales_supervisor=self.user_customer,
+            sales_manager=self.user_customer,
+            branch=self.branch,
+            total_value=1000.000,
+        )
+        self.projects = [Project.objects.create(sale=self.sale, status="P") for _ in range(3)]
+        self.url = reverse('api:journey-kanban')
+
+    def test_board_uses_two_queries(self):
+        with self.assertNumQueries(2):
+            board = build_board(kanban_queryset(), {'vistoria': 2}, per_page=2)
+        self.assertEqual(board['vistoria']['count'], 3)
+        self.assertEqual(board['vistoria']['total_pages'], 2)
+        self.assertEqual(board['vistoria']['current_page'], 2)
+        self.assertEqual([p['id'] for p in board['vistoria']['projects']], [self.projects[0].id])
+        self.assertEqual(board['homologado']['projects'], [])
+
+    def test_get_board(self):
+        response = self.client.get(self.url, {'vistoria_page': 99})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['vistoria']['current_page'], 1)
+        self.assertEqual(len(response.data['vistoria']['projects']), 3)
+
+    def test_cursor_mode(self):
+        response = self.client.get(self.url, {'column': 'vistoria', 'limit': 2})
+        self.assertEqual([p['id'] for p in response.data['projects']], [self.projects[2].id, self.projects[1].id])
+        response = self.client.get(self.url, {'column': 'vistoria', 'limit': 2, 'cursor': response.data['next_cursor']})
+        self.assertEqual([p['id'] for p in response.data['projects']], [self.projects[0].id])
+        self.assertIsNone(response.data['next_cursor'])
+
+        response = self.client.get(self.url, {'column': 'inexistente'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
 
 class ContractSubmissionViewSetTestCase(BaseAPITestCase):
     def setUp(self):
@@ -415,3 +858,59 @@ class ContractSubmissionViewSetTestCase(BaseAPITestCase):
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(ContractSubmission.objects.filter(id=self.contract_submission.id).exists())
+
+
+class ContractRenderingTestCase(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        contract_rendering._compiled_templates.clear()
+        self.template = ContractTemplate.objects.create(
+            name="Contrato Padrão",
+            content="<p>{{ customer_name }} ({{customer_first_document}}) {{ unknown }} {{ customer_name }}</p>",
+        )
+
+    def test_render_replaces_known_placeholders_only(self):
+        content = render_contract(
+            self.template,
+            {"customer_name": "Maria", "customer_first_document": r"123\1"},
+        )
+        self.assertEqual(content, r"<p>Maria (123\1) {{ unknown }} Maria</p>")
+
+    def test_compile_keeps_unmatched_braces(self):
+        self.assertEqual(
+            "".join(
+                segment if isinstance(segment, str) else "[%s]" % segment[0]
+                for segment in compile_contract("a {{ b {{ c }} {{ }} d {{")
+            ),
+            "a {{ b [c] {{ }} d {{",
+        )
+
+    def test_compiled_template_is_cached_by_content(self):
+        segments = get_compiled_contract(self.template)
+        self.assertIs(get_compiled_contract(self.template), segments)
+
+        self.template.content = "<p>{{ city }}</p>"
+        self.template.save()
+        self.assertEqual(render_contract(self.template, {"city": "Belém"}), "<p>Belém</p>")
+
+    def test_pdf_resources_loaded_once(self):
+        self.assertIs(
+            contract_rendering.get_pdf_resources(), contract_rendering.get_pdf_resources()
+        )
+
+    @override_settings(
+        STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }
+    )
+    def test_generate_task_sends_storage_key(self):
+        from resolve_crm.task import generate_contract_pdf, send_contract_to_clicksign
+
+        with mock.patch.object(send_contract_to_clicksign, "delay") as delay:
+            result = generate_contract_pdf(42, "<p>Contrato</p>")
+
+            self.assertEqual(result["status"], "success")
+            delay.assert_called_once_with(42, result["pdf_key"])
+            self.assertTrue(result["pdf_key"].startswith("contracts/generated/sale_42/"))
+            self.assertTrue(read_contract_pdf(result["pdf_key"]).startswith(b"%PDF"))
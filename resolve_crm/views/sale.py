@@ -4,6 +4,8 @@ from rest_framework.viewsets import ReadOnlyModelViewSet
 from django.db.models import Count, Q, Prefetch, Sum, OuterRef, Exists
 
 from api.pagination import CustomPagination
+from api.querysets import lean_aggregate
+from core.documents import with_document_completeness
 from resolve_crm.filters.sale_filter import SaleFilterSet
 from resolve_crm.serializers.sale import SaleListSerializer
 
@@ -16,7 +18,7 @@ class OptimizedSaleListViewSet(ReadOnlyModelViewSet):
     pagination_class = CustomPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = SaleFilterSet
-    ordering_fields = ['created_at', 'customer__complete_name', 'contract_number', 'status', 'signature_date', 'total_value', 'branch__name']
+    ordering_fields = ['created_at', 'customer__complete_name', 'contract_number', 'status', 'signature_date', 'total_value', 'branch__name', 'document_completeness']
 
     def get_queryset(self):
         user = self.request.user
@@ -63,6 +65,9 @@ class OptimizedSaleListViewSet(ReadOnlyModelViewSet):
             Prefetch('attachments', queryset=attachments_under_analysis_qs)
         )
 
+        # Percentual de documentos obrigatórios anexados
+        qs = with_document_completeness(qs)
+
         if not (user.is_superuser or user.has_perm("resolve_crm.view_all_sales")):
             stakeholder = Q(customer=user) | Q(seller=user)
             if hasattr(user, "employee"):
@@ -76,7 +81,8 @@ class OptimizedSaleListViewSet(ReadOnlyModelViewSet):
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
 
-        indicators = queryset.aggregate(
+        indicators = lean_aggregate(
+            queryset,
             pending_count=Count("id", filter=Q(status="P")),
             pending_total_value=Sum("total_value", filter=Q(status="P")),
             finalized_count=Count("id", filter=Q(status="F")),
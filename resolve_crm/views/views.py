@@ -2,20 +2,17 @@
 import datetime
 import logging
 import re
-from hashlib import md5
 # Django imports
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.core.files.base import ContentFile
 from django.db import transaction
-from django.db.models import Case, CharField, Count, F, Prefetch, Q, Value, When
+from django.db.models import Case, CharField, Count, Exists, F, Prefetch, Q, Value, When
 from django.http import HttpResponse
 from django.shortcuts import redirect
-from django.template.loader import render_to_string
 from django.utils import formats
 from datetime import datetime as dt
 # REST framework imports
@@ -26,24 +23,38 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-# Third-party imports
-from weasyprint import HTML
-
 # Local application imports
 from accounts.models import User, UserType
 from accounts.serializers import PhoneNumberSerializer, UserSerializer
+from api.cache import (
+    get_cached,
+    get_permission_scope,
+    indicator_cache_key,
+    response_cache_key,
+    set_cached,
+)
+from api.querysets import lean_aggregate, lean_queryset
 from api.views import BaseModelViewSet
 from core.models import Process, ProcessBase
 from core.task import create_process_async
+from resolve_crm.contract_rendering import render_contract, render_contract_pdf
 from engineering.models import RequestsEnergyCompany, Units
-from financial.models import PaymentInstallment
 from logistics.models import Product, ProductMaterials, SaleProduct
 from logistics.serializers import ProductSerializer
+from resolve_crm.journey_state import MATERIALIZED_METRICS
+from resolve_crm.kanban import (
+    DEFAULT_PER_PAGE,
+    KANBAN_COLUMNS,
+    build_board,
+    fetch_column_after,
+    kanban_queryset,
+)
+from resolve_crm.search import search_by_text
 from resolve_crm.task import save_all_sales
 from resolve_erp.utils.access_log import AccessLogMixin
 from ..models import *
 from ..serializers.serializers import *
-from django.db.models import OuterRef, Subquery, DecimalField, Value
+from django.db.models import OuterRef, DecimalField, Value
 
 
 logger = logging.getLogger(__name__)
@@ -75,6 +86,10 @@ class ComercialProposalViewSet(BaseModelViewSet):
     serializer_class = ComercialProposalSerializer
 
 
+SALE_CACHE_TAGS = ("sale", "payment")
+SALE_CACHE_TIMEOUT = 60 * 5
+
+
 class SaleViewSet(AccessLogMixin, BaseModelViewSet):
     serializer_class = SaleSerializer
 
@@ -93,15 +108,6 @@ class SaleViewSet(AccessLogMixin, BaseModelViewSet):
         user = self.request.user
         base_select = ["customer", "seller", "branch", "marketing_campaign", "supplier"]
 
-        paid_installments = (
-            PaymentInstallment.objects.filter(
-                payment__sale_id=OuterRef("pk"), is_paid=True
-            )
-            .values("payment__sale_id")
-            .annotate(total=Sum("installment_value"))
-            .values("total")[:1]
-        )
-
         projects_qs = (
             Project.objects
             .select_related("inspection", "inspection__final_service_opinion")
@@ -110,8 +116,9 @@ class SaleViewSet(AccessLogMixin, BaseModelViewSet):
 
         qs = (
             Sale.objects.annotate(
+                # Lido do resumo mantido pelos signals de financial
                 total_paid=Coalesce(
-                    Subquery(paid_installments, output_field=DecimalField()),
+                    F("payment_summary__paid_value"),
                     Value(0, output_field=DecimalField()),
                 )
             )
@@ -138,11 +145,23 @@ class SaleViewSet(AccessLogMixin, BaseModelViewSet):
                 Prefetch(
                     "projects",
                     queryset=projects_qs,
+                    to_attr="cached_projects",
                 ),
             )
+            .annotate(
+                is_released_to_engineering=Exists(
+                    Project.objects.with_is_released_to_engineering().filter(
+                        sale_id=OuterRef("pk"), is_released_to_engineering=True
+                    )
+                )
+            )
             .order_by("-created_at")
         )
 
+        # cached_projects não alimenta o cache de sale.projects.all()
+        if "projects" in self.request.query_params.get("expand", "").split(","):
+            qs = qs.prefetch_related("projects")
+
         if not (user.is_superuser or user.has_perm("resolve_crm.view_all_sales")):
             stakeholder = Q(customer=user) | Q(seller=user)
             if hasattr(user, "employee"):
@@ -155,30 +174,7 @@ class SaleViewSet(AccessLogMixin, BaseModelViewSet):
 
     def apply_filters(self, queryset, query_params):
         if q := query_params.get("q"):
-            queryset = queryset.filter(
-                Q(contract_number__icontains=q)
-                | Q(customer__first_document__icontains=q)
-                | Q(customer__complete_name__icontains=q)
-                | Q(customer__email__icontains=q)
-                | Q(projects__homologator__first_document__icontains=q)
-                | Q(projects__homologator__complete_name__icontains=q)
-                | Q(projects__homologator__email__icontains=q)
-                | Q(seller__first_document__icontains=q)
-                | Q(seller__complete_name__icontains=q)
-                | Q(seller__email__icontains=q)
-                | Q(sales_supervisor__first_document__icontains=q)
-                | Q(sales_supervisor__complete_name__icontains=q)
-                | Q(sales_supervisor__email__icontains=q)
-                | Q(sales_manager__first_document__icontains=q)
-                | Q(sales_manager__complete_name__icontains=q)
-                | Q(sales_manager__email__icontains=q)
-                | Q(supplier__first_document__icontains=q)
-                | Q(supplier__complete_name__icontains=q)
-                | Q(supplier__email__icontains=q)
-                | Q(payments__borrower__first_document__icontains=q)
-                | Q(payments__borrower__complete_name__icontains=q)
-                | Q(payments__borrower__email__icontains=q)
-            )
+            queryset = search_by_text(queryset, q)
 
         if query_params.get("documents_under_analysis") == "true":
             queryset = queryset.filter(
@@ -233,37 +229,73 @@ class SaleViewSet(AccessLogMixin, BaseModelViewSet):
 
         return queryset
 
-    @method_decorator(cache_page(60 * 5))
+    def get_cache_scope(self, request):
+        """
+        Mesmo recorte do get_queryset: quem vê todas as vendas compartilha o
+        cache; os demais dependem do próprio usuário e das filiais vinculadas.
+        """
+        user = request.user
+        scope = get_permission_scope(user, "resolve_crm.view_all_sales")
+        if scope != "all" and hasattr(user, "employee"):
+            branch_ids = sorted(
+                user.employee.related_branches.values_list("id", flat=True)
+            )
+            scope = f"{scope}:branches:{','.join(map(str, branch_ids))}"
+        return scope
+
+    def get_export_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.apply_filters(queryset, self.request.query_params).distinct()
+
     def list(self, request, *args, **kwargs):
+        scope = self.get_cache_scope(request)
+        response_key = response_cache_key(
+            request, "sales_list", tags=SALE_CACHE_TAGS, scope=scope
+        )
+        cached_response = get_cached("sales_list", response_key)
+        if cached_response is not None:
+            return Response(cached_response)
+
         queryset = self.filter_queryset(self.get_queryset())
         queryset = self.apply_filters(queryset, request.query_params)
 
         queryset = queryset.distinct()
 
-        indicators = queryset.aggregate(
-            pending_count=Count("id", filter=Q(status="P")),
-            pending_total_value=Sum("total_value", filter=Q(status="P")),
-            finalized_count=Count("id", filter=Q(status="F")),
-            finalized_total_value=Sum("total_value", filter=Q(status="F")),
-            in_progress_count=Count("id", filter=Q(status="EA")),
-            in_progress_total_value=Sum("total_value", filter=Q(status="EA")),
-            canceled_count=Count("id", filter=Q(status="C")),
-            canceled_total_value=Sum("total_value", filter=Q(status="C")),
-            terminated_count=Count("id", filter=Q(status="D")),
-            terminated_total_value=Sum("total_value", filter=Q(status="D")),
-            total_value_sum=Sum("total_value"),
+        # Os indicadores não dependem da página e são compartilhados entre elas
+        indicators_key = indicator_cache_key(
+            request, "sales_indicators", tags=SALE_CACHE_TAGS, scope=scope
         )
+        indicators = get_cached("sales_indicators", indicators_key)
+        if indicators is None:
+            indicators = lean_aggregate(
+                queryset,
+                pending_count=Count("id", filter=Q(status="P")),
+                pending_total_value=Sum("total_value", filter=Q(status="P")),
+                finalized_count=Count("id", filter=Q(status="F")),
+                finalized_total_value=Sum("total_value", filter=Q(status="F")),
+                in_progress_count=Count("id", filter=Q(status="EA")),
+                in_progress_total_value=Sum("total_value", filter=Q(status="EA")),
+                canceled_count=Count("id", filter=Q(status="C")),
+                canceled_total_value=Sum("total_value", filter=Q(status="C")),
+                terminated_count=Count("id", filter=Q(status="D")),
+                terminated_total_value=Sum("total_value", filter=Q(status="D")),
+                total_value_sum=Sum("total_value"),
+            )
+            set_cached(indicators_key, indicators, SALE_CACHE_TIMEOUT)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
             self.paginator.extra_meta = {"indicators": indicators}
             serialized_data = self.get_serializer(page, many=True).data
-            return self.get_paginated_response(serialized_data)
+            response = self.get_paginated_response(serialized_data)
+        else:
+            serialized_data = self.get_serializer(queryset, many=True).data
+            response = Response(
+                {"results": serialized_data, "meta": {"indicators": indicators}}
+            )
 
-        serialized_data = self.get_serializer(queryset, many=True).data
-        return Response(
-            {"results": serialized_data, "meta": {"indicators": indicators}}
-        )
+        set_cached(response_key, response.data, SALE_CACHE_TIMEOUT)
+        return response
 
     def get_documents_under_analysis(self, obj):
         documents = obj.documents_under_analysis[:10]
@@ -369,10 +401,21 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
         }
 
         if metrics:
+            state_fields = []
             for metric in metrics.split(","):
                 metric = metric.strip()
-                if metric in method_map:
+                if settings.USE_PROJECT_JOURNEY_STATE and metric in MATERIALIZED_METRICS:
+                    state_fields.extend(MATERIALIZED_METRICS[metric])
+                elif metric in method_map:
                     queryset = method_map[metric](queryset)
+            if state_fields:
+                # Campos já calculados ao vivo por outra métrica têm prioridade
+                state_fields = [
+                    field
+                    for field in dict.fromkeys(state_fields)
+                    if field not in queryset.query.annotations
+                ]
+                queryset = queryset.with_journey_state(state_fields)
 
         queryset = queryset.select_related(
             "sale",
@@ -651,34 +694,7 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
             )
 
         if q:
-            queryset = queryset.filter(
-                Q(project_number__icontains=q)
-                | Q(designer__first_document__icontains=q)
-                | Q(designer__complete_name__icontains=q)
-                | Q(designer__email__icontains=q)
-                | Q(homologator__first_document__icontains=q)
-                | Q(homologator__complete_name__icontains=q)
-                | Q(homologator__email__icontains=q)
-                | Q(sale__contract_number__icontains=q)
-                | Q(sale__customer__first_document__icontains=q)
-                | Q(sale__customer__complete_name__icontains=q)
-                | Q(sale__customer__email__icontains=q)
-                | Q(sale__seller__first_document__icontains=q)
-                | Q(sale__seller__complete_name__icontains=q)
-                | Q(sale__seller__email__icontains=q)
-                | Q(sale__sales_supervisor__first_document__icontains=q)
-                | Q(sale__sales_supervisor__complete_name__icontains=q)
-                | Q(sale__sales_supervisor__email__icontains=q)
-                | Q(sale__sales_manager__first_document__icontains=q)
-                | Q(sale__sales_manager__complete_name__icontains=q)
-                | Q(sale__sales_manager__email__icontains=q)
-                | Q(sale__supplier__first_document__icontains=q)
-                | Q(sale__supplier__complete_name__icontains=q)
-                | Q(sale__supplier__email__icontains=q)
-                | Q(sale__payments__borrower__first_document__icontains=q)
-                | Q(sale__payments__borrower__complete_name__icontains=q)
-                | Q(sale__payments__borrower__email__icontains=q)
-            )
+            queryset = search_by_text(queryset, q)
 
         if new_contract_number == "true":
             queryset = queryset.filter(units__new_contract_number=True)
@@ -819,6 +835,10 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
         return queryset
 
     @method_decorator(cache_page(60 * 5))
+    def get_export_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.apply_additional_filters(queryset, self.request)
+
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
         queryset = self.apply_additional_filters(queryset, request)
@@ -831,6 +851,14 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
         serialized_data = self.get_serializer(queryset, many=True).data
         return Response(serialized_data)
 
+    def get_indicator_cache_key(self, request, endpoint):
+        return indicator_cache_key(
+            request,
+            endpoint,
+            tags=("project", "sale"),
+            scope=get_permission_scope(request.user, "resolve_crm.view_project"),
+        )
+
     @action(detail=False, methods=["get"])
     def indicators(self, request, *args, **kwargs):
         request.query_params._mutable = True
@@ -842,7 +870,8 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
         queryset = self.filter_queryset(self.get_queryset())
         queryset = self.apply_additional_filters(queryset, request)
 
-        raw_indicators = queryset.distinct().aggregate(
+        raw_indicators = lean_aggregate(
+            queryset.distinct(),
             designer_pending_count=Count("id", filter=Q(designer_status="P")),
             designer_in_progress_count=Count("id", filter=Q(designer_status="EA")),
             designer_complete_count=Count("id", filter=Q(designer_status="CO")),
@@ -872,12 +901,9 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
 
     @action(detail=False, methods=["get"], url_path="inspections-indicators")
     def inspections_indicators(self, request):
-        filter_params = request.GET.dict()
-        filter_hash = md5(str(filter_params).encode()).hexdigest()
-        cache_key = f"inspections_indicators_{filter_hash}"
-
-        cached_indicators = cache.get(cache_key)
-        if cached_indicators:
+        cache_key = self.get_indicator_cache_key(request, "inspections_indicators")
+        cached_indicators = get_cached("inspections_indicators", cache_key)
+        if cached_indicators is not None:
             return Response({"indicators": cached_indicators})
 
         request.query_params._mutable = True
@@ -885,7 +911,8 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
         queryset = self.filter_queryset(self.get_queryset())
         queryset = self.apply_additional_filters(queryset, request)
 
-        indicators = queryset.aggregate(
+        indicators = lean_aggregate(
+            queryset,
             total_finished=Count(
                 "id",
                 filter=Q(inspection__final_service_opinion__name__icontains="Aprovado"),
@@ -901,16 +928,13 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
             total_not_scheduled=Count("id", filter=Q(inspection__isnull=True)),
         )
 
-        cache.set(cache_key, indicators, 60)
+        set_cached(cache_key, indicators)
         return Response({"indicators": indicators})
 
     @action(detail=False, methods=["get"], url_path="installations-indicators")
     def installation_indicators(self, request, *args, **kwargs):
-        filter_params = request.GET.dict()
-        filter_hash = md5(str(filter_params).encode()).hexdigest()
-        cache_key = f"installation_indicators_{filter_hash}"
-
-        cached_data = cache.get(cache_key)
+        cache_key = self.get_indicator_cache_key(request, "installation_indicators")
+        cached_data = get_cached("installation_indicators", cache_key)
         if cached_data is not None:
             return Response(cached_data)
 
@@ -924,7 +948,8 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
 
         # Count projects by installation status
         status_counts = (
-            queryset.values("installation_status")
+            lean_queryset(queryset, keep={"installation_status"})
+            .values("installation_status")
             .annotate(count=Count("id", distinct=True))
             .order_by("installation_status")
         )
@@ -937,17 +962,14 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
 
         indicators = {"installations_status_count": installation_status_dict}
 
-        cache.set(cache_key, indicators, 60)
+        set_cached(cache_key, indicators)
         return Response({"indicators": indicators})
 
     @action(detail=False, methods=["get"], url_path="constructions-indicators")
     def constructions_indicators(self, request):
-        filter_params = request.GET.dict()
-        filter_hash = md5(str(filter_params).encode()).hexdigest()
-        cache_key = f"constructions_indicators_{filter_hash}"
-
-        cached_indicators = cache.get(cache_key)
-        if cached_indicators:
+        cache_key = self.get_indicator_cache_key(request, "constructions_indicators")
+        cached_indicators = get_cached("constructions_indicators", cache_key)
+        if cached_indicators is not None:
             return Response({"indicators": cached_indicators})
 
         request.query_params._mutable = True
@@ -956,7 +978,8 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
         queryset = self.filter_queryset(self.get_queryset())
         queryset = self.apply_additional_filters(queryset, request)
 
-        indicators = queryset.aggregate(
+        indicators = lean_aggregate(
+            queryset,
             total_pending=Count("id", filter=Q(construction_status="P")),
             total_in_progress=Count("id", filter=Q(construction_status="EA")),
             total_finished=Count("id", filter=Q(construction_status="F")),
@@ -988,18 +1011,14 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
             ),
         )
 
-        cache.set(cache_key, indicators, 60)
+        set_cached(cache_key, indicators)
         return Response({"indicators": indicators})
 
     @action(detail=False, methods=["get"], url_path="logistics-indicators")
     def logistics_indicators(self, request, *args, **kwargs):
-        filter_params = request.GET.dict()
-
-        filter_hash = md5(str(filter_params).encode()).hexdigest()
-        cache_key = f"logistics_indicators_{filter_hash}"
-
-        indicators = cache.get(cache_key)
-        if indicators:
+        cache_key = self.get_indicator_cache_key(request, "logistics_indicators")
+        indicators = get_cached("logistics_indicators", cache_key)
+        if indicators is not None:
             return Response({"indicators": indicators})
 
         request.query_params._mutable = True
@@ -1008,55 +1027,13 @@ class ProjectViewSet(AccessLogMixin, BaseModelViewSet):
         )
         request.query_params._mutable = False
 
+        # purchase_status e delivery_status já vêm anotados pelo get_queryset
         queryset = self.filter_queryset(self.get_queryset())
         queryset = self.apply_additional_filters(queryset, request)
-        queryset = (
-            queryset.with_is_released_to_engineering()
-            .with_purchase_status()
-            .with_delivery_status()
-        )
 
-        PURCHASE_STATUSES = [
-            "Bloqueado",
-            "Liberado",
-            "Pendente",
-            "Compra Realizada",
-            "Cancelado",
-            "Distrato",
-            "Aguardando Previsão de Entrega",
-            "Aguardando Pagamento",
-        ]
-        DELIVERY_STATUSES = [
-            "Bloqueado",
-            "Liberado",
-            "Agendado",
-            "Entregue",
-            "Cancelado",
-        ]
+        indicators = queryset.logistics_status_counts()
 
-        purchase_result = {status: 0 for status in PURCHASE_STATUSES}
-        delivery_result = {status: 0 for status in DELIVERY_STATUSES}
-        total_count = queryset.count()
-
-        for project in queryset:
-            if (
-                hasattr(project, "purchase_status")
-                and project.purchase_status in purchase_result
-            ):
-                purchase_result[project.purchase_status] += 1
-            if (
-                hasattr(project, "delivery_status")
-                and project.delivery_status in delivery_result
-            ):
-                delivery_result[project.delivery_status] += 1
-
-        indicators = {
-            "purchase_status": purchase_result,
-            "delivery_status": delivery_result,
-            "total_count": total_count,
-        }
-
-        cache.set(cache_key, indicators, 60)
+        set_cached(cache_key, indicators)
         return Response({"indicators": indicators})
 
     def retrieve(self, request, *args, **kwargs):
@@ -1617,7 +1594,7 @@ class ValidateContractView(APIView):
 class GenerateContractView(APIView):
     http_method_names = ["post"]
 
-    @transaction.atomic
+    # Só leituras: nenhuma transação fica aberta durante a geração do PDF
     def post(self, request):
         sale_id = request.data.get("sale_id")
         sale = self._get_sale(sale_id)
@@ -1681,7 +1658,7 @@ class GenerateContractView(APIView):
         # Como o envio para o Clicksign será processado de forma assíncrona,
         # não geramos QR code ou URL de validação nesta etapa.
         contract_content = self._replace_variables(
-            contract_template.content,
+            contract_template,
             variables,
             customer_data,
             sale.branch.energy_company.name,
@@ -1694,17 +1671,16 @@ class GenerateContractView(APIView):
             validation_url="",
         )
 
-        pdf = self._generate_pdf(contract_content)
-        if isinstance(pdf, Response):
-            return pdf
-
         if preview:
+            pdf = self._generate_pdf(contract_content)
+            if isinstance(pdf, Response):
+                return pdf
             return self._preview_pdf(pdf)
 
-        # Enfileira o envio do contrato para o Clicksign via Celery.
-        from resolve_crm.task import send_contract_to_clicksign
+        # O worker gera o PDF, grava no storage e encadeia o envio ao Clicksign.
+        from resolve_crm.task import generate_contract_pdf
 
-        send_contract_to_clicksign.delay(sale.id, pdf)
+        generate_contract_pdf.delay(sale.id, contract_content)
 
         return Response(
             {"message": "Contrato enfileirado com sucesso para envio ao Clicksign."},
@@ -1820,7 +1796,7 @@ class GenerateContractView(APIView):
 
     def _replace_variables(
         self,
-        content,
+        contract_template,
         variables,
         customer_data,
         energy_company,
@@ -1852,14 +1828,11 @@ class GenerateContractView(APIView):
                 "validation_url": validation_url,
             }
         )
-        for key, value in variables.items():
-            content = re.sub(rf"{{{{\s*{key}\s*}}}}", str(value), content)
-        return content
+        return render_contract(contract_template, variables)
 
     def _generate_pdf(self, content):
         try:
-            rendered_html = render_to_string("contract_base.html", {"content": content})
-            return HTML(string=rendered_html).write_pdf()
+            return render_contract_pdf(content)
         except Exception as e:
             logger.error(f"Erro ao gerar o PDF: {e}")
             return Response(
@@ -1899,10 +1872,7 @@ class GenerateCustomContract(APIView):
 
         # Gerando o PDF a partir do HTML
         try:
-            rendered_html = render_to_string(
-                "contract_base.html", {"content": contract_html}
-            )
-            pdf = HTML(string=rendered_html).write_pdf()
+            pdf = render_contract_pdf(contract_html)
         except Exception as e:
             return Response(
                 {"message": f"Erro ao gerar o PDF: {e}"},
@@ -1976,108 +1946,34 @@ class JourneyKanbanView(APIView):
     http_method_names = ["get"]
 
     def get(self, request):
-        per_page = 10
-        status_map = {
-            "vistoria": "Vistoria",
-            "documentacao": "Documentação",
-            "financeiro": "Financeiro",
-            "projeto_engenharia": "Projeto de Engenharia",
-            "lista_materiais": "Lista de Materiais",
-            "logistica": "Logística",
-            "instalacao": "Instalação",
-            "vistoria_final": "Vistoria Final",
-            "homologado": "Homologado",
-        }
-        pages = {
-            key: int(request.query_params.get(f"{key}_page", 1)) for key in status_map
-        }
+        qs = kanban_queryset(request.query_params.get("q"))
 
-        qs = (
-            Project.objects.with_current_step()
-            .annotate(
-                customer_name=Case(
-                    When(
-                        sale__customer__complete_name__isnull=False,
-                        then=F("sale__customer__complete_name"),
-                    ),
-                    default=Value(""),
-                    output_field=CharField(),
-                ),
-                contract_number=Case(
-                    When(
-                        sale__contract_number__isnull=False,
-                        then=F("sale__contract_number"),
-                    ),
-                    default=Value(""),
-                    output_field=CharField(),
-                ),
-                signature_date=Case(
-                    When(
-                        sale__signature_date__isnull=False,
-                        then=F("sale__signature_date"),
-                    ),
-                    default=Value(""),
-                    output_field=CharField(),
-                ),
-            )
-            .values(
-                "id",
-                "project_number",
-                "current_step",
-                "customer_name",
-                "sale",
-                "contract_number",
-                "signature_date",
+        # Modo cursor: rolagem infinita dentro de uma única coluna
+        column = request.query_params.get("column")
+        if column:
+            if column not in KANBAN_COLUMNS:
+                return Response(
+                    {"error": f"Coluna inválida: {column}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            try:
+                limit = int(request.query_params.get("limit", DEFAULT_PER_PAGE))
+            except ValueError:
+                limit = DEFAULT_PER_PAGE
+            return Response(
+                fetch_column_after(
+                    qs,
+                    column,
+                    cursor=request.query_params.get("cursor"),
+                    limit=min(max(limit, 1), 100),
+                )
             )
-        )
-
-        # Apply search filter if 'q' parameter exists
-        search_query = request.query_params.get("q")
-        if search_query:
-            qs = qs.filter(
-                Q(project_number__icontains=search_query)
-                | Q(designer__first_document__icontains=search_query)
-                | Q(designer__complete_name__icontains=search_query)
-                | Q(designer__email__icontains=search_query)
-                | Q(homologator__first_document__icontains=search_query)
-                | Q(homologator__complete_name__icontains=search_query)
-                | Q(homologator__email__icontains=search_query)
-                | Q(contract_number__icontains=search_query)
-                | Q(sale__customer__first_document__icontains=search_query)
-                | Q(customer_name=search_query)
-                | Q(sale__customer__email__icontains=search_query)
-                | Q(sale__seller__first_document__icontains=search_query)
-                | Q(sale__seller__complete_name__icontains=search_query)
-                | Q(sale__seller__email__icontains=search_query)
-                | Q(sale__sales_supervisor__first_document__icontains=search_query)
-                | Q(sale__sales_supervisor__complete_name__icontains=search_query)
-                | Q(sale__sales_supervisor__email__icontains=search_query)
-                | Q(sale__sales_manager__first_document__icontains=search_query)
-                | Q(sale__sales_manager__complete_name__icontains=search_query)
-                | Q(sale__sales_manager__email__icontains=search_query)
-                | Q(sale__supplier__first_document__icontains=search_query)
-                | Q(sale__supplier__complete_name__icontains=search_query)
-                | Q(sale__supplier__email__icontains=search_query)
-            )
-
-        result = {}
-        for key, label in status_map.items():
-            if key in {"vistoria", "documentacao", "financeiro"}:
-                filtered = qs.filter(current_step__icontains=label)
-            else:
-                filtered = qs.filter(current_step__iexact=label)
 
-            paginator = Paginator(filtered, per_page)
+        pages = {}
+        for key in KANBAN_COLUMNS:
             try:
-                page = paginator.page(pages[key])
-            except (PageNotAnInteger, EmptyPage):
-                page = paginator.page(1)
-
-            result[key] = {
-                "count": paginator.count,
-                "total_pages": paginator.num_pages,
-                "current_page": page.number,
-                "projects": list(page),
-            }
+                pages[key] = int(request.query_params.get(f"{key}_page", 1))
+            except ValueError:
+                pages[key] = 1
 
-        return Response(result)
+        return Response(build_board(qs, pages))
@@ -22,6 +22,11 @@ CSRF_TRUSTED_ORIGINS = os.environ.get('CSRF_TRUSTED_ORIGINS').split(',') if os.e
 
 GMAPS_API_KEY = os.environ.get('GMAPS_API_KEY')
 
+# Cliente de distâncias de rota (resolve_crm.distance_matrix)
+DISTANCE_MATRIX_CLIENT = os.environ.get(
+    'DISTANCE_MATRIX_CLIENT', 'resolve_crm.distance_matrix.GoogleDistanceMatrixClient'
+)
+
 
 # if not DEBUG:
 #     SESSION_COOKIE_SECURE = True
@@ -90,11 +95,32 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Cache compartilhado entre os workers (database 1 do mesmo Redis dos channels)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_CACHE_URL', 'redis://redis:6379/1'),
+        'KEY_PREFIX': 'resolve_erp',
+    },
+}
+
 CELERY_BEAT_SCHEDULE = {
     'finalize-goals-at-start-of-month': {
         'task': 'resolve_crm.tasks.finalize_monthly_goals',
         'schedule': crontab(day_of_month=1, hour=2, minute=0),
     },
+    'deliver-pending-webhook-events': {
+        'task': 'core.task.deliver_webhook_events',
+        'schedule': 60.0,
+    },
+    'refresh-overdue-payment-summaries': {
+        'task': 'financial.task.refresh_overdue_payment_summaries',
+        'schedule': crontab(hour=0, minute=5),
+    },
+    'rollup-and-prune-endpoint-access': {
+        'task': 'accounts.task.rollup_and_prune_endpoint_access',
+        'schedule': crontab(hour=1, minute=0),
+    },
 }
 
 DJANGO_NOTIFICATIONS_CONFIG = {'SOFT_DELETE': True}
@@ -157,6 +183,15 @@ CELERY_RESULT_BACKEND = "rpc://"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 
+# Filas dedicadas, opcionais: webhooks e geração de PDFs (pool aquecido
+# com fontes e certificado, ex.: celery -A resolve_erp worker -Q pdf)
+CELERY_TASK_ROUTES = {}
+if os.environ.get('WEBHOOK_QUEUE'):
+    CELERY_TASK_ROUTES['core.task.deliver_webhook_events'] = {'queue': os.environ.get('WEBHOOK_QUEUE')}
+if os.environ.get('PDF_QUEUE'):
+    CELERY_TASK_ROUTES['core.task.generate_pdf_document'] = {'queue': os.environ.get('PDF_QUEUE')}
+    CELERY_TASK_ROUTES['resolve_crm.task.generate_contract_pdf'] = {'queue': os.environ.get('PDF_QUEUE')}
+
 # CORS
 
 CORS_ALLOW_ALL_ORIGINS = os.environ.get('CORS_ALLOW_ALL_ORIGINS') == 'True'
@@ -186,6 +221,9 @@ ROOT_URLCONF = 'resolve_erp.urls'
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 DISABLE_ENDPOINT_ACCESS_LOG = os.environ.get('DISABLE_ENDPOINT_ACCESS_LOG', 'False') == 'True'
+# Serve as métricas de jornada do ProjectViewSet a partir de ProjectJourneyState
+# (rodar `manage.py rebuild_journey_states` antes de habilitar)
+USE_PROJECT_JOURNEY_STATE = os.environ.get('USE_PROJECT_JOURNEY_STATE', 'False') == 'True'
 
 
 # Templates
@@ -1,4 +1,4 @@
-from accounts.task import create_endpoint_access_log
+from accounts import access_log
 
 
 class AccessLogMixin:
@@ -15,5 +15,6 @@ class AccessLogMixin:
             ),
             "user_agent": request.META.get("HTTP_USER_AGENT", ""),
         }
-        create_endpoint_access_log.delay(data)
+        # Gravado em lote ao fim da requisição, sem publicar no broker
+        access_log.buffer.push(data)
         return super().finalize_response(request, response, *args, **kwargs)